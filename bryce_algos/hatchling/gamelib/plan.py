@@ -0,0 +1,109 @@
+class TurnPlan:
+    """Collects the spawns and removals you want this turn and commits them together
+
+    Instead of checking and spawning one location at a time, add everything you would like to do
+    with a priority, then call commit(). Actions are validated against the board and your resources
+    in priority order (highest first, then in the order they were added), so when two actions want
+    the same location or the same resources the higher priority one wins. Actions that cannot be
+    done are recorded in dropped with a reason instead of being warned about one by one.
+
+    Attributes:
+        * dropped (list): After commit(), a dict for every action that was not done, with action
+          ("spawn" or "remove"), unit_type, location and reason
+
+    """
+    def __init__(self, game_state):
+        """Creates an empty plan for a turn
+
+        Args:
+            * game_state: The GameState the plan will be committed to
+
+        """
+        self.game_state = game_state
+        self.dropped = []
+        self._actions = []
+
+    def _add(self, action, unit_type, locations, num, priority):
+        if type(locations[0]) == int:
+            locations = [locations]
+        for location in locations:
+            for _ in range(num):
+                self._actions.append((priority, len(self._actions), action, unit_type, location))
+
+    def spawn(self, unit_type, locations, num=1, priority=0):
+        """Plans to spawn units, like GameState.attempt_spawn
+
+        Args:
+            * unit_type: The type of unit to spawn
+            * locations: A single location or list of locations
+            * num: The number of units to spawn at each location
+            * priority: Higher priority actions are validated and committed first
+
+        """
+        self._add("spawn", unit_type, locations, num, priority)
+
+    def remove(self, locations, priority=0):
+        """Plans to remove friendly firewalls, like GameState.attempt_remove
+        """
+        from .game_state import REMOVE
+
+        self._add("remove", REMOVE, locations, 1, priority)
+
+    def _drop(self, action, unit_type, location, reason):
+        self.dropped.append({"action": action, "unit_type": unit_type, "location": location, "reason": reason})
+
+    def commit(self):
+        """Validates every planned action and pushes the valid ones onto the build and deploy stacks
+
+        Returns:
+            The number of actions committed
+
+        """
+        from .game_state import ALL_UNITS, REMOVE, is_stationary
+
+        game_state = self.game_state
+        game_map = game_state.game_map
+        friendly_edges = set()
+        for edge in [game_map.BOTTOM_LEFT, game_map.BOTTOM_RIGHT]:
+            for x, y in game_map.get_edge_locations(edge):
+                friendly_edges.add((x, y))
+        removing = set()
+
+        self.dropped = []
+        committed = 0
+        for _, _, action, unit_type, location in sorted(self._actions, key=lambda entry: (-entry[0], entry[1])):
+            if unit_type not in ALL_UNITS and unit_type != REMOVE:
+                self._drop(action, unit_type, location, "invalid unit")
+                continue
+            if not game_map.in_arena_bounds(location):
+                self._drop(action, unit_type, location, "out of bounds")
+                continue
+            if location[1] >= game_state.HALF_ARENA:
+                self._drop(action, unit_type, location, "enemy territory")
+                continue
+            x, y = map(int, location)
+
+            if action == "remove":
+                if (x, y) in removing:
+                    self._drop(action, unit_type, location, "already removed")
+                elif not game_state.contains_stationary_unit([x, y]):
+                    self._drop(action, unit_type, location, "no firewall")
+                else:
+                    removing.add((x, y))
+                    game_state._build_stack.append((REMOVE, x, y))
+                    committed += 1
+                continue
+
+            stationary = is_stationary(unit_type)
+            units = game_map[x, y]
+            if (stationary and len(units) > 0) or game_state.contains_stationary_unit([x, y]):
+                self._drop(action, unit_type, location, "occupied")
+            elif not stationary and (x, y) not in friendly_edges:
+                self._drop(action, unit_type, location, "not on an edge")
+            elif game_state.number_affordable(unit_type) < 1:
+                self._drop(action, unit_type, location, "unaffordable")
+            else:
+                game_state._commit_spawn(unit_type, [x, y])
+                committed += 1
+        self._actions = []
+        return committed
@@ -0,0 +1,178 @@
+import os
+import random
+import signal
+import socket
+import sys
+import traceback
+
+from .transport import SocketTransport
+from .util import set_transport, debug_write
+from .debug_log import get_log
+
+SOCKET_NAME = "algo_server.sock"
+
+
+def default_socket_path():
+    """The socket run.sh looks for, algo_server.sock next to the strategy file that was run
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), SOCKET_NAME)
+
+
+class _SessionTransport(SocketTransport):
+    """A socket transport that first hands back the config line the server already read
+    """
+    def __init__(self, sock, first_line):
+        SocketTransport.__init__(self, sock)
+        self.first_line = first_line
+
+    def readline(self):
+        if self.first_line is not None:
+            line, self.first_line = self.first_line, None
+            return line
+        return SocketTransport.readline(self)
+
+
+class AlgoServer:
+    """Plays games sent by run.sh over a Unix socket, so Python and gamelib are only started once
+
+    The server reads the config at the start of each game and, when it differs from the last
+    one, runs the strategy's on_game_start with it (see AlgoCore.warm_up). Then it forks: the
+    child plays the game on a copy of the warmed strategy and exits, so nothing one game changes
+    leaks into the next, and games can be played at the same time, including against itself.
+    Only works where os.fork and Unix sockets do, not on Windows.
+
+    Debug output of the games goes to the server's stderr, not to the game.
+
+    Attributes:
+        * strategy (AlgoCore): The strategy every game is played by
+        * path (str): The path of the socket
+        * games (int): The number of games started so far
+
+    """
+    def __init__(self, strategy, path=None, config_timeout=10):
+        """Prepares a server, call serve_forever to start it
+
+        Args:
+            * strategy: An instance of your AlgoStrategy
+            * path: Where to create the socket, default_socket_path() if None
+            * config_timeout: Seconds to wait for the config of a game before dropping the connection
+
+        """
+        self.strategy = strategy
+        self.path = path if path is not None else default_socket_path()
+        self.config_timeout = config_timeout
+        self.games = 0
+        self.sock = None
+        self.children = set()
+
+    def listen(self):
+        """Creates the socket, replacing it if it was left behind by a server that is no longer running
+        """
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+                raise RuntimeError("Another server is already listening on {}".format(self.path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.path)
+            finally:
+                probe.close()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(self.path)
+        self.sock.listen(16)
+
+    def serve_forever(self):
+        """Accepts games until the server is interrupted or sent SIGTERM, then removes the socket
+        """
+        previous = signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        if self.sock is None:
+            self.listen()
+        debug_write("Serving games on {}".format(self.path))
+        get_log().flush()
+        try:
+            while True:
+                conn, _ = self.sock.accept()
+                self.reap()
+                try:
+                    self.handle(conn)
+                except OSError as e:
+                    debug_write("Dropped a game before it started: {}".format(e))
+                    get_log().flush()
+                finally:
+                    conn.close()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+            signal.signal(signal.SIGTERM, previous)
+
+    def handle(self, conn):
+        """Reads the config of a new game, warms the strategy up with it and forks a child to play the game
+        """
+        conn.settimeout(self.config_timeout)
+        transport = _SessionTransport(conn, None)
+        config_string = transport.readline()
+        if config_string == "":
+            return
+        conn.settimeout(None)
+        if "replaySave" in config_string:
+            self.strategy.warm_up(config_string)
+        transport.first_line = config_string
+        self.games += 1
+        # anything still buffered would otherwise be written once by every child
+        get_log().flush()
+        sys.stdout.flush()
+        pid = os.fork()
+        if pid != 0:
+            self.children.add(pid)
+            transport.close()
+            return
+        self.play(transport)
+
+    def play(self, transport):
+        """Runs in the forked child: plays one game and exits
+        """
+        status = 0
+        try:
+            self.sock.close()
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            # every child starts from the server's random state, so give each one its own
+            random.seed()
+            set_transport(transport)
+            self.strategy.start()
+        except BaseException:
+            debug_write(traceback.format_exc())
+            status = 1
+        finally:
+            get_log().flush()
+            transport.close()
+            os._exit(status)
+
+    def reap(self):
+        """Collects children whose game has ended
+        """
+        for pid in list(self.children):
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done = pid
+            if done != 0:
+                self.children.discard(pid)
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+
+def serve(strategy, path=None):
+    """Serves games with the given strategy until interrupted, see AlgoServer
+
+    Args:
+        * strategy: An instance of your AlgoStrategy
+        * path: Where to create the socket, default_socket_path() if None
+
+    """
+    AlgoServer(strategy, path).serve_forever()
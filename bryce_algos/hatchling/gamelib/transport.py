@@ -0,0 +1,163 @@
+import queue
+import sys
+
+
+class TransportClosed(EOFError):
+    """Raised by get_command when a transport that does not exit on EOF is closed
+    """
+    pass
+
+
+class StreamTransport:
+    """Sends and receives commands as lines over a pair of binary streams
+
+    Works with anything that has binary readline, write and flush methods: pipes opened with
+    os.fdopen, named pipes, or the files returned by socket.makefile.
+
+    Attributes:
+        * exit_on_eof (bool): If True, get_command exits the process when the stream ends instead of
+          raising TransportClosed
+
+    """
+    exit_on_eof = False
+
+    def __init__(self, reader, writer):
+        """Wraps a pair of binary streams
+
+        Args:
+            * reader: The stream commands are read from
+            * writer: The stream commands are written to
+
+        """
+        self.reader = reader
+        self.writer = writer
+
+    def readline(self):
+        """Blocks until the next line arrives
+
+        Returns:
+            The line, including its newline, or "" once the stream has ended
+
+        """
+        return self.reader.readline().decode("utf-8")
+
+    def write(self, line):
+        self.writer.write(line.encode("utf-8"))
+        self.writer.flush()
+
+    def close(self):
+        for stream in [self.reader, self.writer]:
+            try:
+                stream.close()
+            except (OSError, ValueError):
+                pass
+
+
+class StdioTransport(StreamTransport):
+    """The default transport, which talks to the game over stdin and stdout
+
+    Reads and writes go through sys.stdin.buffer and sys.stdout.buffer, skipping the text layer.
+    If stdin or stdout has been replaced by a stream without a buffer (an io.StringIO in a test,
+    for example), that stream is used as is. The process exits when stdin ends, because that
+    means the game has closed.
+
+    """
+    exit_on_eof = True
+
+    def __init__(self):
+        StreamTransport.__init__(self, None, None)
+
+    def readline(self):
+        stdin = sys.stdin
+        if not hasattr(stdin, "buffer"):
+            return stdin.readline()
+        return stdin.buffer.readline().decode("utf-8")
+
+    def write(self, line):
+        stdout = sys.stdout
+        # Anything printed through the text layer has to go out first
+        stdout.flush()
+        if not hasattr(stdout, "buffer"):
+            stdout.write(line)
+            stdout.flush()
+            return
+        stdout.buffer.write(line.encode("utf-8"))
+        stdout.buffer.flush()
+
+    def close(self):
+        pass
+
+
+class SocketTransport(StreamTransport):
+    """Sends and receives commands over a connected socket, for example a Unix socket
+
+    """
+    def __init__(self, sock):
+        """Wraps a connected socket. The transport owns the socket and closes it in close().
+        """
+        self.sock = sock
+        StreamTransport.__init__(self, sock.makefile("rb"), sock.makefile("wb"))
+
+    @classmethod
+    def connect(cls, path):
+        """Connects to a Unix socket
+
+        Args:
+            * path: The path of the socket
+
+        Returns:
+            A SocketTransport for the connection
+
+        """
+        import socket
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        return cls(sock)
+
+    def close(self):
+        StreamTransport.close(self)
+        self.sock.close()
+
+
+class QueueTransport:
+    """Sends and receives commands through a pair of in-memory queues, for games run in the same process
+
+    The algo reads from inbox and writes to outbox. Whatever runs the game calls put() to send the
+    algo a line and get() to receive one. Closing the transport ends the algo's game.
+
+    """
+    exit_on_eof = False
+
+    def __init__(self):
+        self.inbox = queue.Queue()
+        self.outbox = queue.Queue()
+
+    def readline(self):
+        return self.inbox.get()
+
+    def write(self, line):
+        self.outbox.put(line)
+
+    def put(self, line):
+        """Sends the algo a line, adding the newline if it is missing
+        """
+        self.inbox.put(line if line.endswith("\n") else line + "\n")
+
+    def get(self, timeout=None):
+        """Waits for the next line the algo writes
+
+        Args:
+            * timeout: The most seconds to wait, or None to wait forever
+
+        Returns:
+            The line, or None if nothing arrived in time
+
+        """
+        try:
+            return self.outbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.inbox.put("")
@@ -2,6 +2,7 @@ import gamelib
 import random
 import math
 import warnings
+import sys
 from sys import maxsize
 from functools import reduce
 
@@ -40,6 +41,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         PING = config["unitInformation"][3]["shorthand"]
         EMP = config["unitInformation"][4]["shorthand"]
         SCRAMBLER = config["unitInformation"][5]["shorthand"]
+        self.placement = gamelib.PlacementOptimizer()
 
 
     def on_turn(self, turn_state):
@@ -91,25 +93,12 @@ class AlgoStrategy(gamelib.AlgoCore):
 
         possible_locations = self.filter_blocked_locations(all_locations, game_state)
 
-        # place destructors
+        # place destructors where they cover the most enemy paths, keeping row 10 clear
         if(len(board_units["D0"]) < 15):
-            for _ in range(10):
-                # First destructor
-                loc = random.randint(0, len(possible_locations) - 1)
-                location = possible_locations[loc]
-                bad_ranges = [game_state.game_map.get_locations_in_range((elt.x, elt.y), 2)
-                              for elt in board_units["D0"]]
-                bad_locs = [elt for row in bad_ranges for elt in row]
-    
-    
-                # place the destroyers
-                if(game_state.number_affordable(DESTRUCTOR) > 0 and
-                   game_state.can_spawn(DESTRUCTOR, location) and
-                   location not in bad_locs and location[1] != 10):
-                    # add destroyers not too close to each other
-                    game_state.attempt_spawn(DESTRUCTOR, location)
-                    possible_locations.remove(location)
-                    bad_locs.extend(game_state.game_map.get_locations_in_range(location, 2))
+            placed = self.placement.place(game_state, DESTRUCTOR, 10,
+                                          exclude=[loc for loc in possible_locations if loc[1] == 10])
+            for location in placed:
+                possible_locations.remove(location)
 
 
         # Then building encryptors
@@ -250,68 +239,39 @@ class AlgoStrategy(gamelib.AlgoCore):
 
 
     def get_diagnostics(self, game_state):
-
-        # create an iterator to go through the map and store everything you find
-        game_state.game_map.__iter__()
-        loc = [13, 0]
-        unit = game_state.game_map.__getitem__(loc)
-        units = {"D0" : [], "E0" : [], "F0" : [], "D1" : [], "E1" : [], "F1" : [],
-                "Efront1" : [], "Efront2" : []}
-
-        # get data on all of your squares
-        try:
-            while(True):
-                # get the diagnostics
-                for elt in unit:
-                    if(elt.unit_type == DESTRUCTOR):
-                        unit_type = "D"
-                    elif(elt.unit_type == ENCRYPTOR):
-                        unit_type = "E"
-                    else:
-                        unit_type = "F"
-                    key = unit_type + str(elt.player_index)
-
-                    if(game_state.HALF_ARENA <= loc[1] and loc[1] < game_state.HALF_ARENA + 2):
-                        # put the front two rows into lists based on the side
-                        if(loc[0] < game_state.HALF_ARENA):
-                            units["Efront1"].append((elt.x, elt.y))
-                        else:
-                            units["Efront2"].append((elt.x, elt.y))
-                
-                    # put this unit into the dictionary
-                    units[key].append(elt)
-
-                # move on to the next space
-                loc = game_state.game_map.__next__()
-                unit = game_state.game_map.__getitem__(loc)
-
-        except StopIteration:
-            return units
+        # the census is built while the turn is parsed, so this just regroups it
+        mine = game_state.census(0)
+        theirs = game_state.census(1)
+        units = {"D0" : mine["units"][DESTRUCTOR], "E0" : mine["units"][ENCRYPTOR], "F0" : mine["units"][FILTER],
+                 "D1" : theirs["units"][DESTRUCTOR], "E1" : theirs["units"][ENCRYPTOR], "F1" : theirs["units"][FILTER],
+                 "Efront1" : [], "Efront2" : []}
+
+        # put the front two rows into lists based on the side
+        for row in range(game_state.HALF_ARENA, game_state.HALF_ARENA + 2):
+            for x, y in mine["row_locations"][row] + theirs["row_locations"][row]:
+                if(x < game_state.HALF_ARENA):
+                    units["Efront1"].append((x, y))
+                else:
+                    units["Efront2"].append((x, y))
+
+        return units
 
     # build units of type unit in locs L
     def spawn_list(self, game_state, unit, L):
-        for loc in L:
-            if(game_state.number_affordable(unit) > 0 and
-               game_state.can_spawn(unit, loc)):
-                game_state.attempt_spawn(unit, loc)
+        plan = gamelib.TurnPlan(game_state)
+        plan.spawn(unit, L)
+        plan.commit()
 
 
     # gets the undefended locations
     def undefended_locs(self, game_state):
         undef_locs = []
-        edges = [game_state.game_map.TOP_RIGHT, game_state.game_map.TOP_LEFT,
-                 game_state.game_map.BOTTOM_RIGHT, game_state.game_map.BOTTOM_RIGHT]
-
-        for i, edge in enumerate(game_state.game_map.get_edges()):
-            for loc in edge:
-                if(game_state.contains_stationary_unit(loc)):
-                    continue
-                # get path of attackers from each location
-                path = game_state.find_path_to_edge(loc, edges[(i + 2) % 4])
-                attackers = [attacker for elt in path
-                                     for attacker in game_state.get_attackers(elt, 1 - i//2)]
-                if len(attackers) == 0:
-                    undef_locs.append(loc)
+
+        # enemy spawns first, then ours
+        for player_index in [1, 0]:
+            for loc, exposure in game_state.edge_exposure(player_index).items():
+                if len(exposure["attackers"]) == 0:
+                    undef_locs.append(list(loc))
 
         game_state.warn(str(undef_locs))
         return undef_locs
@@ -319,4 +279,8 @@ class AlgoStrategy(gamelib.AlgoCore):
 
 if __name__ == "__main__":
     algo = AlgoStrategy()
-    algo.start()
+    if "--serve" in sys.argv:
+        # Keep playing games handed over by run.sh, see gamelib/server.py
+        gamelib.serve(algo)
+    else:
+        algo.start()
@@ -1,4 +1,16 @@
 #!/bin/bash
 
 DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
-${PYTHON_CMD:-python3} -u "$DIR/hatchling.py"
+
+# If a server started with `run.sh --serve` is running, hand the game to it (see gamelib/server.py)
+SOCKET="$DIR/algo_server.sock"
+if [ "$1" != "--serve" ] && [ -S "$SOCKET" ]; then
+    ${PYTHON_CMD:-python3} -S "$DIR/gamelib/relay.py" "$SOCKET"
+    STATUS=$?
+    # 3 means the server could not be reached, so play the game the usual way
+    if [ $STATUS -ne 3 ]; then
+        exit $STATUS
+    fi
+fi
+
+${PYTHON_CMD:-python3} -u "$DIR/hatchling.py" "$@"
@@ -156,6 +156,27 @@ The program also automatically formats the graph input so these run the same:
 
 ----------------------------------------------------------------------------------------
 
+Replays are read with replay_reader.py, one frame at a time, and only the stats, unit counts and
+spawn events of each frame are decoded. Only the numbers shown above are kept, not the frames, so
+a folder of long replays can be summarized without running out of memory.
+
+If a replay has an up to date archive made by replay_archive.py, the archive is read instead,
+which needs no JSON parsing at all. Archives can also be given directly:
+>py scripts/contributions/get_results.py -f [REPLAY_FILE].replay.cols
+
+----------------------------------------------------------------------------------------
+-j: Read replays in parallel
+
+With a lot of replays (after a big run_arena.py tournament, for example), use -j to read them
+in that many processes at once, or -j 0 for one process per CPU:
+>py scripts/contributions/get_results.py -a -j 0
+
+Each process reads whole replays and sends back only the numbers above, which are then added up
+in the original order, so the output is the same as without -j. The summary says how many replays
+were read per second. run_arena.py always uses one process per CPU.
+
+----------------------------------------------------------------------------------------
+
 Everything is output using std.stderr.write, meaning it is safe to import and print
 this from your within game (although there is not really a reason to, since it looks at
 all the data after the replay is completed).
@@ -174,7 +195,10 @@ try:
 	import json
 	import glob
 	import math
+	import time
 	import argparse
+	import multiprocessing
+	from replay_archive import open_replay
 except ImportError as e:
 	sys.stderr.write("WARNING: Module not found, full error:\n\n")
 	sys.stderr.write(e)
@@ -184,6 +208,9 @@ try:
 	plt_installed = True
 except ImportError:
 	try:
+		# worker processes started by -j must not ask again
+		if multiprocessing.current_process().name != 'MainProcess':
+			raise RuntimeError()
 		usr_in = input('Matplotlib not found.\nWould you like this program to try and install matplotlib? (y/n) ')
 		if usr_in.lower() == 'y' or usr_in.lower() == 'yes':
 			import subprocess
@@ -231,6 +258,11 @@ def parse_args():
 		nargs="*",
 		default=[],
 		help="specify what data you would like to be graphed - you must have matplotlib installed\n\nValid Options For Single Game:\n\t- health\n\t- bits\n\t- cores\n\t- cores_spent\n\t- bits_spent\n\t- cores_on_board\n\nValid Options For Multiple Games:\n\t- wins\n\n")
+	ap.add_argument(
+		"-j", "--jobs",
+		type=int,
+		default=1,
+		help="number of processes reading replays at the same time, 0 for one per CPU\n\n")
 	return vars(ap.parse_args())
 
 
@@ -442,14 +474,20 @@ class Algo:
 
 # Stores data from a single replay and creates the Algo classes
 class Replay:
-	def __init__(self, f_name, algos):
+	def __init__(self, f_name, algos, summary=None):
 		self.fname = f_name;
-		self.ref = None
-		self.turns = {}
-		self.valid_turns = []
-
-		self.load_data()				# handles loading all the data from file into python variables
-		self.unpack_data(algos)		# stores relevant data after it has been loaded
+		self.reader = None		# reads frames back from the file, only open while it is being used
+
+		if summary is None:
+			self.reader = open_replay(f_name)	# reads the frames one at a time, only decoding what add_data_to_algo needs
+			self.unpack_data(algos)		# streams the frames from the file and stores the relevant data
+			self.ref = self.reader.config
+			# an archive keeps its file open, so don't hold on to it with hundreds of replays loaded
+			self.reader.close()
+			self.reader = None
+		else:
+			self.merge_summary(summary, algos)		# the data was already read by another process
+			self.ref = summary['ref']
 
 	def __eq__(self, other):
 		return self.fname == other.fname
@@ -460,27 +498,9 @@ class Replay:
 	def __repr__(self):
 		return self.__string()
 
-	def load_data(self):
-		with open(self.fname) as f:
-			for line in f:
-				line = line.replace("\n", "")
-				line = line.replace("\t", "")
-
-				if (line != ''):
-					data = json.loads(line)
-
-					try:
-						data['debug']
-						self.ref = data
-					except:
-						turn_num = data['turnInfo'][1]
-						frame_num = data['turnInfo'][2]
-						self.turns[(turn_num, frame_num)] = data
-						if (turn_num, frame_num) not in self.valid_turns:
-							self.valid_turns.append((turn_num, frame_num))
-
+	# takes the number of each firewall on the board
 	def get_cores_on_board(self, filters, encryptors, destructors):
-		return len(filters) + len(encryptors) * 4 + len(destructors) * 3
+		return filters + encryptors * 4 + destructors * 3
 
 	def get_bits_spent(self, algo, spawn):
 		p_index = 1 if algo == self.algo1 else 2
@@ -496,12 +516,13 @@ class Replay:
 		destructors = [x for x in spawn if x[3] == p_index and x[1] == 2]
 		return len(filters) + len(encryptors) * 4 + len(destructors) * 3
 
-	def add_data_to_algo(self, algo, t, f, stats, units, spawn):
+	# unit_counts is the number of units in each list of the frame's p1Units or p2Units
+	def add_data_to_algo(self, algo, t, f, stats, unit_counts, spawn):
 		algo.add_data(self.fname, t, 'health', stats[0])
 		algo.add_data(self.fname, t, 'cores', stats[1])
 		algo.add_data(self.fname, t, 'bits', stats[2])
 
-		filters, encryptors, destructors, pings, emps, scramblers, removes = units
+		filters, encryptors, destructors, pings, emps, scramblers, removes = unit_counts
 
 		algo.add_data(self.fname, t, 'cores_on_board', self.get_cores_on_board(filters, encryptors, destructors))
 
@@ -511,75 +532,105 @@ class Replay:
 
 	def unpack_data(self, algos):
 		try:
-			self.algo1, self.algo2 = self.create_algos(algos)
-
-			for t, f in self.get_valid_turns():
-				turn = self.get_turn(t, f)
+			end_stats = self.reader.last_frame()['endStats']
+			self.algo1, self.algo2 = self.create_algos(algos, end_stats)
 
-				turn_info = turn['turnInfo']
+			for t, f, turn in self.reader.frames():
 				events = turn['events']
 				spawn = events['spawn']
 
 				p1_stats = turn['p1Stats']
-				p1_units = turn['p1Units']
+				p1_unit_counts = turn['p1UnitCounts']
 
 				p2_stats = turn['p2Stats']
-				p2_units = turn['p2Units']
+				p2_unit_counts = turn['p2UnitCounts']
 
-				self.add_data_to_algo(self.algo1, t, f, p1_stats, p1_units, spawn)
-				self.add_data_to_algo(self.algo2, t, f, p2_stats, p2_units, spawn)
+				self.add_data_to_algo(self.algo1, t, f, p1_stats, p1_unit_counts, spawn)
+				self.add_data_to_algo(self.algo2, t, f, p2_stats, p2_unit_counts, spawn)
 
 			self.algo1.recored_final_data(self.fname, self.algo2)
 			self.algo2.recored_final_data(self.fname, self.algo1)
-			self.algo1.add_end_stats(self.fname, self.turns[self.valid_turns[-1]]['endStats']['player1'])
-			self.algo2.add_end_stats(self.fname, self.turns[self.valid_turns[-1]]['endStats']['player2'])
+			self.algo1.add_end_stats(self.fname, end_stats['player1'])
+			self.algo2.add_end_stats(self.fname, end_stats['player2'])
 		except Exception as e:
 			sys.stderr.write(str(e))
 
 	# only creates a new algo class if that algo does not already exist. Otherwise data is added to the existing one
-	def create_algos(self, algos):
-		end_stats = self.turns[self.valid_turns[-1]]['endStats']
+	def create_algos(self, algos, end_stats):
 		p1_algo = end_stats['player1']['name']
 		p2_algo = end_stats['player2']['name']
 
-		if p1_algo not in algos:
-			algo1 = Algo(p1_algo)
-			algos.append(algo1)
-		else:
-			algo1 = algos[algos.index(p1_algo)]
-
-		if p2_algo not in algos:
-			algo2 = Algo(p2_algo)
-			algos.append(algo2)
-		else:
-			algo2 = algos[algos.index(p2_algo)]
-
-		return algo1, algo2
+		return self.get_algo(algos, p1_algo), self.get_algo(algos, p2_algo)
+
+	# algos is a dict from name to Algo
+	def get_algo(self, algos, name):
+		if name not in algos:
+			algos[name] = Algo(name)
+		return algos[name]
+
+	# the data this replay added to its algos, small enough to be sent back from a worker process
+	def get_summary(self):
+		summary = {'fname': self.fname, 'ref': self.ref, 'algos': []}
+		if hasattr(self, 'algo2'):
+			for algo in [self.algo1] if self.algo1 is self.algo2 else [self.algo1, self.algo2]:
+				summary['algos'].append((algo.name, algo.wins, algo.replays.get(self.fname, {})))
+		return summary
+
+	# adds a summary made by get_summary in another process to the algos here
+	def merge_summary(self, summary, algos):
+		merged = []
+		for name, wins, data in summary['algos']:
+			algo = self.get_algo(algos, name)
+			algo.wins += wins
+			algo.replays[self.fname] = data
+			merged.append(algo)
+		if len(merged) > 0:
+			self.algo1, self.algo2 = merged[0], merged[-1]
 
 	def get_algos(self):
 		return [self.algo1, self.algo2]
 
+	# opens the replay again the first time a frame is asked for
+	def get_reader(self):
+		if self.reader is None:
+			self.reader = open_replay(self.fname)
+			self.reader.build_index()
+		return self.reader
+
+	# frames are not kept in memory, these read them back from the file through the reader's index
 	def get_valid_turns(self):
-		return self.valid_turns
+		return list(self.get_reader().index)
 	def get_turns(self):
-		return self.turns
+		reader = self.get_reader()
+		return {key: reader.frame_at(*key) for key in reader.index}
 	def get_turn(self, turn, frame=-1):
-		return self.turns[(turn, frame)]
+		return self.get_reader().frame_at(turn, frame)
+
+# reads a replay in a worker process and returns its summary
+def summarize_replay(f_name):
+	return Replay(f_name, {}).get_summary()
 
 # handles opening multiple games (replays)
 class FileHandler:
-	def __init__(self):
+	def __init__(self, jobs=1):
 		self.replays = []
-		self.algos = []
+		self.algos = {}		# name -> Algo
+		self.jobs = jobs if jobs > 0 else multiprocessing.cpu_count()
+		self.load_time = 0
 
 	def get_algo_win_summary(self):
-		fill_len = len(max(self.algos, key=lambda e:len(e.name)).name) + 9
+		fill_len = len(max(self.algos.values(), key=lambda e:len(e.name)).name) + 9
 		rtn = 'Wins by algo:\n|\n'
-		for algo in sorted(self.algos, key=lambda e:-1*e.wins):
+		for algo in sorted(self.algos.values(), key=lambda e:-1*e.wins):
 			rtn += '|{: >{fill}} : {}\n'.format(algo.name, algo.wins, fill=fill_len)
 
 		return rtn
 
+	def get_throughput(self):
+		rate = len(self.replays) / self.load_time if self.load_time > 0 else 0
+		return 'Read {} replays in {:.2f}s ({:.1f} replays/s) with {} process{}\n'.format(
+			len(self.replays), self.load_time, rate, self.jobs, 'es' if self.jobs > 1 else '')
+
 	def get_replays(self):
 		return self.replays
 
@@ -601,22 +652,33 @@ class FileHandler:
 		return files[:num]
 
 	def load_files(self, num=1, a=False, f_names=[]):
+		start = time.time()
 		if len(f_names) > 0:
-			for f_name in f_names:
-				if f_name.find('replays') == -1:
-					self.replays.append(Replay('replays/'+f_name, self.algos))
-				else:
-					self.replays.append(Replay(f_name, self.algos))
+			files = [f_name if f_name.find('replays') != -1 else 'replays/'+f_name for f_name in f_names]
+		else:
+			files = self.__latest_replays(num, a)
+
+		if self.jobs > 1 and len(files) > 1:
+			# each worker reads whole replays and sends back only their summaries, merged here in the original order
+			pool = multiprocessing.Pool(min(self.jobs, len(files)))
+			try:
+				chunk_size = max(1, len(files) // (self.jobs * 4))
+				for f_name, summary in zip(files, pool.imap(summarize_replay, files, chunk_size)):
+					self.replays.append(Replay(f_name, self.algos, summary))
+			finally:
+				pool.close()
+				pool.join()
 		else:
-			for f_name in self.__latest_replays(num, a):
+			for f_name in files:
 				self.replays.append(Replay(f_name, self.algos))
+		self.load_time = time.time() - start
 
 	def add_plot(self, lbl):
 		if lbl == 'wins':
 			wins = []
 			lbls = []
 
-			for algo in self.algos:
+			for algo in self.algos.values():
 				wins.append(algo.wins)
 				lbls.append(algo.name)
 
@@ -665,6 +727,7 @@ def run_every_replay_agg(fh, graphing_enabled, options):
 	sys.stderr.write('Summary of {} matches:\n'.format(len(fh.get_replays())))
 	sys.stderr.write('{:->75}\n'.format(''))
 	sys.stderr.write(fh.get_algo_win_summary())
+	sys.stderr.write('|\n{}'.format(fh.get_throughput()))
 
 	if graphing_enabled:
 		Graph.init(options)
@@ -710,7 +773,7 @@ def get_graph_options(options):
 def main(args):
 	verbose_options, summary_options = get_graph_options(args['graph'])
 
-	fh = FileHandler()
+	fh = FileHandler(int(args.get('jobs', 1)))
 	fh.load_files(int(args['num']), args['all'], args['file']) #loads the files - all JSON reading is here
 
 	# check to see if matplotlib is installed
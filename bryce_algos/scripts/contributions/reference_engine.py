@@ -0,0 +1,637 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+A pure python stand-in for engine.jar that plays two python algos against each other in one process.
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the contributions/scripts directory
+
+engine.jar starts a JVM and two run.sh processes for every game, and talks to the algos over
+stdin and stdout. This script loads both algos into its own python process instead, and passes
+the same messages to them through in-memory queues (see QueueTransport in gamelib/transport.py).
+There is no JVM and no process startup, so it is much faster for running lots of games while
+tuning, and it works on machines without java.
+
+Run a game the same way you would with run_match.py:
+>py scripts/contributions/reference_engine.py algos/my-bot1 algos/my-bot2
+
+Or use it for a whole tournament:
+>py scripts/contributions/run_arena.py -a -e python
+
+The replay is written to the replays folder in the same format as engine.jar's, so get_results.py
+and watch_replay.py can read it. Add -q to hide the algos' debug output, -n to change the turn
+limit (default 100) and -c to use a different config than game-configs.json.
+
+Both algos must be python algos built on gamelib, with an AlgoCore subclass in the file run.sh runs.
+Each algo gets its own copy of its own gamelib, so algos with different gamelib versions can play.
+
+This is a reference engine, not a copy of engine.jar. It follows the rules in game-configs.json
+and gamelib's own models (pathing from navigation.py, targeting from
+AdvancedGameState.get_targets), but some details are simplified:
+- Each frame, information units move, then pick up shields, then everything attacks at once,
+then units with no stability left are removed.
+- Shields lose shieldDecayPerFrame every frame until they are used up.
+- A unit that cannot move any further self destructs, dealing its starting stability to every
+enemy unit within selfDestructRadius, if it moved at least stepsRequiredSelfDestruct times.
+- Removed firewalls are taken off the board at the end of the action phase, refunding
+destroyOwnUnitRefund of their cost, scaled by their remaining stability.
+- An algo that crashes or takes longer than waitTimeBotMax to reply loses.
+Use engine.jar to confirm anything important.
+'''
+
+import sys
+try:
+	import os
+	import json
+	import time
+	import random
+	import argparse
+	import itertools
+	import threading
+	import traceback
+	import importlib.util
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+# Get location of the folder holding engine.jar, one above the scripts folder
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), os.pardir))
+
+# indexes of the event lists that hold locations, and of a self destruct's list of hit locations
+# the player number (1 or 2) is always the last item of an event
+event_locations = {'spawn': [0], 'move': [0, 1], 'attack': [0, 1], 'damage': [0], 'death': [0],
+	'breach': [0], 'selfDestruct': [0], 'shield': [0, 1], 'melee': [0, 1]}
+
+def empty_events():
+	return {name: [] for name in event_locations}
+
+# the same location seen from the other side of the board
+def flip(location, size=28):
+	return [size - 1 - location[0], size - 1 - location[1]]
+
+# turns an algo folder or run file into its folder
+def algo_dir(path):
+	path = os.path.abspath(path)
+	if os.path.basename(path) in ['run.sh', 'run.ps1']:
+		path = os.path.dirname(path)
+	return path
+
+# the python file run.sh starts, which holds the algo's AlgoCore subclass
+def strategy_file(directory):
+	run_sh = os.path.join(directory, 'run.sh')
+	if os.path.exists(run_sh):
+		with open(run_sh) as f:
+			for word in f.read().replace('"', ' ').replace('/', ' ').split():
+				if word.endswith('.py') and os.path.exists(os.path.join(directory, word)):
+					return os.path.join(directory, word)
+	return os.path.join(directory, 'algo_strategy.py')
+
+# numbers the modules each game imports, so a second game in the same process never reuses the first one's
+load_count = itertools.count(1)
+
+# imports the gamelib package in directory under a name of its own, so every algo can have its own copy
+def load_gamelib(directory, alias):
+	alias = '{}{}'.format(alias, next(load_count))
+	package_dir = os.path.join(directory, 'gamelib')
+	spec = importlib.util.spec_from_file_location(alias, os.path.join(package_dir, '__init__.py'),
+		submodule_search_locations=[package_dir])
+	lib = importlib.util.module_from_spec(spec)
+	sys.modules[alias] = lib
+	spec.loader.exec_module(lib)
+	return lib
+
+# imports an algo's strategy file with its own gamelib standing in for `import gamelib`
+def load_strategy(path, alias, lib):
+	alias = '{}{}'.format(alias, next(load_count))
+	directory = os.path.dirname(path)
+	previous = sys.modules.get('gamelib')
+	before = set(sys.modules)
+	sys.modules['gamelib'] = lib
+	sys.path.insert(0, directory)
+	try:
+		spec = importlib.util.spec_from_file_location(alias, path)
+		module = importlib.util.module_from_spec(spec)
+		sys.modules[alias] = module
+		spec.loader.exec_module(module)
+	finally:
+		sys.path.remove(directory)
+		if previous is None:
+			del sys.modules['gamelib']
+		else:
+			sys.modules['gamelib'] = previous
+		# forget other files imported from the algo's folder so the next algo imports its own
+		for name in set(sys.modules) - before:
+			module_file = getattr(sys.modules[name], '__file__', None) or ''
+			if name != alias and not name.startswith(lib.__name__ + '.') and module_file.startswith(directory):
+				del sys.modules[name]
+	for value in vars(module).values():
+		if isinstance(value, type) and issubclass(value, lib.AlgoCore) and value.__module__ == alias:
+			return value
+	raise ImportError('No AlgoCore subclass found in {}'.format(path))
+
+# forgets a module loaded by load_gamelib or load_strategy, and its submodules, once its game is over
+def unload(module_name):
+	for name in list(sys.modules):
+		if name == module_name or name.startswith(module_name + '.'):
+			del sys.modules[name]
+
+
+# An algo running on its own thread in this process, talking to the engine through a QueueTransport
+class InProcessAlgo:
+	def __init__(self, path, index, quiet=False):
+		self.directory = algo_dir(path)
+		self.name = os.path.basename(self.directory)
+		self.index = index
+		self.lib = load_gamelib(self.directory, 'arena_algo{}_gamelib_'.format(index))
+		self.strategy = load_strategy(strategy_file(self.directory), 'arena_algo{}_strategy_'.format(index), self.lib)
+		if quiet:
+			self.lib.get_log().level = self.lib.debug_log.OFF
+		self.transport = self.lib.transport.QueueTransport()
+		self.crashed = False
+		self.error = None
+		self.thread = None
+
+	def run(self):
+		try:
+			self.lib.util.set_transport(self.transport)
+			self.strategy().start()
+		except BaseException:
+			self.error = traceback.format_exc()
+		finally:
+			# wakes up the engine if it is waiting for a reply
+			self.transport.write(None)
+
+	def start(self):
+		self.thread = threading.Thread(target=self.run, name=self.name)
+		self.thread.daemon = True
+		self.thread.start()
+
+	def send(self, message):
+		self.transport.put(message)
+
+	# waits for the algo's next line, returns None if it crashed or took longer than timeout seconds
+	def receive(self, timeout):
+		if self.crashed:
+			return None
+		line = self.transport.get(timeout)
+		if line is None:
+			self.crashed = True
+			if self.error is None:
+				self.error = 'Took longer than {:.0f}s to reply'.format(timeout)
+		return line
+
+	# closes the transport, which ends the algo's game if it is still waiting for one, and waits for its thread
+	def stop(self, timeout=5):
+		self.transport.close()
+		if self.thread is not None:
+			self.thread.join(timeout)
+
+	# removes the algo's modules from sys.modules, the algo keeps working if its thread is somehow still running
+	def unload(self):
+		unload(self.lib.__name__)
+		unload(self.strategy.__module__)
+
+
+class ReferenceEngine:
+	def __init__(self, config, algos, max_turns=100):
+		self.config = config
+		self.algos = algos
+		self.max_turns = max_turns
+		# the engine's own copy of gamelib, for the board, pathing and targeting
+		self.lib = load_gamelib(os.path.dirname(algos[0].lib.__path__[0]), 'arena_engine_gamelib_')
+		self.lib.get_log().level = self.lib.debug_log.OFF
+
+		empty = {'turnInfo': [0, 0, -1], 'p1Stats': [0, 0, 0, 0], 'p2Stats': [0, 0, 0, 0],
+			'p1Units': [[] for _ in range(7)], 'p2Units': [[] for _ in range(7)]}
+		self.state = self.lib.AdvancedGameState(config, json.dumps(empty))
+		self.state.suppress_warnings(True)
+		self.game_map = self.state.game_map
+		self.size = self.state.ARENA_SIZE
+		self.unit_info = config['unitInformation']
+		self.type_index = {info['shorthand']: i for i, info in enumerate(self.unit_info)}
+		self.firewall_types = [info['shorthand'] for info in self.unit_info[:3]]
+		self.info_types = [info['shorthand'] for info in self.unit_info[3:6]]
+		self.remove_type = self.unit_info[6]['shorthand']
+
+		game_map = self.game_map
+		edges = game_map.get_edges()
+		self.edges = [set((x, y) for x, y in edge) for edge in edges]
+		self.spawn_edges = [[game_map.BOTTOM_LEFT, game_map.BOTTOM_RIGHT], [game_map.TOP_LEFT, game_map.TOP_RIGHT]]
+		self.target_edge = {game_map.BOTTOM_LEFT: game_map.TOP_RIGHT, game_map.BOTTOM_RIGHT: game_map.TOP_LEFT,
+			game_map.TOP_LEFT: game_map.BOTTOM_RIGHT, game_map.TOP_RIGHT: game_map.BOTTOM_LEFT}
+
+		resources = config['resources']
+		self.health = [resources['startingHP']] * 2
+		self.cores = [resources['startingCores']] * 2
+		self.bits = [resources['startingBits']] * 2
+		self.times = [0, 0]
+		self.spent = [{'cores': 0, 'bits': 0}, {'cores': 0, 'bits': 0}]
+		self.firewalls = []
+		self.info_units = []
+		self.next_id = 0
+		self.layout_version = 0
+		self.paths = {}				# paths from (x, y, target edge), for the current layout only
+		self.paths_version = 0
+		self.turn = 0
+		self.frames = 0
+		self.replay = []
+
+	def new_id(self):
+		self.next_id += 1
+		return str(self.next_id)
+
+	# --- serializing -------------------------------------------------------------------------
+
+	# the frame as the given player sees it, player 0 is the bottom of the board
+	def frame(self, phase, frame_number, events=None, player=0):
+		units = [[[] for _ in range(7)], [[] for _ in range(7)]]
+		for unit in self.all_units():
+			location = [unit.x, unit.y] if player == 0 else flip([unit.x, unit.y], self.size)
+			owner = unit.player_index if player == 0 else 1 - unit.player_index
+			units[owner][self.type_index[unit.unit_type]].append(location + [unit.stability, unit.id])
+			if unit.pending_removal:
+				units[owner][6].append(location + [0, unit.id])
+		stats = [[self.health[i], self.cores[i], self.bits[i], self.times[i]] for i in range(2)]
+		if player == 1:
+			stats.reverse()
+			events = self.flip_events(events)
+		return {'turnInfo': [phase, self.turn, frame_number], 'p1Stats': stats[0], 'p2Stats': stats[1],
+			'p1Units': units[0], 'p2Units': units[1], 'events': events if events is not None else empty_events()}
+
+	def flip_events(self, events):
+		if events is None:
+			return None
+		flipped = {}
+		for name, entries in events.items():
+			flipped[name] = []
+			for entry in entries:
+				entry = list(entry)
+				for i in event_locations.get(name, []):
+					entry[i] = flip(entry[i], self.size)
+				if name == 'selfDestruct':
+					entry[1] = [flip(location, self.size) for location in entry[1]]
+				entry[-1] = 3 - entry[-1]
+				flipped[name].append(entry)
+		return flipped
+
+	# sends a frame to both algos and adds it to the replay
+	def broadcast(self, phase, frame_number, events=None, record=True):
+		for player, algo in enumerate(self.algos):
+			message = json.dumps(self.frame(phase, frame_number, events, player))
+			algo.send(message)
+			# player 1 sees the board the same way the replay does
+			if record and player == 0:
+				self.replay.append(message)
+				self.frames += 1
+
+	# --- the deploy phase --------------------------------------------------------------------
+
+	# asks both algos for their turn, returns [(build, deploy), ...] in board coordinates
+	def collect_turns(self):
+		timeout = self.config['timingAndReplay']['waitTimeBotMax'] / 1000
+		start = time.time()
+		self.broadcast(0, -1, record=False)
+		turns = []
+		for player, algo in enumerate(self.algos):
+			lines = [algo.receive(timeout), algo.receive(timeout)]
+			self.times[player] = int((time.time() - start) * 1000)
+			commands = []
+			for line in lines:
+				try:
+					commands.append([c for c in json.loads(line) if len(c) == 3]) if line else commands.append([])
+				except (ValueError, TypeError):
+					commands.append([])
+			if player == 1:
+				commands = [[[c[0]] + flip(c[1:], self.size) for c in stack] for stack in commands]
+			turns.append(commands)
+		return turns
+
+	def own_half(self, player, y):
+		return y < self.size // 2 if player == 0 else y >= self.size // 2
+
+	def add_unit(self, unit_type, location, player, events):
+		x, y = location
+		unit = self.lib.GameUnit(unit_type, self.config, player, None, x, y)
+		unit.id = self.new_id()
+		self.game_map[x, y].append(unit)
+		if unit.stationary:
+			self.firewalls.append(unit)
+		events['spawn'].append([[x, y], self.type_index[unit_type], unit.id, player + 1])
+		return unit
+
+	def apply_builds(self, player, build, events):
+		for unit_type, x, y in build:
+			location = [int(x), int(y)]
+			if not self.game_map.in_arena_bounds(location) or not self.own_half(player, location[1]):
+				continue
+			firewall = self.state.contains_stationary_unit(location)
+			if unit_type == self.remove_type:
+				if firewall and firewall.player_index == player:
+					firewall.pending_removal = True
+				continue
+			if unit_type not in self.firewall_types or firewall or len(self.game_map[location]) > 0:
+				continue
+			cost = self.unit_info[self.type_index[unit_type]]['cost']
+			if self.cores[player] < cost:
+				continue
+			self.cores[player] -= cost
+			self.spent[player]['cores'] += cost
+			self.add_unit(unit_type, location, player, events)
+			self.layout_version += 1
+
+	def apply_deploys(self, player, deploy, events):
+		for unit_type, x, y in deploy:
+			location = [int(x), int(y)]
+			edge = [e for e in self.spawn_edges[player] if (location[0], location[1]) in self.edges[e]]
+			if unit_type not in self.info_types or len(edge) == 0 or self.state.contains_stationary_unit(location):
+				continue
+			cost = self.unit_info[self.type_index[unit_type]]['cost']
+			if self.bits[player] < cost:
+				continue
+			self.bits[player] -= cost
+			self.spent[player]['bits'] += cost
+			unit = self.add_unit(unit_type, location, player, events)
+			unit.target_edge = self.target_edge[edge[0]]
+			unit.frames = 0
+			unit.moves = 0
+			unit.shield = 0
+			unit.shielded_by = set()
+			unit.path = None
+			self.info_units.append(unit)
+
+	# --- the action phase --------------------------------------------------------------------
+
+	# the rest of a unit's path, starting where it is. Units keep following the same path until a firewall is built or destroyed
+	def path(self, unit):
+		if unit.path is None or unit.path_version != self.layout_version:
+			if self.paths_version != self.layout_version:
+				self.paths = {}
+				self.paths_version = self.layout_version
+			key = (unit.x, unit.y, unit.target_edge)
+			if key not in self.paths:
+				self.paths[key] = self.state.find_path_to_edge([unit.x, unit.y], unit.target_edge)
+			unit.path = self.paths[key]
+			unit.path_version = self.layout_version
+			unit.path_index = 0
+		return unit.path[unit.path_index:] if unit.path is not None else None
+
+	def remove(self, unit, events, by_owner=False):
+		self.game_map[unit.x, unit.y].remove(unit)
+		if unit.stationary:
+			self.firewalls.remove(unit)
+			self.layout_version += 1
+		else:
+			self.info_units.remove(unit)
+		events['death'].append([[unit.x, unit.y], self.type_index[unit.unit_type], unit.id, by_owner, unit.player_index + 1])
+
+	def breach(self, unit, events):
+		info = self.unit_info[self.type_index[unit.unit_type]]
+		damage = info['damageToPlayer']
+		self.health[1 - unit.player_index] -= damage
+		self.cores[unit.player_index] += damage * self.config['resources']['coresForPlayerDamage']
+		events['breach'].append([[unit.x, unit.y], damage, self.type_index[unit.unit_type], unit.id, unit.player_index + 1])
+		self.game_map[unit.x, unit.y].remove(unit)
+		self.info_units.remove(unit)
+
+	def self_destruct(self, unit, events, damage):
+		mechanics = self.config['mechanics']
+		hit = []
+		if unit.moves >= mechanics['stepsRequiredSelfDestruct']:
+			radius = mechanics['selfDestructRadius']
+			for x, y in self.game_map.get_locations_in_range([unit.x, unit.y], radius):
+				if (x - unit.x) ** 2 + (y - unit.y) ** 2 > radius ** 2:
+					continue
+				for other in self.game_map[x, y]:
+					if other.player_index != unit.player_index:
+						damage[other] = damage.get(other, 0) + unit.max_stability
+						hit.append([x, y])
+		events['selfDestruct'].append([[unit.x, unit.y], hit, unit.max_stability, self.type_index[unit.unit_type], unit.id, unit.player_index + 1])
+		self.remove(unit, events)
+
+	def move(self, events, damage):
+		for unit in list(self.info_units):
+			unit.frames += 1
+			if unit.frames < round(1 / unit.speed):
+				continue
+			unit.frames = 0
+			path = self.path(unit)
+			if path is None or len(path) < 2:
+				self.self_destruct(unit, events, damage)
+				continue
+			x, y = path[1]
+			events['move'].append([[unit.x, unit.y], [x, y], [0, 0], self.type_index[unit.unit_type], unit.id, unit.player_index + 1])
+			self.game_map[unit.x, unit.y].remove(unit)
+			unit.x, unit.y = x, y
+			unit.moves += 1
+			unit.path_index += 1
+			self.game_map[x, y].append(unit)
+			if (x, y) in self.edges[unit.target_edge]:
+				self.breach(unit, events)
+
+	def shield(self, events):
+		encryptor = self.firewall_types[1]
+		decay = self.config['mechanics']['shieldDecayPerFrame']
+		encryptors = [u for u in self.firewalls if u.unit_type == encryptor]
+		for unit in self.info_units:
+			if unit.shield > 0:
+				lost = min(decay, unit.shield)
+				unit.shield -= lost
+				unit.stability -= lost
+			for other in encryptors:
+				if other.player_index != unit.player_index or other.id in unit.shielded_by:
+					continue
+				if (other.x - unit.x) ** 2 + (other.y - unit.y) ** 2 <= other.range ** 2:
+					unit.shielded_by.add(other.id)
+					unit.shield += other.damage
+					unit.stability += other.damage
+					events['shield'].append([[other.x, other.y], [unit.x, unit.y], other.damage, self.type_index[encryptor], other.id, unit.id,
+						unit.player_index + 1])
+
+	def all_units(self):
+		return self.firewalls + self.info_units
+
+	def attack(self, events, damage):
+		units = self.all_units()
+		info_units = [u for u in units if not u.stationary]
+		attackers = [u for u in units if not u.stationary or (u.unit_type == self.firewall_types[2] and u.damage > 0)]
+		destructors = [u for u in attackers if u.stationary]
+		moving = [u for u in attackers if not u.stationary]
+		# destructors only shoot information units
+		pairs = list(zip(destructors, [info_units[i] if i is not None else None for i in self.state.get_targets(destructors, info_units)]))
+		pairs += list(zip(moving, [units[i] if i is not None else None for i in self.state.get_targets(moving, units)]))
+		for attacker, target in pairs:
+			if target is None:
+				continue
+			amount = attacker.damage if attacker.stationary else attacker.damage_f if target.stationary else attacker.damage_i
+			if amount <= 0:
+				continue
+			damage[target] = damage.get(target, 0) + amount
+			events['attack'].append([[attacker.x, attacker.y], [target.x, target.y], amount, self.type_index[attacker.unit_type],
+				attacker.id, target.id, attacker.player_index + 1])
+
+	def apply_damage(self, events, damage):
+		for unit, amount in damage.items():
+			unit.stability -= amount
+			events['damage'].append([[unit.x, unit.y], amount, self.type_index[unit.unit_type], unit.id, unit.player_index + 1])
+		for unit in damage:
+			if unit.stability <= 0 and unit in self.game_map[unit.x, unit.y]:
+				self.remove(unit, events)
+
+	def action_phase(self, events):
+		self.broadcast(1, 0, events)
+		frame_number = 0
+		while len(self.info_units) > 0 and frame_number < 10000:
+			frame_number += 1
+			events = empty_events()
+			damage = {}
+			self.move(events, damage)
+			self.shield(events)
+			self.attack(events, damage)
+			self.apply_damage(events, damage)
+			self.broadcast(1, frame_number, events)
+		return frame_number
+
+	# --- the end of a turn -------------------------------------------------------------------
+
+	def end_turn(self):
+		events = empty_events()
+		refund = self.config['mechanics']['destroyOwnUnitRefund']
+		for unit in self.all_units():
+			if unit.stationary and unit.pending_removal:
+				self.cores[unit.player_index] += unit.cost * refund * min(1, unit.stability / unit.max_stability)
+				self.remove(unit, events, by_owner=True)
+		resources = self.config['resources']
+		income, cap = self.lib.projection.bit_schedule(self.config, self.turn + 1)
+		for player in range(2):
+			self.bits[player] = round(min(self.bits[player] * (1 - resources['bitDecayPerRound']) + income, cap), 1)
+			self.cores[player] += resources['coresPerRound']
+		return events
+
+	def winner(self):
+		crashed = [algo.crashed for algo in self.algos]
+		if crashed[0] != crashed[1]:
+			return 2 if crashed[0] else 1
+		if self.health[0] != self.health[1]:
+			return 1 if self.health[0] > self.health[1] else 2
+		return 0
+
+	def play(self):
+		start = time.time()
+		self.replay.append(json.dumps(self.config))
+		for algo in self.algos:
+			algo.start()
+			algo.send(json.dumps(self.config))
+
+		frame_number = 0
+		while True:
+			turns = self.collect_turns()
+			if any(algo.crashed for algo in self.algos):
+				break
+			events = empty_events()
+			for player, (build, deploy) in enumerate(turns):
+				self.apply_builds(player, build, events)
+			for player, (build, deploy) in enumerate(turns):
+				self.apply_deploys(player, deploy, events)
+			frame_number = self.action_phase(events)
+			self.end_turn()
+			if min(self.health) <= 0 or self.turn + 1 >= self.max_turns:
+				break
+			self.turn += 1
+
+		winner = self.winner()
+		end = self.frame(2, frame_number)
+		end['endStats'] = {
+			'winner': winner,
+			'duration': int((time.time() - start) * 1000),
+			'turns': self.turn + 1,
+			'frames': self.frames,
+			'engine': 'python reference engine',
+		}
+		for player, algo in enumerate(self.algos):
+			end['endStats']['player{}'.format(player + 1)] = {
+				'name': algo.name,
+				'crashed': algo.crashed,
+				'points': self.health[player],
+				'total_computation_time': self.times[player],
+				'stationary_resource_spent': self.spent[player]['cores'],
+				'dynamic_resource_spent': self.spent[player]['bits'],
+			}
+		self.replay.append(json.dumps(end))
+		for player, algo in enumerate(self.algos):
+			algo.send(json.dumps(self.frame(2, frame_number, player=player)))
+		for algo in self.algos:
+			algo.stop()
+		return end['endStats']
+
+	def save_replay(self, replay_dir):
+		os.makedirs(replay_dir, exist_ok=True)
+		now = time.time()
+		name = 'p1-{}-{}--{}.replay'.format(time.strftime('%d-%m-%Y-%H-%M-%S', time.localtime(now)), int(now * 1000), random.randint(0, 2 ** 31))
+		path = os.path.join(replay_dir, name)
+		with open(path, 'w') as f:
+			for line in self.replay:
+				f.write(line + '\n')
+		return path
+
+# plays one game between the algos in path1 and path2 and returns its endStats
+def run_game(path1, path2, config=None, max_turns=100, quiet=False, replay_dir=None):
+	if config is None:
+		with open(os.path.join(parent_dir, 'game-configs.json')) as f:
+			config = json.load(f)
+	algos = []
+	engine = None
+	try:
+		algos.append(InProcessAlgo(path1, 1, quiet))
+		algos.append(InProcessAlgo(path2, 2, quiet))
+		engine = ReferenceEngine(config, algos, max_turns)
+		end_stats = engine.play()
+	finally:
+		# every game imports fresh copies of gamelib, so drop this game's before the next one
+		for algo in algos:
+			algo.unload()
+		if engine is not None:
+			unload(engine.lib.__name__)
+	for algo in algos:
+		if algo.error is not None:
+			sys.stderr.write('{} crashed:\n{}\n'.format(algo.name, algo.error))
+	if replay_dir is not None:
+		end_stats['replay'] = engine.save_replay(replay_dir)
+	return end_stats
+
+# handles all the arguments
+def parse_args():
+	ap = argparse.ArgumentParser(add_help=False, formatter_class=argparse.RawTextHelpFormatter)
+	ap.add_argument('-h', '--help', action='help', help='show this help message and exit\n\n')
+	ap.add_argument('algo1', help="folder (or run.sh) of the first algo\n\n")
+	ap.add_argument('algo2', help="folder (or run.sh) of the second algo\n\n")
+	ap.add_argument(
+		"-c", "--config",
+		default=os.path.join(parent_dir, 'game-configs.json'),
+		help="game config to play with (default: game-configs.json next to engine.jar)\n\n")
+	ap.add_argument(
+		"-n", "--turns",
+		type=int,
+		default=100,
+		help="most turns to play before the game ends (default: 100)\n\n")
+	ap.add_argument(
+		"-q", "--quiet",
+		action='store_true',
+		help="hide the algos' debug output\n\n")
+	return vars(ap.parse_args())
+
+if __name__ == '__main__':
+	args = parse_args()
+	with open(args['config']) as f:
+		config = json.load(f)
+	end_stats = run_game(args['algo1'], args['algo2'], config, args['turns'], args['quiet'], os.path.join(parent_dir, 'replays'))
+	names = [end_stats['player1']['name'], end_stats['player2']['name']]
+	result = 'Draw' if end_stats['winner'] == 0 else 'Winner: {}'.format(names[end_stats['winner'] - 1])
+	print('{} vs {} - {} ({} turns, {}ms), replay saved to {}'.format(names[0], names[1], result, end_stats['turns'],
+		end_stats['duration'], end_stats['replay']))
+	# a crashed algo just loses the game, only a failure of the engine itself exits with an error
+	sys.exit(0)
@@ -0,0 +1,453 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+Converts replay files into compact column archives that can be read without parsing any JSON.
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the contributions/scripts directory
+
+A replay file repeats every unit on the board as JSON in every frame, and every tool that reads
+it has to parse all of that again. This script converts a replay into an archive next to it,
+[REPLAY_FILE].replay.cols, that stores the same data as columns of plain numbers:
+
+per frame:		turnInfo, both players' stats, where the frame's units and spawn events start, how many
+				units of each type each player has, and the byte offset of the frame's line in the replay
+per unit:		x, y, hp, type, owner (1 or 2) and id, for every unit of every frame
+per spawn:		x, y, type, owner and id, for every spawn event of every frame
+compressed:		the game config, and the rest of each frame (the other events and endStats) as zlib compressed JSON
+
+The columns are stored uncompressed, so they are read straight from the file through mmap and
+only the parts that are used are loaded, however large the archive. Converting a replay:
+>py scripts/contributions/replay_archive.py replays/[REPLAY_FILE].replay
+
+Use -z to compress the columns as well. The archive is then a fraction of the size of the replay,
+but each column is decompressed into memory the first time it is read.
+
+or every replay in the replays folder (replays that already have an up to date archive are skipped):
+>py scripts/contributions/replay_archive.py -a
+
+get_results.py and watch_replay.py read a replay's archive instead of the replay whenever the
+archive is up to date, and can be given an archive directly:
+>py scripts/contributions/get_results.py -f [REPLAY_FILE].replay.cols
+
+To see what is in an archive:
+>py scripts/contributions/replay_archive.py -i replays/[REPLAY_FILE].replay.cols
+
+From python, ReplayArchive reads frames the same way ReplayReader in replay_reader.py does, and
+column() returns a whole column, for example every unit's hp, without building any frames:
+	archive = ReplayArchive('replays/my.replay.cols')
+	hp = archive.column('unit_hp')
+	for turn, frame, data in archive.frames():
+		...
+	archive.close()
+
+Columns point straight into the file, so they cannot be used after close(). Copy anything you want
+to keep first (hp.tolist() or array.array(hp.format, hp)), and don't keep slices of a column
+(hp[10:20]) past close(), since they stop the file from being unmapped.
+'''
+
+import sys
+try:
+	import os
+	import json
+	import mmap
+	import zlib
+	import glob
+	import array
+	import argparse
+	from replay_reader import ReplayReader, summary_fields, summary_events
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+
+suffix = '.cols'
+magic = b'RPLCOLS1'
+version = 1
+
+# the order of the unit lists in p1Units and p2Units, the last one holds units being removed
+unit_lists = 7
+
+# typecodes of the columns that hold numbers, the others hold zlib compressed bytes
+column_types = {
+	'turn_info':		'q',		# every value of turnInfo, turn_info_width per frame
+	'line_offset':		'q',		# byte offset of the frame's line in the replay
+	'unit_start':		'q',		# index of the frame's first unit, one extra at the end
+	'unit_counts':		'I',		# units in each of the 7 lists of p1Units and then of p2Units, 14 per frame
+	'spawn_start':		'q',		# index of the frame's first spawn event, one extra at the end
+	'unit_x':			'b',
+	'unit_y':			'b',
+	'unit_hp':			'd',		# stored as 'f' when that loses nothing
+	'unit_type':		'b',		# which list of p1Units or p2Units the unit is in
+	'unit_owner':		'b',
+	'unit_id':			'i',
+	'spawn_x':			'b',
+	'spawn_y':			'b',
+	'spawn_type':		'b',
+	'spawn_owner':		'b',
+	'spawn_id':			'i',
+}
+for player in ['p1', 'p2']:
+	for stat in ['health', 'cores', 'bits', 'time']:
+		column_types['{}_{}'.format(player, stat)] = 'd'
+
+# the archive path for a replay
+def archive_path(replay_path):
+	return replay_path + suffix
+
+def is_archive(path):
+	return path.endswith(suffix)
+
+# unit and spawn ids are strings of digits in replays, archives store them as numbers
+def id_to_int(unit_id):
+	number = int(unit_id)
+	if str(number) != unit_id:
+		raise ValueError('Cannot archive unit id {!r}'.format(unit_id))
+	return number
+
+# the archive of a replay, if it exists and was made from the replay as it is now
+def fresh_archive(replay_path):
+	path = archive_path(replay_path)
+	if not os.path.exists(path) or not os.path.exists(replay_path):
+		return None
+	try:
+		header = read_header(path)
+	except (ValueError, OSError):
+		return None
+	stat = os.stat(replay_path)
+	if header['source_size'] != stat.st_size or header['source_mtime'] != stat.st_mtime:
+		return None
+	return path
+
+# opens a replay with ReplayArchive if it is an archive or has an up to date one, and with ReplayReader otherwise
+def open_replay(path, fields=summary_fields, events=summary_events):
+	if not is_archive(path):
+		archived = fresh_archive(path)
+		if archived is None:
+			return ReplayReader(path, fields, events)
+		path = archived
+	return ReplayArchive(path, fields, events)
+
+# converts a replay into an archive and returns the archive's path
+# with compress, the number columns are zlib compressed too, which makes the archive much smaller but means
+# each column read is decompressed into memory instead of being read straight from the file
+def convert(replay_path, out_path=None, compress=False):
+	out_path = out_path if out_path is not None else archive_path(replay_path)
+	columns = {name: array.array(typecode) for name, typecode in column_types.items()}
+	extra = []
+	extra_start = array.array('q', [0])
+	end_stats = []
+	turn_info_width = None
+	extra_size = 0
+
+	reader = ReplayReader(replay_path, fields=None, events=None)
+	row = 0
+	for turn, frame, data in reader.frames():
+		turn_info = data.pop('turnInfo')
+		if turn_info_width is None:
+			turn_info_width = len(turn_info)
+		if len(turn_info) != turn_info_width:
+			raise ValueError('Frame {} has {} values in turnInfo, expected {}'.format(row, len(turn_info), turn_info_width))
+		columns['turn_info'].extend(turn_info)
+		columns['line_offset'].append(reader.index[(turn, frame)])
+
+		for player in ['p1', 'p2']:
+			stats = data.pop(player + 'Stats')
+			for stat, value in zip(['health', 'cores', 'bits', 'time'], stats):
+				columns['{}_{}'.format(player, stat)].append(value)
+
+		columns['unit_start'].append(len(columns['unit_x']))
+		for owner, player in [(1, 'p1'), (2, 'p2')]:
+			units = data.pop(player + 'Units')
+			if len(units) != unit_lists:
+				raise ValueError('Frame {} has {} unit lists for {}, expected {}'.format(row, len(units), player, unit_lists))
+			for unit_type, unit_list in enumerate(units):
+				columns['unit_counts'].append(len(unit_list))
+				for x, y, hp, unit_id in unit_list:
+					columns['unit_x'].append(x)
+					columns['unit_y'].append(y)
+					columns['unit_hp'].append(hp)
+					columns['unit_type'].append(unit_type)
+					columns['unit_owner'].append(owner)
+					columns['unit_id'].append(id_to_int(unit_id))
+
+		events = data.get('events', {})
+		columns['spawn_start'].append(len(columns['spawn_x']))
+		for (x, y), unit_type, unit_id, owner in events.pop('spawn', []):
+			columns['spawn_x'].append(x)
+			columns['spawn_y'].append(y)
+			columns['spawn_type'].append(unit_type)
+			columns['spawn_owner'].append(owner)
+			columns['spawn_id'].append(id_to_int(unit_id))
+
+		if 'endStats' in data:
+			end_stats.append([row, data['endStats']])
+		# everything not stored in a column above, mostly the other events
+		line = json.dumps(data, separators=(',', ':')).encode()
+		extra.append(line)
+		extra_size += len(line)
+		extra_start.append(extra_size)
+		row += 1
+	columns['unit_start'].append(len(columns['unit_x']))
+	columns['spawn_start'].append(len(columns['spawn_x']))
+
+	# hp is usually a whole or half number, which a 4 byte float holds exactly
+	single = array.array('f', columns['unit_hp'])
+	if list(single) == list(columns['unit_hp']):
+		columns['unit_hp'] = single
+
+	parts = []
+	for name in sorted(columns):
+		data = columns[name].tobytes()
+		parts.append((name, zlib.compress(data) if compress else data, columns[name].typecode, compress))
+	parts.append(('config', zlib.compress(json.dumps(reader.config).encode()), None, True))
+	parts.append(('extra', zlib.compress(b''.join(extra)), None, True))
+	parts.append(('extra_start', zlib.compress(extra_start.tobytes()), 'q', True))
+	stat = os.stat(replay_path)
+	header = {
+		'version':			version,
+		'byteorder':		sys.byteorder,
+		'source':			os.path.basename(replay_path),
+		'source_size':		stat.st_size,
+		'source_mtime':		stat.st_mtime,
+		'frames':			row,
+		'units':			len(columns['unit_x']),
+		'turn_info_width':	turn_info_width or 0,
+		'end_stats':		end_stats,
+		'columns':			{},
+	}
+
+	# lays the columns out one after the other, each starting on a multiple of 8 bytes
+	offset = 0
+	for name, data, typecode, compressed in parts:
+		header['columns'][name] = [offset, len(data), typecode, compressed]
+		offset += len(data) + (-len(data)) % 8
+
+	encoded = json.dumps(header).encode()
+	encoded += b' ' * ((-len(encoded)) % 8)
+	tmp_path = out_path + '.tmp'
+	with open(tmp_path, 'wb') as f:
+		f.write(magic)
+		f.write(len(encoded).to_bytes(8, 'little'))
+		f.write(encoded)
+		for name, data, typecode, compressed in parts:
+			f.write(data)
+			f.write(b'\0' * ((-len(data)) % 8))
+	os.replace(tmp_path, out_path)
+	return out_path
+
+# reads the header of an archive, column offsets in it are relative to the end of the header
+def read_header(path):
+	with open(path, 'rb') as f:
+		if f.read(8) != magic:
+			raise ValueError('{} is not a replay archive'.format(path))
+		length = int.from_bytes(f.read(8), 'little')
+		header = json.loads(f.read(length).decode())
+	if header['version'] != version:
+		raise ValueError('{} is a version {} archive, expected {}'.format(path, header['version'], version))
+	header['data_start'] = 16 + length
+	return header
+
+
+# reads an archive made by convert(), with the same interface as ReplayReader
+class ReplayArchive:
+	def __init__(self, path, fields=summary_fields, events=summary_events):
+		self.path = path
+		self.header = read_header(path)
+		self.fields = set(fields) if fields is not None else None
+		self.events = set(events) if events is not None else None
+		# the map keeps the file open by itself, so only one file descriptor is used per archive
+		with open(path, 'rb') as f:
+			self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		self.columns = {}
+		self.extra = None
+		self.end_stats = {row: stats for row, stats in self.header['end_stats']}
+		self.config = json.loads(self.blob('config').decode())
+
+		# (turn, frame) -> the last row with those numbers, like the byte offsets in ReplayReader.index
+		self.index = {}
+		turn_info = self.column('turn_info')
+		width = self.header['turn_info_width']
+		for row in range(len(self)):
+			self.index[(turn_info[row * width + 1], turn_info[row * width + 2])] = row
+
+	def __len__(self):
+		return self.header['frames']
+
+	# releases every column returned by column(), which cannot be used after this, and unmaps the file
+	# a slice of a column still holds the map open, so close() raises BufferError while one is kept
+	def close(self):
+		for view in self.columns.values():
+			view.release()
+		self.columns = {}
+		self.extra = None
+		self.map.close()
+
+	# the bytes of a column, decompressed if the column is compressed
+	def blob(self, name):
+		offset, length, typecode, compressed = self.header['columns'][name]
+		start = self.header['data_start'] + offset
+		data = self.map[start:start + length]
+		return zlib.decompress(data) if compressed else data
+
+	# a column as a memoryview, straight into the file unless the column is compressed
+	def column(self, name):
+		if name not in self.columns:
+			offset, length, typecode, compressed = self.header['columns'][name]
+			if compressed or self.header['byteorder'] != sys.byteorder:
+				values = array.array(typecode, self.blob(name))
+				if self.header['byteorder'] != sys.byteorder:
+					values.byteswap()
+				view = memoryview(values)
+			else:
+				start = self.header['data_start'] + offset
+				view = memoryview(self.map)[start:start + length].cast(typecode)
+			self.columns[name] = view
+		return self.columns[name]
+
+	def wants(self, field):
+		return self.fields is None or field in self.fields
+
+	def wants_event(self, event):
+		return self.events is None or event in self.events
+
+	# the JSON of the parts of a frame that are not in columns, decompressed the first time it is needed
+	def extra_data(self, row):
+		if self.extra is None:
+			self.extra = (self.blob('extra'), self.column('extra_start'))
+		data, starts = self.extra
+		return json.loads(data[starts[row]:starts[row + 1]].decode())
+
+	def stats(self, row, player):
+		time = self.column(player + '_time')[row]
+		return [self.column(player + '_health')[row], self.column(player + '_cores')[row], self.column(player + '_bits')[row],
+			int(time) if time.is_integer() else time]
+
+	# p1Units or p2Units of a frame, in the same form as in the replay
+	def units(self, row, owner):
+		counts = self.column('unit_counts')[row * 2 * unit_lists:(row + 1) * 2 * unit_lists]
+		start = self.column('unit_start')[row]
+		if owner == 2:
+			start += sum(counts[:unit_lists])
+		counts = counts[unit_lists:] if owner == 2 else counts[:unit_lists]
+		end = start + sum(counts)
+		rows = list(map(list, zip(self.column('unit_x')[start:end].tolist(), self.column('unit_y')[start:end].tolist(),
+			self.column('unit_hp')[start:end].tolist(), map(str, self.column('unit_id')[start:end].tolist()))))
+		rtn = []
+		pos = 0
+		for count in counts:
+			rtn.append(rows[pos:pos + count])
+			pos += count
+		return rtn
+
+	def spawns(self, row):
+		start, end = self.column('spawn_start')[row], self.column('spawn_start')[row + 1]
+		if start == end:
+			return []
+		return [[[x, y], unit_type, str(unit_id), owner] for x, y, unit_type, unit_id, owner in zip(
+			self.column('spawn_x')[start:end].tolist(), self.column('spawn_y')[start:end].tolist(), self.column('spawn_type')[start:end].tolist(),
+			self.column('spawn_id')[start:end].tolist(), self.column('spawn_owner')[start:end].tolist())]
+
+	# builds the wanted fields of a frame, full builds every field exactly as it is in the replay
+	def frame_data(self, row, full=False):
+		every_event = full or self.events is None
+		full = full or self.fields is None
+		data = {}
+		if full or every_event or any(event != 'spawn' for event in self.events):
+			extra = self.extra_data(row)
+			events = extra.pop('events', None)
+			if full:
+				data = extra
+			if events is not None:
+				data['events'] = {event: value for event, value in events.items() if every_event or event in self.events}
+		width = self.header['turn_info_width']
+		data['turnInfo'] = self.column('turn_info')[row * width:(row + 1) * width].tolist()
+		for owner, player in [(1, 'p1'), (2, 'p2')]:
+			if full or self.wants(player + 'Stats'):
+				data[player + 'Stats'] = self.stats(row, player)
+			if full or self.wants(player + 'Units'):
+				data[player + 'Units'] = self.units(row, owner)
+			if not full and self.wants(player + 'UnitCounts'):
+				start = (row * 2 + owner - 1) * unit_lists
+				data[player + 'UnitCounts'] = self.column('unit_counts')[start:start + unit_lists].tolist()
+		if every_event or 'spawn' in self.events:
+			data.setdefault('events', {})['spawn'] = self.spawns(row)
+		if (full or self.wants('endStats')) and row in self.end_stats:
+			data['endStats'] = self.end_stats[row]
+		return data
+
+	# yields (turn, frame, data) for each frame, in order, like ReplayReader.frames
+	def frames(self):
+		turn_info = self.column('turn_info')
+		width = self.header['turn_info_width']
+		for row in range(len(self)):
+			yield turn_info[row * width + 1], turn_info[row * width + 2], self.frame_data(row)
+
+	def build_index(self):
+		return self.index
+
+	def frame_at(self, turn, frame=-1, full=True):
+		return self.frame_data(self.index[(turn, frame)], full)
+
+	def last_frame(self, full=False):
+		return self.frame_data(len(self) - 1, full)
+
+	# the byte offset of a frame's line in the replay the archive was made from
+	def line_offset(self, turn, frame=-1):
+		return self.column('line_offset')[self.index[(turn, frame)]]
+
+
+# handles all the arguments
+def parse_args():
+	ap = argparse.ArgumentParser(add_help=False, formatter_class=argparse.RawTextHelpFormatter)
+	ap.add_argument('-h', '--help', action='help', help='show this help message and exit\n\n')
+	ap.add_argument(
+		"files",
+		nargs='*',
+		default=[],
+		help="replay files to convert\n\n")
+	ap.add_argument(
+		"-a", "--all",
+		action='store_true',
+		help="convert every replay in the replays folder\n\n")
+	ap.add_argument(
+		"-z", "--compress",
+		action='store_true',
+		help="compress every column, for a much smaller archive that cannot be read straight from the file\n\n")
+	ap.add_argument(
+		"-i", "--info",
+		action='store_true',
+		help="print what is in the given archives instead of converting\n\n")
+	return vars(ap.parse_args())
+
+if __name__ == '__main__':
+	args = parse_args()
+	files = args['files']
+	if args['all']:
+		replay_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir, os.pardir, 'replays'))
+		files += sorted(glob.glob(os.path.join(replay_dir, '*.replay')))
+	if len(files) == 0:
+		print ('No replays given - no action taken, see -h')
+		sys.exit()
+
+	for path in files:
+		if args['info']:
+			archive = ReplayArchive(path)
+			print ('{}: {} frames, {} units, made from {}'.format(path, len(archive), archive.header['units'], archive.header['source']))
+			for name, (offset, length, typecode, compressed) in sorted(archive.header['columns'].items()):
+				print ('|{: >16} : {} bytes{}{}'.format(name, length, ', ' + typecode if typecode else '', ', zlib' if compressed else ''))
+			archive.close()
+			continue
+		if fresh_archive(path) is not None:
+			print ('{}: archive is up to date'.format(path))
+			continue
+		try:
+			out_path = convert(path, compress=args['compress'])
+			print ('{}: {:.1f} MB -> {:.1f} MB'.format(path, os.path.getsize(path) / 1e6, os.path.getsize(out_path) / 1e6))
+		except (ValueError, KeyError, TypeError, OSError) as e:
+			print ('{}: could not convert, {}'.format(path, e))
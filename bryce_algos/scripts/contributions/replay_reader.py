@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+Reads replay files one frame at a time, decoding only the fields you ask for.
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the contributions/scripts directory
+
+A replay file is one line of JSON per frame, and most of each line is the unit lists and the
+events of the action phase. get_results.py only needs a few small fields of every frame, so
+instead of loading the whole file and decoding every line, ReplayReader reads one line at a time
+and only decodes the fields it was asked for. Everything else is skipped without being decoded.
+Only one frame is held in memory at a time, however long the replay is.
+
+While reading, the reader builds a dict from (turn, frame) to the byte offset of the frame's
+line, so any frame can be read again later without reading the file from the start.
+
+Example:
+	reader = ReplayReader('replays/my.replay', fields=['turnInfo', 'p1Stats', 'p2Stats'], events=['spawn'])
+	for turn, frame, data in reader.frames():
+		print (turn, frame, data['p1Stats'][0], len(data['events']['spawn']))
+	full_frame = reader.frame_at(5, 0)
+
+Fields are top level keys of a frame (turnInfo, p1Stats, p2Stats, p1Units, p2Units, endStats...).
+Events are keys of the frame's events (spawn, move, attack, damage, death, breach...) and end up
+in data['events'] as usual. Pass fields=None to decode every field, or events=None to keep every
+event. The fields p1UnitCounts and
+p2UnitCounts hold the number of units in each of the lists of p1Units and p2Units, without keeping
+the units themselves.
+
+To time how long reading a replay takes:
+>py scripts/contributions/replay_reader.py replays/my.replay
+'''
+
+import sys
+try:
+	import os
+	import re
+	import json
+	import time
+	from results_store import read_last_line
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+
+# what get_results.py needs from each frame
+summary_fields = ['turnInfo', 'p1Stats', 'p2Stats', 'p1UnitCounts', 'p2UnitCounts', 'endStats']
+summary_events = ['spawn']
+
+# fields that are worked out from another field, and the field they come from
+count_fields = {'p1UnitCounts': 'p1Units', 'p2UnitCounts': 'p2Units'}
+
+decoder = json.JSONDecoder()
+
+class ReplayReader:
+	def __init__(self, path, fields=summary_fields, events=summary_events):
+		self.path = path
+		self.config = None		# the first line of the replay, with the game's config
+		self.index = {}			# (turn, frame) -> byte offset of that frame's line, filled in as the file is read
+		self.events = set(events) if events is not None else None		# None keeps every event
+		self.counts = {}		# p1Units -> p1UnitCounts if the counts were asked for
+		if fields is None:
+			self.pattern = None
+		else:
+			self.fields = set(fields)
+			for field in fields:
+				if field in count_fields:
+					self.counts[count_fields[field]] = field
+			# the key of a wanted field and the whitespace up to its value, turnInfo is always needed to tell frames apart
+			keys = ['turnInfo'] + [key for key in fields if key != 'turnInfo' and key not in count_fields]
+			keys += list(self.events) if self.events is not None else ['events']
+			keys += [key for key in self.counts if key not in keys]
+			self.pattern = re.compile(r'"({})"\s*:\s*'.format('|'.join(re.escape(key) for key in keys)))
+
+	# decodes the wanted fields of one line
+	def decode(self, line):
+		if self.pattern is None:
+			data = json.loads(line)
+			if self.events is not None and 'events' in data:
+				data['events'] = {key: value for key, value in data['events'].items() if key in self.events}
+			return data
+		data = {}
+		pos = 0
+		while True:
+			match = self.pattern.search(line, pos)
+			if match is None:
+				return data
+			value, pos = decoder.raw_decode(line, match.end())
+			key = match.group(1)
+			if self.events is not None and key in self.events:
+				data.setdefault('events', {})[key] = value
+				continue
+			if key in self.counts:
+				data[self.counts[key]] = [len(units) for units in value]
+			if key in self.fields or key == 'turnInfo' or (key == 'events' and self.events is None):
+				data[key] = value
+
+	# yields (turn, frame, data) for each frame in the file, in order
+	# the end of game frame has the same turn and frame numbers as the frame before it, so it is yielded
+	# twice, and the index points to the last line with those numbers
+	def frames(self):
+		with open(self.path, 'rb') as f:
+			offset = 0
+			for raw in f:
+				line_offset = offset
+				offset += len(raw)
+				line = raw.decode('utf-8').replace('\t', '').strip()
+				if line == '':
+					continue
+				data = self.decode(line)
+				if 'turnInfo' not in data:
+					full = json.loads(line)
+					if 'debug' in full:
+						self.config = full
+					continue
+				key = (data['turnInfo'][1], data['turnInfo'][2])
+				self.index[key] = line_offset
+				yield key[0], key[1], data
+
+	# reads the whole file once to fill in the index and config, without keeping any frames
+	def build_index(self):
+		reader = ReplayReader(self.path, fields=[], events=[])
+		for _ in reader.frames():
+			pass
+		self.index, self.config = reader.index, reader.config
+		return self.index
+
+	# reads a single frame through the index, with every field decoded unless full is False
+	def frame_at(self, turn, frame=-1, full=True):
+		if len(self.index) == 0:
+			self.build_index()
+		with open(self.path, 'rb') as f:
+			f.seek(self.index[(turn, frame)])
+			line = f.readline().decode('utf-8').replace('\t', '').strip()
+		return json.loads(line) if full else self.decode(line)
+
+	# the last frame of the replay, which holds the endStats, read from the end of the file
+	def last_frame(self, full=False):
+		line = read_last_line(self.path).replace('\t', '')
+		return json.loads(line) if full else self.decode(line)
+
+	# the file is only open while it is being read, so there is nothing to close, but ReplayArchive needs closing
+	def close(self):
+		pass
+
+if __name__ == '__main__':
+	if len(sys.argv) < 2:
+		print ('Usage: replay_reader.py REPLAY_FILE [REPLAY_FILE ...]')
+		sys.exit()
+	for path in sys.argv[1:]:
+		start = time.time()
+		frames = sum(1 for _ in ReplayReader(path).frames())
+		streamed = time.time() - start
+		start = time.time()
+		with open(path) as f:
+			for line in f:
+				if line.strip() != '':
+					json.loads(line)
+		decoded = time.time() - start
+		print ('{}: {} frames, {:.1f} MB, {:.3f}s reading the summary fields, {:.3f}s decoding every line'.format(
+			os.path.basename(path), frames, os.path.getsize(path) / 1e6, streamed, decoded))
@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+An append-only store of finished arena matches, so an interrupted tournament can pick up where it left off.
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the contributions/scripts directory
+
+run_arena.py writes one line of JSON to the store as soon as each match finishes, so nothing
+that was played is lost if the tournament crashes or is stopped.
+
+The store is also a cache. Each algo is hashed from the files that decide how it plays: the .py
+files next to run.sh, everything in gamelib, algo.json, run.sh, run.ps1 and the engine's
+game-configs.json. When run_arena.py is run again with the same store, a match between two algos
+with the same hashes and the same seed as a match that already finished on the same engine is not
+played again, its result is copied instead. So after changing one algo, only the matches it plays
+are rerun. Results from engine.jar and from reference_engine.py are never mixed up.
+
+Each line holds:
+algo1, algo2:		the folder names of the two algos
+hash1, hash2:		the hash of each algo when the match was played
+seed:				which game between the two algos this was, from 0 to one less than run_arena.py's -g
+engine:				which engine played the match, 'java' for engine.jar or 'python' for reference_engine.py
+key:				the match key, the two names and the seed
+result:				'ok', 'error' or 'timeout', a game that ended without a replay that can be found is an 'error'
+replay:				the path of the replay file (null if it could not be found)
+winner:				the name of the winning algo (null for a draw or if there is no replay)
+end_stats:			the endStats of the replay, for player1 and player2
+duration:			how long the match took to run, in seconds
+log:				the file the game's output was written to
+finished:			when the match finished, in seconds since the epoch
+cached:				true if the result was copied from an earlier match instead of being played
+
+The store is a plain text file, so you can read it with anything. To list the results:
+>py scripts/contributions/results_store.py arena_results.jsonl
+
+A line that was only half written when the script was killed is ignored, and the match is played again.
+Only matches that finished cleanly are reused, so errors and timeouts are always played again.
+'''
+
+import sys
+try:
+	import os
+	import json
+	import glob
+	import hashlib
+	import threading
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+
+# files directly in an algo folder that change how it plays, besides its .py files
+algo_files = ['algo.json', 'run.sh', 'run.ps1']
+
+# lists the files of an algo that change how it plays, relative to the algo folder
+def algo_sources(algo_dir):
+	sources = [name for name in os.listdir(algo_dir) if name.endswith('.py') or name in algo_files]
+	for root, dirs, files in os.walk(os.path.join(algo_dir, 'gamelib')):
+		dirs[:] = [d for d in dirs if d != '__pycache__']
+		sources += [os.path.relpath(os.path.join(root, name), algo_dir) for name in files if name.endswith('.py')]
+	return sorted(source.replace('\\', '/') for source in sources)
+
+# hashes an algo's sources, and the game config if given, so a changed algo can be told apart from the old one
+def hash_algo(algo_dir, config_path=None):
+	digest = hashlib.sha1()
+	for source in algo_sources(algo_dir):
+		digest.update(source.encode() + b'\0')
+		with open(os.path.join(algo_dir, source), 'rb') as f:
+			digest.update(f.read() + b'\0')
+	if config_path is not None and os.path.exists(config_path):
+		with open(config_path, 'rb') as f:
+			digest.update(f.read())
+	return digest.hexdigest()
+
+# the key a match is stored under, the first game between two algos has no seed in its key
+def match_key(name1, name2, seed=0):
+	if seed == 0:
+		return '{} vs {}'.format(name1, name2)
+	return '{} vs {} #{}'.format(name1, name2, seed)
+
+# reads the last line of a file without reading the rest of it
+def read_last_line(path, chunk_size=65536):
+	with open(path, 'rb') as f:
+		f.seek(0, os.SEEK_END)
+		end = f.tell()
+		data = b''
+		pos = end
+		while pos > 0:
+			step = min(chunk_size, pos)
+			pos -= step
+			f.seek(pos)
+			data = f.read(step) + data
+			stripped = data.rstrip()
+			if b'\n' in stripped:
+				return stripped.rsplit(b'\n', 1)[1].decode()
+		return data.strip().decode()
+
+# the last frame of a replay if it is the end of a game between name1 and name2, otherwise None
+def replay_end(path, name1, name2):
+	try:
+		frame = json.loads(read_last_line(path))
+		end_stats = frame['endStats']
+		if end_stats['player1']['name'] == name1 and end_stats['player2']['name'] == name2:
+			return frame
+	except (ValueError, KeyError, TypeError, OSError):
+		pass
+	return None
+
+# finds the replay in replay_dir of a game between name1 and name2 that ran from since to until, other than the ones in skip
+# the engine writes the replay as the game goes, so of the replays last written while the game ran, the one
+# written closest to its end is taken, which keeps two games between the same algos running at once apart
+# returns the replay path and its last frame, or (None, None)
+def find_replay(replay_dir, name1, name2, since, skip=(), until=None):
+	files = []
+	for path in glob.glob(os.path.join(replay_dir, '*.replay')):
+		mtime = os.path.getmtime(path)
+		if mtime >= since - 1 and (until is None or mtime <= until + 1) and path not in skip:
+			files.append((abs(mtime - until) if until is not None else -mtime, path))
+	for _, path in sorted(files):
+		frame = replay_end(path, name1, name2)
+		if frame is not None:
+			return path, frame
+	return None, None
+
+# the replay reference_engine.py says it saved in a game's log, or None
+def logged_replay(log_path):
+	replay = None
+	try:
+		with open(log_path, 'r', errors='replace') as f:
+			for line in f:
+				if 'replay saved to ' in line:
+					replay = line.rsplit('replay saved to ', 1)[1].strip()
+	except OSError:
+		return None
+	return replay
+
+# decides the winner from the last frame of a replay, by the winner in its endStats (1, 2, or 0 for a draw)
+# if it has one, otherwise the same way get_results.py does, by remaining health
+# a player that crashed or ran out of time loses even with more health left, so endStats comes first
+def replay_winner(frame, name1, name2):
+	winner = frame.get('endStats', {}).get('winner')
+	if winner in (0, 1, 2):
+		return [None, name1, name2][winner]
+	p1_health = frame['p1Stats'][0]
+	p2_health = frame['p2Stats'][0]
+	if p1_health > p2_health:
+		return name1
+	if p2_health > p1_health:
+		return name2
+	return None
+
+
+class ResultsStore:
+	def __init__(self, path):
+		self.path = path
+		self.lock = threading.Lock()
+		self.claimed = set()	# replays already recorded by this run, so two games between the same algos don't share one
+
+	# every record in the store, oldest first. Lines that cannot be read are skipped
+	def load(self):
+		records = []
+		if not os.path.exists(self.path):
+			return records
+		with open(self.path, 'r') as f:
+			for line in f:
+				line = line.strip()
+				if line == '':
+					continue
+				try:
+					records.append(json.loads(line))
+				except ValueError:
+					sys.stderr.write('Skipping unreadable line in {}\n'.format(self.path))
+		return records
+
+	# the latest record for each match key
+	def latest(self):
+		return {record['key']: record for record in self.load()}
+
+	# the latest clean result for each (hash1, hash2, seed, engine), which a rerun can reuse
+	# records written before the engine was stored were all played by engine.jar
+	def cached(self):
+		cache = {}
+		for record in self.load():
+			if record['result'] == 'ok':
+				cache[(record['hash1'], record['hash2'], record.get('seed', 0), record.get('engine', 'java'))] = record
+		return cache
+
+	# copies a cached result to a match between name1 and name2 and appends it
+	def reuse(self, cached, name1, name2, seed=0):
+		record = dict(cached)
+		record.update({
+			'algo1':		name1,
+			'algo2':		name2,
+			'key':			match_key(name1, name2, seed),
+			'seed':			seed,
+			'cached':		True,
+		})
+		if cached['winner'] is not None:
+			record['winner'] = name1 if cached['winner'] == cached['algo1'] else name2
+		self.append(record)
+		return record
+
+	# appends a record and makes sure it is on disk before returning
+	def append(self, record):
+		line = json.dumps(record, sort_keys=True) + '\n'
+		with self.lock:
+			# start a new line if the last write was cut off, so only the broken record is lost
+			if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+				with open(self.path, 'rb') as f:
+					f.seek(-1, os.SEEK_END)
+					if f.read(1) != b'\n':
+						line = '\n' + line
+			with open(self.path, 'a') as f:
+				f.write(line)
+				f.flush()
+				os.fsync(f.fileno())
+
+	# builds and appends the record for a finished match
+	# replay is the game's replay if the engine said which one it wrote, otherwise it is looked for in replay_dir
+	def record_match(self, name1, name2, hash1, hash2, result, start, end, replay_dir, log_path=None, seed=0, engine='java', replay=None):
+		frame = None
+		if result == 'ok':
+			with self.lock:
+				if replay is not None:
+					frame = replay_end(replay, name1, name2)
+				else:
+					replay, frame = find_replay(replay_dir, name1, name2, start, self.claimed, end)
+				if frame is None:
+					replay = None
+				self.claimed.add(replay)
+			# without a replay there is no winner, so the match must not be reused or counted as a draw
+			if replay is None:
+				result = 'error'
+		record = {
+			'algo1':		name1,
+			'algo2':		name2,
+			'hash1':		hash1,
+			'hash2':		hash2,
+			'seed':			seed,
+			'engine':		engine,
+			'key':			match_key(name1, name2, seed),
+			'result':		result,
+			'replay':		replay,
+			'winner':		replay_winner(frame, name1, name2) if frame is not None else None,
+			'end_stats':	frame['endStats'] if frame is not None else None,
+			'duration':		round(end - start, 3),
+			'log':			log_path,
+			'finished':		round(end, 3),
+			'cached':		False,
+		}
+		self.append(record)
+		return record
+
+if __name__ == '__main__':
+	if len(sys.argv) < 2:
+		print ('Usage: results_store.py STORE_FILE')
+		sys.exit()
+	records = ResultsStore(sys.argv[1]).latest().values()
+	fill = max([len(record['key']) for record in records] + [5])
+	for record in records:
+		print ('{: <{fill}}   {: <8}{: <20}{:.0f}s{}'.format(record['key'], record['result'], str(record['winner']), record['duration'],
+			' (cached)' if record.get('cached') else '', fill=fill))
@@ -60,6 +60,45 @@ This would run every single game like before, but 6 games at a time.
 
 DO NOT RUN WITH A LARGE BATCH SIZE (like >15, depending on your computer) or else it will take forever and crash.
 
+Each game's output goes to its own file in arena_logs (next to engine.jar), or in the folder
+given with -l. Use -t to kill any game that runs longer than that many seconds, along with both
+of its algos:
+>py scripts/contributions/run_arena.py -a -b 6 -t 600 -l logs
+
+As each match finishes, its result (winner, end stats, replay file, how long it took and a hash
+of each algo) is added to arena_results.jsonl next to engine.jar, or to the file given with -r.
+If the script crashes or you stop it, run the same command again and every match that already
+finished will be skipped. Matches that errored or timed out are played again.
+
+The hash covers an algo's .py files, its gamelib, algo.json, run.sh/run.ps1 and game-configs.json,
+so a match is only skipped if neither algo has changed since it was played, on the same engine (-e).
+If you change one algo, rerunning the tournament only plays that algo's matches. Use --fresh to
+play every match anyway:
+>py scripts/contributions/run_arena.py -a -b 6 -r results.jsonl --fresh
+
+Use -g to play each pair more than once. Each game gets a seed from 0 to g-1, passed to both algos
+in the ARENA_SEED environment variable, and results are reused per seed. Algos built on gamelib seed
+python's random with it (see AlgoCore.start), so playing a game again with the same seed makes the
+same random choices. That does not hold with --serve, where the servers were started before the
+seed was known, or with -e python, where both algos share one random generator:
+>py scripts/contributions/run_arena.py -a -g 3
+
+With a lot of algos, a round-robin is a lot of matches. Use --format to run a Swiss or racing
+tournament instead, which picks each round's matches from the results so far and stops once the
+best algos are clear, then prints Bradley-Terry ratings with confidence intervals. See tournament.py:
+>py scripts/contributions/run_arena.py -a --format swiss --keep 3
+
+Use -e python to play the games with reference_engine.py instead of engine.jar. It runs both
+algos inside one python process, which is much faster but only works with python algos and
+simplifies a few rules, see reference_engine.py:
+>py scripts/contributions/run_arena.py -a -e python
+
+Use --serve to start every algo once as a server (run.sh --serve, see gamelib/server.py in the algos)
+before the first game and stop them after the last. Each game then only starts a small relay instead of
+python and gamelib. Algos without gamelib/server.py are started for every game as usual. Their debug
+output goes to NAME_server.log in the logs folder. Not available on Windows:
+>py scripts/contributions/run_arena.py -a -b 6 --serve
+
 
 At the end I also run the get_results.py script that outputs some data. I recommend having
 matplotlib installed for graphs, etc.
@@ -77,70 +116,142 @@ try:
 	import argparse
 	import itertools
 	import time
-	import copy
-	import multiprocessing as mp
+	import signal
+	import threading
+	import queue
+	from results_store import ResultsStore, match_key, hash_algo, logged_replay
+	from tournament import schedulers
 except ImportError as e:
 	print("WARNING: Module not found, full error:\n")
 	print(str(e))
 	sys.exit()
 
-
-# Runs a single game
-def run_single_game(process_command, algo1, algo2, max_name_len):
-	p = subprocess.Popen(
-		process_command,
-		shell=True,
-		stdout=subprocess.PIPE,
-		stderr=subprocess.PIPE
-		)
-	output, error = p.communicate()
-	# daemon necessary so game shuts down if this script is shut down by user
-	p.daemon = 1
+# Get location of the folder holding engine.jar, one above the scripts folder
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), os.pardir))
+
+# Get if running in windows OS
+is_windows = sys.platform.startswith('win')
+
+# which engine plays the games, 'java' for engine.jar or 'python' for reference_engine.py
+engine = 'java'
+
+# games that are currently running, so they can be killed if the script is stopped
+running = set()
+running_lock = threading.Lock()
+print_lock = threading.Lock()
+
+
+# Runs a single game, streaming its output to log_path and killing it if it runs past timeout seconds
+# returns 'ok', 'error' or 'timeout'
+def run_single_game(process_command, cwd, log_path, timeout=None, env=None):
+	with open(log_path, 'wb') as log:
+		if is_windows:
+			p = subprocess.Popen(process_command, cwd=cwd, stdout=log, stderr=subprocess.STDOUT, env=env,
+				creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+		else:
+			# own session so the engine and both algos can be killed together
+			p = subprocess.Popen(process_command, cwd=cwd, stdout=log, stderr=subprocess.STDOUT, env=env,
+				start_new_session=True)
+		with running_lock:
+			running.add(p)
+		try:
+			p.wait(timeout=timeout)
+			return 'ok' if p.returncode == 0 else 'error'
+		except subprocess.TimeoutExpired:
+			kill_game(p)
+			return 'timeout'
+		finally:
+			with running_lock:
+				running.discard(p)
+
+# kills a game and everything it started
+def kill_game(p):
+	try:
+		if is_windows:
+			p.kill()
+		else:
+			os.killpg(p.pid, signal.SIGKILL)
+	except OSError:
+		pass
 	p.wait()
-	print("{: <30}{: <{fill}}   vs   {}".format('Finished running match:', algo1, algo2, fill=str(max_name_len)))
-
-	# print (''.join(['{}\n'.format(x) for x in str(output).split('\\r\\n')])[1:])
-	if str(error) != "b''":
-		print ('Error with match - {} {}:\n\tError:\n{}'.format(algo1, algo2, error))
-
-def run_match(arg1='', arg2='', max_name_len=0):
-	# Get location of this run file
-	file_dir = os.path.dirname(os.path.realpath(__file__)).replace('\\contributions', '')
-	parent_dir = os.path.join(file_dir, os.pardir)
-	parent_dir = os.path.abspath(parent_dir)
-
-	# Get if running in windows OS
-	is_windows = sys.platform.startswith('win')
-
-	# Set default path for algos if script is run with no params
-	default_algo = parent_dir + "\\algos\\starter-algo-ZIPME\\run.ps1" if is_windows else parent_dir + "/algos/starter-algo-ZIPME/run.sh" 
-	algo1 = default_algo
-	algo2 = default_algo
-
-	# If script run with params, use those algo locations when running the game
-	if arg1 != '':
-		algo1 = arg1
-	if arg2 != '':
-		algo2 = arg2
 
-	# If folder path is given instead of run file path, add the run file to the path based on OS
+# turns an algo folder into the path of its run file, based on OS
+def run_file(algo):
 	# trailing_char deals with if there is a trailing \ or / or not after the directory name
 	if is_windows:
-		if "run.ps1" not in algo1:
-			trailing_char = "" if algo1.endswith("\\") else "\\"
-			algo1 = algo1 + trailing_char + "run.ps1"
-		if "run.ps1" not in algo2:
-			trailing_char = "" if algo2.endswith("\\") else "\\"
-			algo2 = algo2 + trailing_char + "run.ps1"
+		if "run.ps1" not in algo:
+			trailing_char = "" if algo.endswith("\\") else "\\"
+			algo = algo + trailing_char + "run.ps1"
 	else:
-		if "run.sh" not in algo1:
-			trailing_char = "" if algo1.endswith('/') else "/"
-			algo1 = algo1 + trailing_char + "run.sh"
-		if "run.sh" not in algo2:
-			trailing_char = "" if algo2.endswith('/') else "/"
-			algo2 = algo2 + trailing_char + "run.sh"
-
-	run_single_game("cd {} && java -jar engine.jar work {} {}".format(parent_dir, algo1, algo2), algo1.split('\\')[-2].replace('algos/',''),  algo2.split('\\')[-2].replace('algos/',''), max_name_len)
+		if "run.sh" not in algo:
+			trailing_char = "" if algo.endswith('/') else "/"
+			algo = algo + trailing_char + "run.sh"
+	return algo
+
+# starts `run.sh --serve` for each algo that supports it and waits for its socket, returns [(process, log file)]
+def start_servers(names, log_dir):
+	servers = []
+	for name in names:
+		algo_dir = os.path.join(parent_dir, 'algos', name)
+		if not os.path.exists(os.path.join(algo_dir, 'gamelib', 'server.py')):
+			print ('{} has no gamelib/server.py, it will be started for every game'.format(name))
+			continue
+		socket_path = os.path.join(algo_dir, 'algo_server.sock')
+		log = open(os.path.join(log_dir, '{}_server.log'.format(name)), 'wb')
+		p = subprocess.Popen(['bash', run_file(algo_dir), '--serve'], stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+		deadline = time.time() + 30
+		while not os.path.exists(socket_path) and p.poll() is None and time.time() < deadline:
+			time.sleep(0.1)
+		if not os.path.exists(socket_path):
+			print ('Could not start a server for {}, see {}'.format(name, log.name))
+		servers.append((p, log))
+	return servers
+
+# stops the servers, each one removes its socket on the way out
+def stop_servers(servers):
+	for p, log in servers:
+		try:
+			os.killpg(p.pid, signal.SIGTERM)
+		except OSError:
+			pass
+	for p, log in servers:
+		try:
+			p.wait(timeout=10)
+		except subprocess.TimeoutExpired:
+			kill_game(p)
+		log.close()
+
+# hashes an algo in the algos folder along with the game config
+def algo_hash(name):
+	return hash_algo(os.path.join(parent_dir, 'algos', name), os.path.join(parent_dir, 'game-configs.json'))
+
+def run_match(name1, name2, max_name_len, timeout=None, log_dir=None, store=None, seed=0, hashes=None):
+	algo1 = run_file('algos/{}'.format(name1))
+	algo2 = run_file('algos/{}'.format(name2))
+	log_name = '{}_vs_{}.log'.format(name1, name2) if seed == 0 else '{}_vs_{}_{}.log'.format(name1, name2, seed)
+	log_path = os.path.join(log_dir, log_name)
+	if hashes is None:
+		hashes = (algo_hash(name1), algo_hash(name2))
+	env = dict(os.environ)
+	env['ARENA_SEED'] = str(seed)
+
+	start = time.time()
+	if engine == 'python':
+		command = [sys.executable, os.path.join(os.path.dirname(os.path.realpath(__file__)), 'reference_engine.py'), algo1, algo2]
+	else:
+		command = ['java', '-jar', 'engine.jar', 'work', algo1, algo2]
+	result = run_single_game(command, parent_dir, log_path, timeout, env)
+	end = time.time()
+	if store is not None:
+		# reference_engine.py prints the replay it saved, engine.jar's replay is found by when it was written
+		replay = logged_replay(log_path) if engine == 'python' else None
+		result = store.record_match(name1, name2, hashes[0], hashes[1], result, start, end, os.path.join(parent_dir, 'replays'), log_path, seed, engine, replay)['result']
+	with print_lock:
+		print("{: <30}{: <{fill}}   vs   {}   ({:.0f}s)".format('Finished running match:', name1, name2, end - start, fill=str(max_name_len)))
+		if result == 'timeout':
+			print('Match timed out after {}s - {} {}, see {}'.format(timeout, name1, name2, log_path))
+		elif result == 'error':
+			print('Error with match - {} {}, see {}'.format(name1, name2, log_path))
 
 # handles all the arguments
 def parse_args():
@@ -164,6 +275,52 @@ def parse_args():
 		type=int,
 		default=5,
 		help="number of games to run at a single time (on seperate threads)\n\n")
+	ap.add_argument(
+		"-t", "--timeout",
+		type=float,
+		default=None,
+		help="seconds a single game may run before it is killed (default: no limit)\n\n")
+	ap.add_argument(
+		"-l", "--logs",
+		default=None,
+		help="folder to write each game's output to (default: arena_logs next to engine.jar)\n\n")
+	ap.add_argument(
+		"-r", "--results",
+		default=None,
+		help="file each match result is added to, matches already in it are skipped (default: arena_results.jsonl next to engine.jar)\n\n")
+	ap.add_argument(
+		"--fresh",
+		action='store_true',
+		help="run every match, even ones already played by the same versions of both algos\n\n")
+	ap.add_argument(
+		"-g", "--games",
+		type=int,
+		default=1,
+		help="number of games to play between each pair of algos, each with its own seed\n\n")
+	ap.add_argument(
+		"-e", "--engine",
+		choices=['java', 'python'],
+		default='java',
+		help="java plays games with engine.jar, python with the faster reference_engine.py (python algos only)\n\n")
+	ap.add_argument(
+		"--format",
+		choices=['round-robin', 'swiss', 'racing'],
+		default='round-robin',
+		help="round-robin plays every pair, swiss and racing pick pairs from the results so far\n\n")
+	ap.add_argument(
+		"--keep",
+		type=int,
+		default=1,
+		help="swiss and racing stop once this many top algos are clearly ahead of the rest\n\n")
+	ap.add_argument(
+		"--rounds",
+		type=int,
+		default=None,
+		help="most rounds to play with swiss or racing\n\n")
+	ap.add_argument(
+		"--serve",
+		action='store_true',
+		help="start each algo once as a server instead of once per game (java engine only, not on Windows)\n\n")
 	return vars(ap.parse_args())
 
 # called by the -a arg, runs every algo in directory
@@ -188,45 +345,109 @@ def run_from_file(filePath):
 		print ('File {} was not found'.format(filePath))
 		sys.exit()
 
-# returns the number of processess that are active
-def get_num_running(processes):
-	c = 0
-	for i, proc in processes.items():
-		if proc.is_alive():
-			c += 1
-	return c
-
-# starts a subprocess for each match up to batch_size and then starts them as they finish
-def run_matches(matches, batch_size):
-	tmp = copy.deepcopy(matches)
-	max_name_len = len(max(tmp, key=lambda e:len(e[0]))[0])
-
-	algos = []
-	processes = {}
-	i = 0
+# pulls matches off the queue until it gets None, so a new game starts as soon as one finishes
+def worker(jobs, max_name_len, timeout, log_dir, store):
+	while True:
+		match = jobs.get()
+		if match is None:
+			return
+		with print_lock:
+			print ('{: <30}{: <{fill}}   vs   {}'.format('Starting match:', match[0], match[1], fill=str(max_name_len)))
+		try:
+			run_match(match[0], match[1], max_name_len, timeout, log_dir, store, match[2], match[3])
+		except Exception as e:
+			with print_lock:
+				print ('Could not run match - {} {}: {}'.format(match[0], match[1], e))
+
+# runs every (name1, name2, seed) match on batch_size worker threads, each running one game at a time
+# games already played by the same versions of both algos are copied from store unless fresh is set
+def run_matches(matches, batch_size, timeout=None, log_dir=None, store=None, fresh=False):
+	hashes = {}
 	for match in matches:
-		algos.append((match[0],match[1]))
-		algo1 = 'algos/{}'.format(match[0])
-		algo2 = 'algos/{}'.format(match[1])
-		processes[i] = mp.Process(target=run_match, args=(algo1, algo2, max_name_len))
-		i += 1
-
-	for i in range(len(processes)):
-		print ('{: <30}{: <{fill}}   vs   {}'.format('Starting match:', algos[i][0], algos[i][1], fill=str(max_name_len)))
-		processes[i].start()
-		i += 1
-		while get_num_running(processes) >= batch_size:
-			time.sleep(.1)
-
-	while get_num_running(processes) > 0:
-			time.sleep(.1)
+		for name in match[:2]:
+			if name not in hashes:
+				hashes[name] = algo_hash(name)
+	matches = [(name1, name2, seed, (hashes[name1], hashes[name2])) for name1, name2, seed in matches]
+
+	if store is not None and not fresh:
+		cache = store.cached()
+		to_play = []
+		for match in matches:
+			key = (match[3][0], match[3][1], match[2], engine)
+			if key in cache:
+				store.reuse(cache[key], match[0], match[1], match[2])
+			else:
+				to_play.append(match)
+		if len(to_play) < len(matches):
+			print ('Skipping {} matches already played by the same versions of both algos, see {}'.format(len(matches) - len(to_play), store.path))
+		matches = to_play
+	if len(matches) == 0:
+		print ('No matches to run')
+		return
+	max_name_len = len(max(matches, key=lambda e:len(e[0]))[0])
+	if log_dir is None:
+		log_dir = os.path.join(parent_dir, 'arena_logs')
+	os.makedirs(log_dir, exist_ok=True)
+
+	# bounded so matches are handed out as workers free up instead of all at once
+	jobs = queue.Queue(maxsize=batch_size)
+	workers = [threading.Thread(target=worker, args=(jobs, max_name_len, timeout, log_dir, store)) for _ in range(batch_size)]
+	for thread in workers:
+		thread.daemon = True
+		thread.start()
+
+	try:
+		for match in matches:
+			jobs.put(match)
+		for _ in workers:
+			jobs.put(None)
+		for thread in workers:
+			while thread.is_alive():
+				thread.join(1)
+	except KeyboardInterrupt:
+		with running_lock:
+			for p in list(running):
+				kill_game(p)
+		raise
 
 	print ()
 	print ('Finished all matches!')
 	print ()
 
+# plays a swiss or racing tournament between the algos in matches, one round at a time
+# returns every (name1, name2, seed) match that was played
+def run_tournament(matches, tournament_format, batch_size, timeout=None, log_dir=None, store=None, fresh=False, games=1, keep=1, rounds=None):
+	names = []
+	for match in matches:
+		for name in match:
+			if name not in names:
+				names.append(name)
+	scheduler = schedulers[tournament_format](names, games, keep, rounds)
+
+	played = []
+	while True:
+		pairings = scheduler.next_round()
+		if len(pairings) == 0:
+			break
+		print ('{:->75}\nRound {}: {} matches\n{:->75}'.format('', scheduler.round, len(pairings), ''))
+		run_matches(pairings, batch_size, timeout, log_dir, store, fresh)
+		latest = store.latest()
+		for name1, name2, seed in pairings:
+			record = latest.get(match_key(name1, name2, seed))
+			# games that crashed or timed out say nothing about which algo is better
+			if record is None or record['result'] != 'ok':
+				continue
+			scheduler.record(name1, name2, 1 if record['winner'] == name1 else 0 if record['winner'] == name2 else 0.5)
+		played += pairings
+
+	print ('Played {} matches in {} rounds, a round-robin would have been {}\n'.format(
+		len(played), scheduler.round, len(names) * (len(names) - 1) // 2 * games))
+	print (scheduler.report())
+	return played
+
 if __name__ == '__main__':
 	args = parse_args() # get command line arguments
+	engine = args['engine']
 
 	if args['all']:
 		print ('Running all algos')
@@ -239,17 +460,42 @@ if __name__ == '__main__':
 		print ('No arguments - no action taken')
 		sys.exit()
 
-	tmp = copy.deepcopy(matches)
-	run_matches(matches, args['batch'])		# run all matches
+	results_path = args['results'] if args['results'] is not None else os.path.join(parent_dir, 'arena_results.jsonl')
+	store = ResultsStore(results_path)
+	matches = list(matches)
+
+	servers = []
+	if args['serve']:
+		if engine != 'java' or is_windows:
+			print ('--serve only works with the java engine and not on Windows, starting algos for every game')
+		else:
+			log_dir = args['logs'] if args['logs'] is not None else os.path.join(parent_dir, 'arena_logs')
+			os.makedirs(log_dir, exist_ok=True)
+			servers = start_servers(sorted(set(name for match in matches for name in match)), log_dir)
+	try:
+		if args['format'] == 'round-robin':
+			matches = [(name1, name2, seed) for name1, name2 in matches for seed in range(args['games'])]
+			run_matches(matches, args['batch'], args['timeout'], args['logs'], store, args['fresh'])		# run all matches
+		else:
+			matches = run_tournament(matches, args['format'], args['batch'], args['timeout'], args['logs'], store, args['fresh'],
+				args['games'], args['keep'], args['rounds'])
+	finally:
+		stop_servers(servers)
+
+	# summarise the replays of every match in this tournament, including ones copied from an earlier run
+	latest = store.latest()
+	keys = [match_key(name1, name2, seed) for name1, name2, seed in matches]
+	replays = [latest[key]['replay'] for key in keys if key in latest and latest[key]['replay']]
 
 	# if get_results is avalible, run a summary of the matches played
 	try:
 		args = {	'all':		False, 				\
 					'verbose':	False, 				\
 					'averages':	[], 				\
-					'file':		[],					\
+					'file':		replays,			\
 					'graph':	['wins'],	\
-					'num':		len(list(tmp))		\
+					'num':		len(replays),		\
+					'jobs':		0					\
 				}
 		from get_results import main
 		main(args)
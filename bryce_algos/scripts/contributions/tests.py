@@ -0,0 +1,297 @@
+import io
+import os
+import sys
+import json
+import random
+import shutil
+import tempfile
+import unittest
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+
+import reference_engine
+from results_store import ResultsStore, read_last_line, find_replay, logged_replay, replay_winner
+from tournament import Ratings, SwissScheduler, RacingScheduler
+from replay_reader import ReplayReader, summary_fields, summary_events
+from replay_archive import ReplayArchive, convert, fresh_archive, open_replay
+
+algos_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir, os.pardir))
+
+# run from this folder with: python -m unittest tests
+class BasicTests(unittest.TestCase):
+
+	def test_reference_engine_plays_games_in_one_process(self):
+		hatchling = os.path.join(algos_dir, 'hatchling')
+		super_basic = os.path.join(algos_dir, 'super_basic')
+		for path1, path2 in [(hatchling, super_basic), (hatchling, super_basic), (super_basic, super_basic)]:
+			end_stats = reference_engine.run_game(path1, path2, max_turns=5, quiet=True)
+			self.assertFalse(end_stats['player1']['crashed'])
+			self.assertFalse(end_stats['player2']['crashed'])
+			self.assertEqual(end_stats['player1']['name'], os.path.basename(path1))
+			self.assertEqual(end_stats['player2']['name'], os.path.basename(path2))
+		self.assertEqual([name for name in sys.modules if name.startswith('arena_')], [])
+
+	def test_reference_engine_crashing_algo_loses(self):
+		crasher = os.path.join(tempfile.mkdtemp(), 'crasher')
+		shutil.copytree(os.path.join(algos_dir, 'super_basic', 'gamelib'), os.path.join(crasher, 'gamelib'),
+			ignore=shutil.ignore_patterns('__pycache__'))
+		with open(os.path.join(crasher, 'run.sh'), 'w') as f:
+			f.write('python3 -u "$DIR/crashing_strategy.py"\n')
+		with open(os.path.join(crasher, 'crashing_strategy.py'), 'w') as f:
+			f.write('\n'.join([
+				'import gamelib',
+				'class CrashingStrategy(gamelib.AlgoCore):',
+				'    def on_turn(self, turn_state):',
+				'        raise RuntimeError("crashing on purpose")',
+				'']))
+		with contextlib.redirect_stderr(io.StringIO()) as err:
+			end_stats = reference_engine.run_game(crasher, os.path.join(algos_dir, 'super_basic'), max_turns=10, quiet=True)
+		self.assertIn('crashing on purpose', err.getvalue())
+		self.assertTrue(end_stats['player1']['crashed'])
+		self.assertFalse(end_stats['player2']['crashed'])
+		self.assertEqual(2, end_stats['winner'])
+		self.assertEqual(end_stats['player1']['points'], end_stats['player2']['points'], 'Neither should have been hit before the crash')
+		# the store should count it as a loss even though the healths are equal
+		frame = {'p1Stats': [end_stats['player1']['points']], 'p2Stats': [end_stats['player2']['points']], 'endStats': end_stats}
+		self.assertEqual('super_basic', replay_winner(frame, 'crasher', 'super_basic'))
+		del frame['endStats']['winner']
+		self.assertIsNone(replay_winner(frame, 'crasher', 'super_basic'), 'Without a winner in endStats, equal health is a draw')
+
+	replay_path = None
+
+	# a short game played once by the reference engine, shared by the replay tests
+	def get_replay(self):
+		if BasicTests.replay_path is None:
+			end_stats = reference_engine.run_game(os.path.join(algos_dir, 'hatchling'), os.path.join(algos_dir, 'super_basic'),
+				max_turns=6, quiet=True, replay_dir=tempfile.mkdtemp())
+			BasicTests.replay_path = end_stats['replay']
+		return BasicTests.replay_path
+
+	def replay_lines(self, path):
+		with open(path) as f:
+			return [json.loads(line) for line in f if line.strip() != '']
+
+	def test_replay_reader_decodes_like_json(self):
+		path = self.get_replay()
+		lines = self.replay_lines(path)
+		full_frames = lines[1:]
+		keys = [(frame['turnInfo'][1], frame['turnInfo'][2]) for frame in full_frames]
+		self.assertEqual(keys[-1], keys[-2], 'The end of game frame should repeat the last frame\'s turn and frame')
+
+		reader = ReplayReader(path, fields=None, events=None)
+		frames = list(reader.frames())
+		self.assertEqual(full_frames, [data for _, _, data in frames])
+		self.assertEqual(keys, [(turn, frame) for turn, frame, _ in frames], 'Duplicated keys should be yielded every time')
+		self.assertEqual(lines[0], reader.config)
+		self.assertEqual(full_frames[-1], reader.frame_at(*keys[-1]), 'The index should point at the last line with a key')
+		self.assertIn('endStats', reader.last_frame())
+
+		reader = ReplayReader(path)
+		for full, (_, _, data) in zip(full_frames, reader.frames()):
+			expected = {field: full[field] for field in summary_fields if field in full}
+			expected['events'] = {event: full['events'][event] for event in summary_events}
+			for player in ['p1', 'p2']:
+				expected[player + 'UnitCounts'] = [len(units) for units in full[player + 'Units']]
+			self.assertEqual(expected, data)
+
+		reader = ReplayReader(path, fields=['p1Units', 'p1UnitCounts'], events=None)
+		for full, (_, _, data) in zip(full_frames, reader.frames()):
+			self.assertEqual({'turnInfo': full['turnInfo'], 'p1Units': full['p1Units'], 'events': full['events'],
+				'p1UnitCounts': [len(units) for units in full['p1Units']]}, data)
+
+		reader = ReplayReader(path, fields=None, events=['death'])
+		for full, (_, _, data) in zip(full_frames, reader.frames()):
+			self.assertEqual({'death': full['events']['death']}, data['events'])
+			self.assertEqual(full['p2Units'], data['p2Units'])
+
+	# a copy of the shared replay in a folder of its own, so its archive can be written next to it
+	def copy_replay(self):
+		path = os.path.join(tempfile.mkdtemp(), 'game.replay')
+		shutil.copy(self.get_replay(), path)
+		return path
+
+	def test_replay_archive_round_trip(self):
+		for compress in [False, True]:
+			path = self.copy_replay()
+			archive_path = convert(path, compress=compress)
+			self.assertEqual(archive_path, fresh_archive(path))
+			for fields, events in [(None, None), (summary_fields, summary_events), (['p2Units', 'endStats'], ['damage', 'spawn'])]:
+				archive = ReplayArchive(archive_path, fields, events)
+				reader = ReplayReader(path, fields, events)
+				self.assertEqual(list(reader.frames()), list(archive.frames()),
+					'fields {} events {} compress {}'.format(fields, events, compress))
+				self.assertEqual(reader.config, archive.config)
+				self.assertEqual(reader.frame_at(5, 0), archive.frame_at(5, 0))
+				self.assertEqual(reader.last_frame(), archive.last_frame())
+				self.assertEqual(reader.index[(5, 0)], archive.line_offset(5, 0), 'Line offsets should point into the replay')
+				archive.close()
+			self.assertTrue(isinstance(open_replay(path), ReplayArchive), 'An up to date archive should be read instead of the replay')
+
+	def test_replay_archive_goes_stale(self):
+		path = self.copy_replay()
+		convert(path)
+		self.assertIsNotNone(fresh_archive(path))
+		with open(path, 'a') as f:
+			f.write('\n')
+		self.assertIsNone(fresh_archive(path), 'A changed replay should not be read from its old archive')
+		self.assertTrue(isinstance(open_replay(path), ReplayReader))
+
+	def test_replay_archive_closes_with_columns_held(self):
+		path = self.copy_replay()
+		archive = ReplayArchive(convert(path))
+		hp = archive.column('unit_hp')
+		self.assertTrue(len(hp) > 0)
+		frames = archive.frames()
+		next(frames)
+		archive.close()
+		with self.assertRaises(ValueError, msg='A column should not be usable after close'):
+			hp[0]
+
+	def make_store(self):
+		return ResultsStore(os.path.join(tempfile.mkdtemp(), 'results.jsonl'))
+
+	def record(self, algo1='a', algo2='b', seed=0, engine='java', result='ok', winner='a', hashes=('h1', 'h2')):
+		return {'algo1': algo1, 'algo2': algo2, 'hash1': hashes[0], 'hash2': hashes[1], 'seed': seed, 'engine': engine,
+			'key': '{} vs {}'.format(algo1, algo2), 'result': result, 'winner': winner}
+
+	def test_results_store_recovers_from_a_cut_off_line(self):
+		store = self.make_store()
+		store.append(self.record())
+		with open(store.path, 'a') as f:
+			f.write('{"algo1": "a", "alg')
+		store.append(self.record(winner='b'))
+		with open(store.path) as f:
+			self.assertEqual(3, len(f.read().splitlines()), 'The new record should start on a line of its own')
+		with contextlib.redirect_stderr(io.StringIO()) as err:
+			records = store.load()
+		self.assertEqual(['a', 'b'], [record['winner'] for record in records])
+		self.assertIn('Skipping unreadable line', err.getvalue())
+
+	def test_results_store_reuse_maps_the_winner(self):
+		store = self.make_store()
+		reused = store.reuse(self.record(algo1='a', algo2='b', winner='b'), 'c', 'd', seed=2)
+		self.assertEqual(('c', 'd', 'd', 2, True), (reused['algo1'], reused['algo2'], reused['winner'], reused['seed'], reused['cached']))
+		self.assertEqual('c vs d #2', reused['key'])
+		draw = store.reuse(self.record(winner=None), 'c', 'd')
+		self.assertIsNone(draw['winner'])
+
+	def test_results_store_cache_keeps_seeds_and_engines_apart(self):
+		store = self.make_store()
+		store.append(self.record(seed=0, engine='java', winner='a'))
+		store.append(self.record(seed=1, engine='java', winner='b'))
+		store.append(self.record(seed=0, engine='python', winner='b'))
+		store.append(self.record(seed=2, result='error', winner=None))
+		old = self.record(seed=3, winner='b')
+		del old['engine']
+		store.append(old)
+		cache = store.cached()
+		self.assertEqual({('h1', 'h2', 0, 'java'), ('h1', 'h2', 1, 'java'), ('h1', 'h2', 0, 'python'), ('h1', 'h2', 3, 'java')}, set(cache))
+		self.assertEqual('a', cache[('h1', 'h2', 0, 'java')]['winner'])
+		self.assertEqual('b', cache[('h1', 'h2', 0, 'python')]['winner'])
+
+	def test_read_last_line_across_chunks(self):
+		path = os.path.join(tempfile.mkdtemp(), 'lines.txt')
+		last = json.dumps({'endStats': list(range(40))})
+		with open(path, 'w') as f:
+			f.write('first line\n' + last + '\n\n')
+		for chunk_size in [1, 3, 16, len(last), 65536]:
+			self.assertEqual(last, read_last_line(path, chunk_size))
+		with open(path, 'w') as f:
+			f.write(last)
+		self.assertEqual(last, read_last_line(path, 7), 'A file of one line without a newline should be read whole')
+
+	def write_replay(self, path, name1, name2, winner, mtime, healths=None):
+		if healths is None:
+			healths = [30, 20] if winner == 1 else [20, 30]
+		with open(path, 'w') as f:
+			f.write(json.dumps({'debug': {}}) + '\n')
+			f.write(json.dumps({'p1Stats': [healths[0], 0, 0, 0], 'p2Stats': [healths[1], 0, 0, 0], 'endStats': {'winner': winner,
+				'player1': {'name': name1}, 'player2': {'name': name2}}}) + '\n')
+		os.utime(path, (mtime, mtime))
+
+	def test_find_replay_keeps_games_between_the_same_algos_apart(self):
+		replay_dir = tempfile.mkdtemp()
+		first = os.path.join(replay_dir, 'first.replay')
+		second = os.path.join(replay_dir, 'second.replay')
+		self.write_replay(first, 'a', 'b', 1, 1000)
+		self.write_replay(second, 'a', 'b', 2, 1010)
+		self.write_replay(os.path.join(replay_dir, 'other.replay'), 'a', 'c', 1, 1005)
+		# two seeds of a vs b ran at once, the first ended at 1000 and the second at 1010
+		self.assertEqual(first, find_replay(replay_dir, 'a', 'b', 990, until=1000)[0])
+		self.assertEqual(second, find_replay(replay_dir, 'a', 'b', 990, until=1010)[0])
+		self.assertEqual(second, find_replay(replay_dir, 'a', 'b', 990, skip=[first], until=1010)[0])
+		self.assertEqual((None, None), find_replay(replay_dir, 'a', 'b', 1020, until=1030))
+
+		store = self.make_store()
+		record = store.record_match('a', 'b', 'h1', 'h2', 'ok', 990, 1010, replay_dir, seed=1, replay=first)
+		self.assertEqual((first, 'a'), (record['replay'], record['winner']), 'A replay named by the engine should be used as is')
+
+		log_path = os.path.join(replay_dir, 'game.log')
+		with open(log_path, 'w') as f:
+			f.write('a vs b - Winner: a (3 turns, 5ms), replay saved to {}\n'.format(first))
+		self.assertEqual(first, logged_replay(log_path))
+		self.assertIsNone(logged_replay(os.path.join(replay_dir, 'missing.log')))
+
+	def test_ratings_rank_a_dominant_algo_first(self):
+		ratings = Ratings(['c', 'b', 'a'])
+		for _ in range(5):
+			ratings.add('a', 'b', 1)
+			ratings.add('a', 'c', 1)
+			ratings.add('b', 'c', 1)
+		self.assertEqual(['a', 'b', 'c'], ratings.ranking())
+		strengths = ratings.strengths()
+		self.assertTrue(strengths['a'] > strengths['b'] > strengths['c'])
+		fitted = ratings.fit()
+		for name in 'abc':
+			rating, low, high = fitted[name]
+			self.assertTrue(low < rating < high)
+
+	def test_ratings_settle_once_the_gap_is_large_enough(self):
+		ratings = Ratings(['a', 'b'])
+		ratings.add('a', 'b', 1)
+		self.assertFalse(ratings.settled(), 'One game should not settle anything')
+		for games in range(2, 400):
+			ratings.add('a', 'b', 1)
+			if ratings.settled():
+				break
+		self.assertTrue(ratings.settled(), 'Winning every game should settle the ranking eventually')
+		self.assertTrue(games > 2)
+		self.assertTrue(Ratings(['a', 'b']).settled(keep=2), 'Keeping every algo is always settled')
+
+	def test_swiss_plays_each_pair_once(self):
+		names = ['a', 'b', 'c', 'd', 'e', 'f']
+		scheduler = SwissScheduler(names, games=1, rounds=100)
+		pairs = []
+		while True:
+			pairings = scheduler.next_round()
+			if len(pairings) == 0:
+				break
+			self.assertTrue(scheduler.round <= len(names) * len(names), 'Swiss should stop once no pairs are left')
+			for name1, name2, seed in pairings:
+				self.assertEqual(0, seed)
+				pairs.append(frozenset((name1, name2)))
+				# every game a draw, so the ranking never settles and only running out of pairs stops it
+				scheduler.record(name1, name2, 0.5)
+		self.assertEqual(len(pairs), len(set(pairs)), 'No pair should be scheduled twice with -g 1')
+		self.assertEqual(len(names) * (len(names) - 1) // 2, len(pairs))
+
+	def test_racing_eliminates_worse_algos(self):
+		random.seed(1)
+		names = ['a', 'b', 'c', 'd']
+		scheduler = RacingScheduler(names, games=30, keep=2)
+		while True:
+			pairings = scheduler.next_round()
+			if len(pairings) == 0:
+				break
+			self.assertTrue(scheduler.round < 200)
+			for name1, name2, seed in pairings:
+				# the algo earlier in the alphabet always wins
+				scheduler.record(name1, name2, 1 if name1 < name2 else 0)
+		self.assertEqual(['a', 'b'], sorted(scheduler.alive), 'The race should stop once the --keep best algos are left')
+		self.assertEqual(['c', 'd'], sorted(scheduler.eliminated))
+		self.assertIn('Eliminated in order', scheduler.report())
+		random.seed()
+
+if __name__ == '__main__':
+	unittest.main()
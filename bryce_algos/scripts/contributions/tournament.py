@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+Swiss and racing schedulers for run_arena.py, and Bradley-Terry ratings with confidence intervals.
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the contributions/scripts directory
+
+A round-robin plays every pair of algos, so the number of matches grows with the square of the
+number of algos. The schedulers here pick each round's pairings from the results so far instead,
+and stop once the ranking is settled. You use them through run_arena.py:
+>py scripts/contributions/run_arena.py -a --format swiss
+>py scripts/contributions/run_arena.py -a --format racing -g 3 --keep 2
+
+swiss:		Every round, algos are paired with the closest ranked algo they have not played yet
+			(or played fewer than -g times). Stops after --rounds rounds (default log2 of the number
+			of algos, plus 2), or once the top --keep algos are settled.
+racing:		Every round, every algo still in the race plays one more game. Algos that are clearly
+			worse than the top --keep are eliminated. Stops once --keep algos are left, or once
+			every pair left has been played -g times.
+
+Ratings are fitted with a Bradley-Terry model: each algo has a strength, and the chance that A beats B
+is strength(A) / (strength(A) + strength(B)). Draws count as half a win for each. Every algo also
+gets one virtual draw against an average opponent, so an algo that won or lost every game still has
+a finite rating. Ratings are printed on the Elo scale (a 400 point difference means 10 to 1 odds)
+with a 95% confidence interval. The ranking is settled when the lowest rating in the interval of
+the --keep-th algo is above the highest rating in the interval of every algo below it.
+
+Games are mostly deterministic, so replaying a pair with the same seed gives no new information,
+and with -g 1 each pair is played at most once.
+'''
+
+import sys
+try:
+	import math
+	import random
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+
+elo_scale = 400 / math.log(10)
+
+# results between a set of algos and the Bradley-Terry ratings fitted to them
+class Ratings:
+	def __init__(self, names, z=1.96):
+		self.names = list(names)
+		self.z = z
+		self.wins = {name: {} for name in self.names}		# wins[a][b] is a's score against b, draws count 0.5
+		self.games = {name: {} for name in self.names}		# games[a][b] is the number of games between a and b
+
+	def add(self, name1, name2, score):
+		for a, b, s in [(name1, name2, score), (name2, name1, 1 - score)]:
+			self.wins[a][b] = self.wins[a].get(b, 0) + s
+			self.games[a][b] = self.games[a].get(b, 0) + 1
+
+	def score(self, name):
+		return sum(self.wins[name].values())
+
+	def played(self, name):
+		return sum(self.games[name].values())
+
+	# fits strengths against a virtual opponent of strength 1, with a Newton step on each algo's log strength in turn
+	# (minorization-maximization crawls when one algo wins almost every game, and stopped far from the answer)
+	def strengths(self, iterations=1000, tolerance=1e-9):
+		log_p = {name: 0.0 for name in self.names}
+		for _ in range(iterations):
+			change = 0
+			for name in self.names:
+				p = math.exp(log_p[name])
+				# slope and curvature of the log likelihood in log_p[name], the virtual game being a draw
+				slope = self.score(name) + 0.5 - p / (p + 1)
+				information = p / (p + 1) ** 2
+				for other, n in self.games[name].items():
+					q = math.exp(log_p[other])
+					slope -= n * p / (p + q)
+					information += n * p * q / (p + q) ** 2
+				# limited so a step can't overshoot far while the other strengths are still off
+				step = max(-1.0, min(1.0, slope / information))
+				log_p[name] += step
+				change = max(change, abs(step))
+			if change < tolerance:
+				break
+		return {name: math.exp(value) for name, value in log_p.items()}
+
+	# returns {name: (rating, low, high)} on the Elo scale, 0 being the virtual average opponent
+	def fit(self):
+		p = self.strengths()
+		rtn = {}
+		for name in self.names:
+			# standard error of log strength from the diagonal of the Fisher information
+			information = p[name] / (p[name] + 1) ** 2
+			for other, n in self.games[name].items():
+				information += n * p[name] * p[other] / (p[name] + p[other]) ** 2
+			rating = elo_scale * math.log(p[name])
+			error = self.z * elo_scale / math.sqrt(information)
+			rtn[name] = (rating, rating - error, rating + error)
+		return rtn
+
+	# names from best to worst
+	def ranking(self, fitted=None):
+		fitted = self.fit() if fitted is None else fitted
+		return sorted(self.names, key=lambda name: -fitted[name][0])
+
+	# true if the top keep algos are clearly better than every other algo
+	def settled(self, keep=1):
+		fitted = self.fit()
+		ranking = self.ranking(fitted)
+		if len(ranking) <= keep:
+			return True
+		return fitted[ranking[keep - 1]][1] > max(fitted[name][2] for name in ranking[keep:])
+
+	def report(self):
+		fitted = self.fit()
+		fill = max(len(name) for name in self.names) + 2
+		rtn = 'Bradley-Terry ratings (Elo scale, {:.0%} confidence):\n|\n'.format(math.erf(self.z / math.sqrt(2)))
+		for i, name in enumerate(self.ranking(fitted)):
+			rating, low, high = fitted[name]
+			rtn += '|{: >3}. {: <{fill}}{: >7.0f}   [{: >6.0f}, {: >6.0f}]   {:g}/{} points\n'.format(
+				i + 1, name, rating, low, high, self.score(name), self.played(name), fill=fill)
+		return rtn
+
+
+# shared by the schedulers: tracks how often each pair was scheduled, which also gives the next seed
+class Scheduler:
+	def __init__(self, names, games=1, keep=1):
+		self.names = list(names)
+		self.games = games
+		self.keep = keep
+		self.ratings = Ratings(self.names)
+		self.scheduled = {}
+		self.round = 0
+
+	def times_scheduled(self, name1, name2):
+		return self.scheduled.get(frozenset((name1, name2)), 0)
+
+	def can_play(self, name1, name2):
+		return name1 != name2 and self.times_scheduled(name1, name2) < self.games
+
+	# schedules a game and returns it as (name1, name2, seed)
+	def schedule(self, name1, name2):
+		pair = frozenset((name1, name2))
+		seed = self.scheduled.get(pair, 0)
+		self.scheduled[pair] = seed + 1
+		return (name1, name2, seed)
+
+	# adds a finished game, score is 1 if name1 won, 0 if name2 won and 0.5 for a draw
+	def record(self, name1, name2, score):
+		self.ratings.add(name1, name2, score)
+
+	def report(self):
+		return self.ratings.report()
+
+
+class SwissScheduler(Scheduler):
+	def __init__(self, names, games=1, keep=1, rounds=None):
+		Scheduler.__init__(self, names, games, keep)
+		self.rounds = rounds if rounds is not None else int(math.ceil(math.log(max(len(self.names), 2), 2))) + 2
+
+	# the next round of games, or [] once the tournament is over
+	def next_round(self):
+		if self.round >= self.rounds or (self.round > 0 and self.ratings.settled(self.keep)):
+			return []
+		fitted = self.ratings.fit()
+		unpaired = sorted(self.names, key=lambda name: (-self.ratings.score(name), -fitted[name][0]))
+		pairings = []
+		while len(unpaired) > 1:
+			name = unpaired.pop(0)
+			for i, other in enumerate(unpaired):
+				if self.can_play(name, other):
+					pairings.append(self.schedule(name, unpaired.pop(i)))
+					break
+		self.round += 1
+		return pairings
+
+
+class RacingScheduler(Scheduler):
+	def __init__(self, names, games=1, keep=1, rounds=None):
+		Scheduler.__init__(self, names, games, keep)
+		self.rounds = rounds
+		self.alive = list(self.names)
+		self.eliminated = []
+
+	# drops every algo whose best rating is below the worst rating of the keep-th best algo still racing
+	def eliminate(self):
+		fitted = self.ratings.fit()
+		ranking = [name for name in self.ratings.ranking(fitted) if name in self.alive]
+		if len(ranking) <= self.keep:
+			return
+		bar = fitted[ranking[self.keep - 1]][1]
+		for name in ranking[self.keep:]:
+			if fitted[name][2] < bar:
+				self.alive.remove(name)
+				self.eliminated.append(name)
+
+	# the next round of games, or [] once the race is over
+	def next_round(self):
+		if self.round > 0:
+			self.eliminate()
+		if len(self.alive) <= self.keep or (self.rounds is not None and self.round >= self.rounds):
+			return []
+		# each algo plays the algo still racing it has played least, picked at random among ties
+		unpaired = list(self.alive)
+		random.shuffle(unpaired)
+		unpaired.sort(key=lambda name: self.ratings.played(name))
+		pairings = []
+		while len(unpaired) > 1:
+			name = unpaired.pop(0)
+			options = [(self.times_scheduled(name, other), i) for i, other in enumerate(unpaired) if self.can_play(name, other)]
+			if len(options) > 0:
+				pairings.append(self.schedule(name, unpaired.pop(min(options)[1])))
+		self.round += 1
+		return pairings
+
+	def report(self):
+		rtn = Scheduler.report(self)
+		if len(self.eliminated) > 0:
+			rtn += '|\n| Eliminated in order: {}\n'.format(', '.join(self.eliminated))
+		return rtn
+
+schedulers = {'swiss': SwissScheduler, 'racing': RacingScheduler}
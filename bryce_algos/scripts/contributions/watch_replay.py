@@ -34,6 +34,10 @@ You can specify which file you would like to run by:
 where REPLAY_FILE is the file you'd like to look at. You can list more than one, but it will
 NOT display more than one replay.
 
+If the replay has an up to date archive made by replay_archive.py (or you give the archive,
+[REPLAY_FILE].replay.cols, directly), the archive is read instead and each frame is only loaded
+when it is shown, so long replays open much faster.
+
 ----------------------------------------------------------------------------------------
 -b: Blitting
 
@@ -197,6 +201,7 @@ try:
 	import argparse
 	import subprocess
 	import multiprocessing as mp
+	from replay_archive import ReplayArchive, is_archive, fresh_archive
 except ImportError as e:
 	sys.stderr.write("WARNING: Module not found, full error:\n\n")
 	sys.stderr.write(e)
@@ -1129,10 +1134,11 @@ class Graph:
 
 # a simple data storage class to hold the data for a single frame
 class Frame:
-	def __init__(self, t, f, data):
+	def __init__(self, t, f, data, archive=None):
 		self.turn = t 					# the turn for this frame
 		self.frame = f 					# the local frame for this frame
-		self.data = data 				# the data for this frame
+		self.__data = data 				# the data for this frame, None until it is first used if it comes from an archive
+		self.archive = archive			# the ReplayArchive the data is read from
 
 	def __repr__(self):
 		return ('({}, {})'.format(self.turn, self.frame))
@@ -1140,6 +1146,12 @@ class Frame:
 	def __getitem__(self, key):
 		return self.data[key]
 
+	@property
+	def data(self):
+		if self.__data is None:
+			self.__data = self.archive.frame_at(self.turn, self.frame)
+		return self.__data
+
 
 # Stores data from a single replay
 class Replay:
@@ -1163,6 +1175,12 @@ class Replay:
 
 	# loads all data from a replay into the python variables
 	def load_data(self):
+		# a replay that is still being written never has an up to date archive, so real-time watching reads the replay
+		archive = self.fname if is_archive(self.fname) else fresh_archive(self.fname)
+		if archive is not None:
+			self.load_archive(archive)
+			return
+
 		with open(self.fname) as f:
 			i = 0
 			for line in f:
@@ -1188,6 +1206,22 @@ class Replay:
 						except KeyError:
 							self.frames_in_turn[turn_num] = 1
 
+	# loads a replay from an archive made by replay_archive.py, only reading each frame's units when it is shown
+	def load_archive(self, path):
+		archive = ReplayArchive(path, fields=None, events=None)
+		self.ref = archive.config
+		for turn_num, frame_num in archive.index:
+			self.frames[(turn_num, frame_num)] = Frame(turn_num, frame_num, None, archive)
+
+		self.healths[0].extend(archive.column('p1_health').tolist())
+		self.healths[1].extend(archive.column('p2_health').tolist())
+
+		turn_info = archive.column('turn_info')
+		width = archive.header['turn_info_width']
+		for row in range(len(archive)):
+			turn_num = turn_info[row * width + 1]
+			self.frames_in_turn[turn_num] = self.frames_in_turn.get(turn_num, 0) + 1
+
 # handles opening multiple games (replays)
 class FileHandler:
 	def __init__(self):
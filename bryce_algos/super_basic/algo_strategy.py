@@ -2,6 +2,7 @@ import gamelib
 import random
 import math
 import warnings
+import sys
 from sys import maxsize
 
 """
@@ -225,4 +226,8 @@ class AlgoStrategy(gamelib.AlgoCore):
 
 if __name__ == "__main__":
     algo = AlgoStrategy()
-    algo.start()
+    if "--serve" in sys.argv:
+        # Keep playing games handed over by run.sh, see gamelib/server.py
+        gamelib.serve(algo)
+    else:
+        algo.start()
@@ -0,0 +1,111 @@
+def bit_schedule(config, turn_number):
+    """Gets the bit income and bit cap on a given turn
+
+    Income starts at bitsPerRound. From roundStartBitRamp on, it grows by bitGrowthRate every
+    turnIntervalForBitSchedule turns, and the cap (maxBits) grows by bitRampBitCapGrowthRate every
+    turnIntervalForBitCapSchedule turns.
+
+    Args:
+        * config (JSON): A json object containing information about the game
+        * turn_number: The turn the income is received on
+
+    Returns:
+        A (income, cap) tuple
+
+    """
+    resources = config["resources"]
+    income = resources["bitsPerRound"]
+    cap = resources["maxBits"]
+    ramp_turns = turn_number - resources["roundStartBitRamp"]
+    if ramp_turns >= 0:
+        income += resources["bitGrowthRate"] * (ramp_turns // resources["turnIntervalForBitSchedule"] + 1)
+        cap += resources["bitRampBitCapGrowthRate"] * (ramp_turns // resources["turnIntervalForBitCapSchedule"] + 1)
+    return income, cap
+
+class ResourceProjector:
+    """Projects both players' bits and cores up to 100 turns ahead
+
+    The income schedule only depends on the config, so it is computed once per game. Each turn, one
+    call to table() projects both players over the whole horizon, and bits() and cores() then answer
+    any horizon with a lookup. Keep one ResourceProjector on your strategy.
+
+    Bits decay by bitDecayPerRound, then the turn's income is added, then the total is capped and
+    rounded to one decimal, the same way GameState.project_future_bits does it. Cores never decay and
+    grow by coresPerRound, plus coresForPlayerDamage for each point of damage the player is expected
+    to deal that turn.
+
+    Attributes:
+        * horizon (int): The number of turns projected
+
+    """
+    def __init__(self, config, horizon=100):
+        """Precomputes the income schedule for the game
+
+        Args:
+            * config (JSON): A json object containing information about the game
+            * horizon: The number of turns to project
+
+        """
+        self.config = config
+        self.horizon = horizon
+        self._schedule = []
+        self._table_key = None
+        self._table = None
+
+    def _schedule_until(self, turn_number):
+        while len(self._schedule) <= turn_number:
+            self._schedule.append(bit_schedule(self.config, len(self._schedule)))
+        return self._schedule
+
+    def table(self, game_state, expected_damage=(0, 0)):
+        """Projects both players from the current game state
+
+        The table is cached until the turn, the resources or expected_damage change.
+
+        Args:
+            * game_state: The current GameState
+            * expected_damage: The damage each player is expected to deal per turn, [yours, your opponents]
+
+        Returns:
+            A dict with "bits" and "cores", each a list indexed by player of lists indexed by turns in the
+            future (0 is now, up to horizon)
+
+        """
+        resources = [(game_state.get_resource(game_state.BITS, player_index), game_state.get_resource(game_state.CORES, player_index))
+                     for player_index in range(2)]
+        key = (game_state.turn_number, tuple(resources), tuple(expected_damage))
+        if key == self._table_key:
+            return self._table
+
+        decay = 1 - self.config["resources"]["bitDecayPerRound"]
+        cores_per_round = self.config["resources"]["coresPerRound"]
+        cores_for_damage = self.config["resources"]["coresForPlayerDamage"]
+        schedule = self._schedule_until(game_state.turn_number + self.horizon)
+
+        table = {"bits": [], "cores": []}
+        for player_index, (bits, cores) in enumerate(resources):
+            bits_row = [bits]
+            cores_row = [cores]
+            cores_gained = cores_per_round + cores_for_damage * expected_damage[player_index]
+            for increment in range(1, self.horizon + 1):
+                income, cap = schedule[game_state.turn_number + increment]
+                bits = round(min(bits * decay + income, cap), 1)
+                cores += cores_gained
+                bits_row.append(bits)
+                cores_row.append(cores)
+            table["bits"].append(bits_row)
+            table["cores"].append(cores_row)
+
+        self._table_key = key
+        self._table = table
+        return table
+
+    def bits(self, game_state, turns_in_future=1, player_index=0):
+        """Gets the bits a player is projected to have after the given number of turns
+        """
+        return self.table(game_state)["bits"][player_index][turns_in_future]
+
+    def cores(self, game_state, turns_in_future=1, player_index=0, expected_damage=(0, 0)):
+        """Gets the cores a player is projected to have after the given number of turns
+        """
+        return self.table(game_state, expected_damage)["cores"][player_index][turns_in_future]
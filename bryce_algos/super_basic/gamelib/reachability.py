@@ -0,0 +1,163 @@
+class Reachability:
+    """Connected components of the pathable tiles of a map
+
+    Every in bounds tile without a firewall is labelled with the component it belongs to, using one
+    breadth first search over tile ids (x * ARENA_SIZE + y). Each component records which rows and edges
+    it touches, so questions like "can a unit at X reach row 13" or "can it reach the top right edge" are
+    answered in constant time for any tile. Adding or removing a firewall only relabels the component
+    it touches.
+
+    Note that this only answers whether a unit could get somewhere. Use find_path_to_edge for the path
+    it would actually take.
+
+    Attributes:
+        * ARENA_SIZE (int): The size of the arena
+
+    """
+    def __init__(self, game_state):
+        """Labels the components of the current map of a game state
+
+        Args:
+            * game_state: The GameState whose map should be analysed
+
+        """
+        game_map = game_state.game_map
+        self.ARENA_SIZE = game_map.ARENA_SIZE
+        size = self.ARENA_SIZE
+        self._in_bounds = [False] * (size * size)
+        self._blocked = [False] * (size * size)
+        self._edges = [0] * (size * size)
+        for x in range(size):
+            for y in range(size):
+                if game_map.in_arena_bounds([x, y]):
+                    tile = x * size + y
+                    self._in_bounds[tile] = True
+                    self._blocked[tile] = any(unit.stationary for unit in game_map[x, y])
+        for edge, locations in enumerate(game_map.get_edges()):
+            for x, y in locations:
+                self._edges[x * size + y] |= 1 << edge
+
+        self._component = [None] * (size * size)
+        self._tiles = {}
+        self._rows = {}
+        self._touched_edges = {}
+        self._next_component = 0
+        for tile in range(size * size):
+            if self._in_bounds[tile] and not self._blocked[tile] and self._component[tile] is None:
+                self._label(tile)
+
+    def _neighbors(self, tile):
+        size = self.ARENA_SIZE
+        x, y = divmod(tile, size)
+        if y + 1 < size:
+            yield tile + 1
+        if y > 0:
+            yield tile - 1
+        if x + 1 < size:
+            yield tile + size
+        if x > 0:
+            yield tile - size
+
+    def _label(self, start):
+        """Breadth first search from an open tile, giving everything it reaches a new component
+        """
+        component = self._next_component
+        self._next_component += 1
+        tiles = [start]
+        self._component[start] = component
+        rows = 0
+        edges = 0
+        index = 0
+        while index < len(tiles):
+            tile = tiles[index]
+            index += 1
+            rows |= 1 << (tile % self.ARENA_SIZE)
+            edges |= self._edges[tile]
+            for neighbor in self._neighbors(tile):
+                if self._in_bounds[neighbor] and not self._blocked[neighbor] and self._component[neighbor] != component:
+                    self._component[neighbor] = component
+                    tiles.append(neighbor)
+        self._tiles[component] = tiles
+        self._rows[component] = rows
+        self._touched_edges[component] = edges
+
+    def _forget(self, component):
+        for tile in self._tiles.pop(component):
+            if self._component[tile] == component:
+                self._component[tile] = None
+        del self._rows[component]
+        del self._touched_edges[component]
+
+    def _tile(self, location):
+        x, y = int(location[0]), int(location[1])
+        if 0 <= x < self.ARENA_SIZE and 0 <= y < self.ARENA_SIZE:
+            tile = x * self.ARENA_SIZE + y
+            if self._in_bounds[tile]:
+                return tile
+        return None
+
+    def component(self, location):
+        """Gets the component a location belongs to
+
+        Returns:
+            An integer shared by all locations a unit can move between, or None if the location is blocked or out of bounds
+
+        """
+        tile = self._tile(location)
+        return None if tile is None else self._component[tile]
+
+    def can_reach_row(self, location, row):
+        """True if a unit at location could move to some tile on the given row
+        """
+        component = self.component(location)
+        return component is not None and bool(self._rows[component] >> row & 1)
+
+    def can_reach_edge(self, location, edge):
+        """True if a unit at location could move to some tile on the given edge (game_map.TOP_RIGHT, etc.)
+        """
+        component = self.component(location)
+        return component is not None and bool(self._touched_edges[component] >> edge & 1)
+
+    def reachable_locations(self, location):
+        """Gets every location a unit at location could move to, including location itself
+        """
+        component = self.component(location)
+        if component is None:
+            return []
+        return [list(divmod(tile, self.ARENA_SIZE)) for tile in self._tiles[component]]
+
+    def add_firewall(self, location):
+        """Blocks a location and relabels the component it split
+
+        Returns:
+            False if the location was already blocked or out of bounds
+
+        """
+        tile = self._tile(location)
+        if tile is None or self._blocked[tile]:
+            return False
+        component = self._component[tile]
+        neighbors = [neighbor for neighbor in self._neighbors(tile) if self._component[neighbor] == component]
+        self._blocked[tile] = True
+        self._forget(component)
+        for neighbor in neighbors:
+            if self._component[neighbor] is None:
+                self._label(neighbor)
+        return True
+
+    def remove_firewall(self, location):
+        """Unblocks a location and merges the components it joins
+
+        Returns:
+            False if the location was not blocked or is out of bounds
+
+        """
+        tile = self._tile(location)
+        if tile is None or not self._blocked[tile]:
+            return False
+        self._blocked[tile] = False
+        for component in set(self._component[neighbor] for neighbor in self._neighbors(tile)):
+            if component is not None:
+                self._forget(component)
+        self._label(tile)
+        return True
@@ -0,0 +1,57 @@
+"""Forwards a game between stdin/stdout and an algo server's Unix socket. See gamelib/server.py.
+
+run.sh runs this file directly when the server's socket exists, so it only imports the standard
+library and not gamelib, and starts as fast as Python can.
+
+Usage: python3 -S relay.py SOCKET_PATH
+
+Exits with status 3 without reading stdin if the server cannot be reached, so run.sh can start
+the algo normally instead.
+"""
+import os
+import socket
+import sys
+import threading
+
+CANNOT_CONNECT = 3
+
+
+def write_all(fd, data):
+    while data:
+        data = data[os.write(fd, data):]
+
+
+def forward_stdin(sock):
+    """Copies stdin to the socket until stdin ends, then tells the server no more input is coming
+    """
+    try:
+        while True:
+            data = os.read(0, 65536)
+            if not data:
+                break
+            sock.sendall(data)
+        sock.shutdown(socket.SHUT_WR)
+    except OSError:
+        pass
+
+
+def main(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError as e:
+        sys.stderr.write("Could not reach the algo server at {}: {}\n".format(path, e))
+        return CANNOT_CONNECT
+    thread = threading.Thread(target=forward_stdin, args=(sock,))
+    thread.daemon = True
+    thread.start()
+    # the server closes the connection once the game is over
+    while True:
+        data = sock.recv(65536)
+        if not data:
+            return 0
+        write_all(1, data)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1]))
@@ -0,0 +1,80 @@
+class SpawnRanker:
+    """Ranks every deployable edge location for a given information unit type and stack size
+
+    Rankings are built from AdvancedGameState.edge_exposure, so all spawn locations are evaluated
+    together. They are cached by the firewall layout hash of the board, so asking again during the
+    same turn, or on a later turn with the same firewalls, is free. Keep one SpawnRanker on your
+    strategy for the whole game.
+
+    The damage model is simple: every destructor in range of a path tile hits the stack for each
+    frame the stack spends on that tile, the hits are spread over the stack one unit at a time,
+    and shields and enemy information units are ignored.
+
+    """
+    def __init__(self):
+        self._layout_hash = None
+        self._rankings = {}
+
+    def rank(self, game_state, unit_type, num=1, player_index=0):
+        """Ranks every unblocked spawn location on a player's edges
+
+        Args:
+            * game_state: An AdvancedGameState
+            * unit_type: The information unit type that would be spawned
+            * num: The number of units stacked on the spawn location
+            * player_index: The player spawning the units, 0 for you 1 for the enemy
+
+        Returns:
+            A list of dicts, best spawn location first, each with:
+                * location: The [x, y] spawn location
+                * damage: The damage the stack is expected to take before it breaches or dies
+                * expected_survivors: The number of units expected to be alive at the end of the path
+                * breach_probability: The fraction of the stack expected to reach the opposite edge
+                * path_length: The number of moves to the end of the path
+            Locations are ordered by breach probability (highest first), then damage, then path length.
+
+        """
+        from .game_state import UNIT_TYPE_TO_INDEX
+
+        layout_hash = game_state.game_map.layout_hash()
+        if layout_hash != self._layout_hash:
+            self._layout_hash = layout_hash
+            self._rankings = {}
+        key = (unit_type, num, player_index)
+        if key in self._rankings:
+            return self._rankings[key]
+
+        exposure = game_state.edge_exposure(player_index, unit_type)
+        if exposure is None:
+            return []
+        stability = game_state.config["unitInformation"][UNIT_TYPE_TO_INDEX[unit_type]]["stability"]
+
+        ranking = []
+        for location, report in exposure.items():
+            damage = min(report["damage"], num * stability)
+            survivors = num - damage / stability
+            ranking.append({
+                "location": [location[0], location[1]],
+                "damage": damage,
+                "expected_survivors": survivors,
+                "breach_probability": survivors / num if report["reaches_edge"] else 0.0,
+                "path_length": report["path_length"]
+            })
+        ranking.sort(key=lambda entry: (-entry["breach_probability"], entry["damage"], entry["path_length"]))
+        self._rankings[key] = ranking
+        return ranking
+
+    def best(self, game_state, unit_type, num=1, available=None, player_index=0):
+        """Gets the best ranked spawn location
+
+        Args:
+            * available: If given, only these locations are considered
+
+        Returns:
+            The [x, y] location, or None if no location qualifies
+
+        """
+        for entry in self.rank(game_state, unit_type, num, player_index):
+            if available is None or entry["location"] in available:
+                return entry["location"]
+        return None
@@ -2,6 +2,7 @@ import gamelib
 import random
 import math
 import warnings
+import sys
 from sys import maxsize
 
 """
@@ -113,29 +114,37 @@ class AlgoStrategy(gamelib.AlgoCore):
         front1 = [(i, 13) for i in range(2, 26)]
         if self.attacker_spawn_far[0] < 13.5:
             front1.reverse()
-        for location in front1[:-1]:
-            game_state.attempt_spawn(FILTER, location)
-        game_state.attempt_remove(front1[-1])
+        plan = gamelib.TurnPlan(game_state)
+        plan.spawn(FILTER, front1[:-1])
+        plan.remove(front1[-1])
+        plan.commit()
 
     def new_defences(self, game_state):
-        firewall_locations = [[0, 13], [1, 12], [27, 13], [26, 12]]
-        for location in firewall_locations:
-            game_state.attempt_spawn(FILTER, location)
+        # corners first, then destructors, then the filter wall; where a destructor
+        # and a wall filter share a location only one of them gets built
+        builds = []
+        for location in [[0, 13], [1, 12], [27, 13], [26, 12]]:
+            builds.append((FILTER, location))
 
         firewall_locations = [[2, 11], [4, 11], [6, 11], [8, 11], [12, 11],
                               [14, 11], [19, 11], [21, 11], [23, 11], [25, 11]]
-
         for location in firewall_locations:
-            game_state.attempt_spawn(DESTRUCTOR, location)
+            builds.append((DESTRUCTOR, location))
 
         for j in range(3, 24):
-            location = [j, 11]
-            game_state.attempt_spawn(FILTER, location)
+            builds.append((FILTER, [j, 11]))
+
+        # each build is worth more than every build after it put together, so the
+        # allocator keeps this order strictly instead of trading one build for cheaper ones
+        allocator = gamelib.BudgetAllocator(game_state)
+        for i, (unit_type, location) in enumerate(builds):
+            allocator.add(unit_type, location, 2 ** (len(builds) - i))
+        allocator.commit()
 
         if game_state.number_affordable(ENCRYPTOR) > 6:
             encryt_locs = self.get_encrypt_locs(game_state)
             num_encryptors = 0
-            bound = game_state.number_available(ENCRYPTOR) - 2 
+            bound = game_state.number_affordable(ENCRYPTOR) - 2 
 
             for loc in encryt_locs:
                 if(game_state.can_spawn(ENCRYPTOR, loc)):
@@ -169,51 +178,20 @@ class AlgoStrategy(gamelib.AlgoCore):
     ####### Begin Bryce's functions ########
 
     def get_diagnostics(self, game_state):
+        # the census is built while the turn is parsed, so this just regroups it
+        mine = game_state.census(0)
+        theirs = game_state.census(1)
+        units = {"D0" : mine["units"][DESTRUCTOR], "E0" : mine["units"][ENCRYPTOR], "F0" : mine["units"][FILTER],
+                 "D1" : theirs["units"][DESTRUCTOR], "E1" : theirs["units"][ENCRYPTOR], "F1" : theirs["units"][FILTER]}
+
+        # the front row on our side, and the four rows on theirs
+        row = game_state.HALF_ARENA - 1
+        units["fline"] = mine["row_locations"][row] + theirs["row_locations"][row]
+        for i in range(1, 5):
+            row = game_state.HALF_ARENA + i - 1
+            units["Efront" + str(i)] = mine["row_locations"][row] + theirs["row_locations"][row]
 
-        # create an iterator to go through the map and store everything you find
-        game_state.game_map.__iter__()
-        loc = [13, 0]
-        unit = game_state.game_map.__getitem__(loc)
-        units = {"D0" : [], "E0" : [], "F0" : [], "D1" : [], "E1" : [], "F1" : [],
-                "Efront1" : [], "Efront2" : [], "Efront3" : [], "Efront4" : [],
-                "fline" : []}
-
-        # get data on all of your squares
-        try:
-            while(True):
-                # get the diagnostics
-                for elt in unit:
-                    if(elt.unit_type == DESTRUCTOR):
-                        unit_type = "D"
-                    elif(elt.unit_type == ENCRYPTOR):
-                        unit_type = "E"
-                    else:
-                        unit_type = "F"
-                    key = unit_type + str(elt.player_index)
-
-                    if(game_state.HALF_ARENA - 1 <= loc[1] and loc[1] < game_state.HALF_ARENA + 4):
-                        # put the front two rows into lists based on the side
-                        if(loc[1] == game_state.HALF_ARENA - 1):
-                            units["fline"].append([elt.x, elt.y])
-                        elif(loc[1] == game_state.HALF_ARENA):
-                            units["Efront1"].append([elt.x, elt.y])
-                        elif(loc[1] == game_state.HALF_ARENA + 1):
-                            units["Efront2"].append([elt.x, elt.y])
-                        elif(loc[1] == game_state.HALF_ARENA + 2):
-                            units["Efront3"].append([elt.x, elt.y])
-                        else:
-                            units["Efront4"].append([elt.x, elt.y])
-
-
-                    # put this unit into the dictionary
-                    units[key].append(elt)
-
-                # move on to the next space
-                loc = game_state.game_map.__next__()
-                unit = game_state.game_map.__getitem__(loc)
-
-        except StopIteration:
-            game_state.board_units = units
+        game_state.board_units = units
 
     # return list of encryptor locations
     def get_encrypt_locs(self, game_state):
@@ -265,4 +243,8 @@ class AlgoStrategy(gamelib.AlgoCore):
 
 if __name__ == "__main__":
     algo = AlgoStrategy()
-    algo.start()
+    if "--serve" in sys.argv:
+        # Keep playing games handed over by run.sh, see gamelib/server.py
+        gamelib.serve(algo)
+    else:
+        algo.start()
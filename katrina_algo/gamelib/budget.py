@@ -0,0 +1,129 @@
+import math
+
+class BudgetAllocator:
+    """Chooses the most valuable set of firewalls you can afford, instead of building them in call order
+
+    Candidates are added with a value, then allocate() solves a multiple choice knapsack over your
+    cores: candidates sharing a group (by default, candidates on the same location) are alternatives,
+    and at most one of each group is built. Costs and budgets are rounded down to whole cores, which is
+    exact for the default unit costs. Nothing is built until commit(), which pushes the whole
+    allocation onto the build stack at once.
+
+    Attributes:
+        * deferred (list): After allocate(), the candidates that would be bought next turn with the projected cores
+
+    """
+    def __init__(self, game_state):
+        """Creates an empty allocator for a turn
+
+        Args:
+            * game_state: The GameState the builds will be committed to
+
+        """
+        self.game_state = game_state
+        self.deferred = []
+        self._candidates = []
+
+    def add(self, unit_type, location, value, group=None):
+        """Adds a candidate build
+
+        Args:
+            * unit_type: The firewall type to build
+            * location: The [x, y] location to build it at
+            * value: How much you want it. Only the relative values of candidates matter.
+            * group: Any hashable. At most one candidate per group is built. Defaults to the location.
+
+        """
+        from .game_state import is_stationary
+
+        if not is_stationary(unit_type):
+            self.game_state.warn("BudgetAllocator only allocates firewalls, ignoring {}", unit_type)
+            return
+        if group is None:
+            group = (location[0], location[1])
+        self._candidates.append({"unit_type": unit_type, "location": [location[0], location[1]], "value": value, "group": group})
+
+    def _solve(self, candidates, budget):
+        groups = {}
+        order = []
+        for candidate in candidates:
+            if candidate["group"] not in groups:
+                groups[candidate["group"]] = []
+                order.append(candidate["group"])
+            groups[candidate["group"]].append(candidate)
+
+        # best[i][b] is the best value of the first i groups using at most b cores
+        budget = max(0, int(math.floor(budget)))
+        best = [[0] * (budget + 1)]
+        for group in order:
+            previous = best[-1]
+            row = list(previous)
+            for candidate in groups[group]:
+                cost = int(math.ceil(self.game_state.type_cost(candidate["unit_type"])))
+                for b in range(cost, budget + 1):
+                    if previous[b - cost] + candidate["value"] > row[b]:
+                        row[b] = previous[b - cost] + candidate["value"]
+            best.append(row)
+
+        chosen = []
+        b = budget
+        for i in range(len(order), 0, -1):
+            if best[i][b] == best[i - 1][b]:
+                continue
+            for candidate in groups[order[i - 1]]:
+                cost = int(math.ceil(self.game_state.type_cost(candidate["unit_type"])))
+                if cost <= b and best[i - 1][b - cost] + candidate["value"] == best[i][b]:
+                    chosen.append(candidate)
+                    b -= cost
+                    break
+        chosen.reverse()
+        return chosen
+
+    def allocate(self, cores=None, projected_cores=None):
+        """Solves the allocation without building anything
+
+        Candidates that cannot be built (blocked, out of bounds or on the enemy side) are dropped first.
+
+        Args:
+            * cores: The budget for this turn. Defaults to your current cores.
+            * projected_cores: The cores you expect to gain before next turn, used to fill deferred.
+              Defaults to coresPerRound from the config.
+
+        Returns:
+            The list of candidates to build this turn, each a dict with unit_type, location, value and group
+
+        """
+        game_state = self.game_state
+        if cores is None:
+            cores = game_state.get_resource(game_state.CORES)
+        if projected_cores is None:
+            projected_cores = game_state.config["resources"]["coresPerRound"]
+
+        buildable = []
+        for candidate in self._candidates:
+            location = candidate["location"]
+            if (game_state.game_map.in_arena_bounds(location) and location[1] < game_state.HALF_ARENA
+                    and len(game_state.game_map[location[0], location[1]]) == 0):
+                buildable.append(candidate)
+
+        now = self._solve(buildable, cores)
+        spent = sum(game_state.type_cost(candidate["unit_type"]) for candidate in now)
+        taken = set(candidate["group"] for candidate in now)
+        remaining = [candidate for candidate in buildable if candidate["group"] not in taken]
+        self.deferred = self._solve(remaining, cores - spent + projected_cores)
+        return now
+
+    def commit(self, cores=None, projected_cores=None):
+        """Allocates your cores and pushes every chosen build onto the build stack
+
+        Returns:
+            The number of firewalls built
+
+        """
+        built = 0
+        for candidate in self.allocate(cores, projected_cores):
+            if self.game_state.can_spawn(candidate["unit_type"], candidate["location"]):
+                self.game_state._commit_spawn(candidate["unit_type"], candidate["location"])
+                built += 1
+        self._candidates = []
+        return built
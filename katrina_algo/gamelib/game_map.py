@@ -1,6 +1,28 @@
 import math
+import random
 from .unit import GameUnit
-from .util import debug_write
+from .debug_log import get_log
+
+"""
+Zobrist keys used to hash firewall layouts. One 64 bit key per (firewall type, player, x, y),
+generated from a fixed seed so that hashes are stable between processes and matches.
+"""
+_ZOBRIST_RNG = random.Random(0x7e4a11)
+_ZOBRIST_KEYS = [_ZOBRIST_RNG.getrandbits(64) for _ in range(3 * 2 * 28 * 28)]
+
+def zobrist_key(type_index, player_index, x, y):
+    """Gets the hash key of a single firewall
+
+    Args:
+        * type_index: The index of the firewall type in config["unitInformation"] (0, 1 or 2)
+        * player_index: The player controlling the firewall, 0 for you 1 for the enemy
+        * x, y: The location of the firewall
+
+    Returns:
+        A 64 bit integer. The layout hash of a board is the xor of the keys of all of its firewalls.
+
+    """
+    return _ZOBRIST_KEYS[((type_index * 2 + player_index) * 28 + x) * 28 + y]
 
 class GameMap:
     """Holds data about the current game map and provides functions
@@ -36,6 +58,9 @@ class GameMap:
         self.BOTTOM_RIGHT = 3
         self.__map = self.__empty_grid()
         self.__start = [13,0]
+        self.__firewall_index = {}
+        for index, unit_info in enumerate(self.config["unitInformation"][:3]):
+            self.__firewall_index[unit_info["shorthand"]] = index
     
     def __getitem__(self, location):
         if len(location) == 2 and self.in_arena_bounds(location):
@@ -75,7 +100,7 @@ class GameMap:
         return grid
 
     def _invalid_coordinates(self, location):
-        self.warn("{} is out of bounds.".format(str(location)))
+        self.warn("{} is out of bounds.", location)
 
     def in_arena_bounds(self, location):
         """Checks if the given location is inside the diamond shaped game board.
@@ -117,7 +142,7 @@ class GameMap:
 
         """
         if not quadrant_description in [self.TOP_LEFT, self.TOP_RIGHT, self.BOTTOM_LEFT, self.BOTTOM_RIGHT]:
-            self.warn("Passed invalid quadrant_description '{}'. See the documentation for valid inputs for get_edge_locations.".format(quadrant_description))
+            self.warn("Passed invalid quadrant_description '{}'. See the documentation for valid inputs for get_edge_locations.", quadrant_description)
             return
 
         edges = self.get_edges()
@@ -166,7 +191,7 @@ class GameMap:
         if not self.in_arena_bounds(location):
             self._invalid_coordinates(location)
         if player_index < 0 or player_index > 1:
-            self.warn("Player index {} is invalid. Player index should be 0 or 1.".format(player_index))
+            self.warn("Player index {} is invalid. Player index should be 0 or 1.", player_index)
 
         x, y = location
         new_unit = GameUnit(unit_type, self.config, player_index, None, location[0], location[1])
@@ -190,6 +215,24 @@ class GameMap:
         x, y = location
         self.__map[x][y] = []
 
+    def layout_hash(self):
+        """Hashes the firewall layout of the map
+
+        Only the type, owner and location of firewalls are hashed, so two maps with the same
+        firewalls in the same places hash the same regardless of stability or information units.
+
+        Returns:
+            A 64 bit integer identifying the firewall layout
+
+        """
+        layout_hash = 0
+        for x in range(self.ARENA_SIZE):
+            for y in range(self.ARENA_SIZE):
+                for unit in self.__map[x][y]:
+                    if unit.stationary:
+                        layout_hash ^= zobrist_key(self.__firewall_index[unit.unit_type], unit.player_index, x, y)
+        return layout_hash
+
     def get_locations_in_range(self, location, radius):
         """Gets locations in a circular area around a location
 
@@ -202,7 +245,7 @@ class GameMap:
 
         """
         if radius < 0 or radius > self.ARENA_SIZE:
-            self.warn("Radius {} was passed to get_locations_in_range. Expected integer between 0 and {}".format(radius, self.ARENA_SIZE))
+            self.warn("Radius {} was passed to get_locations_in_range. Expected integer between 0 and {}", radius, self.ARENA_SIZE)
         if not self.in_arena_bounds(location):
             self._invalid_coordinates(location)
 
@@ -232,6 +275,6 @@ class GameMap:
 
         return math.sqrt((x1 - x2)**2 + (y1 - y2)**2)
 
-    def warn(self, message):
+    def warn(self, message, *args):
         if(self.enable_warnings):
-            debug_write(message)
+            get_log().warning(message, *args)
@@ -2,6 +2,7 @@ import gamelib
 import random
 import math
 import warnings
+import sys
 from sys import maxsize
 
 """
@@ -188,34 +189,9 @@ class AlgoStrategy(gamelib.AlgoCore):
         return filtered
 
     def check_friendly_pathing(self, locations, game_state):
-        #start with a set of positions in row 13 (y = 13) that are empty. 
-        escapable_locations = set()
-        for i in range(28):
-            location = (i, 13)
-            if not game_state.contains_stationary_unit(location):
-                escapable_locations.update([location])
-        prevSize = 0
-        while len(escapable_locations) > prevSize:
-            new_locations = set()
-            prevSize = len(escapable_locations)
-            #now need to add all the new locations
-            for location in escapable_locations:
-                adjacent_locations = {
-                    (location[0]+1, location[1]),
-                    (location[0]-1, location[1]),
-                    (location[0], location[1]+1),
-                    (location[0], location[1]-1)
-                }
-                for new_loc in adjacent_locations:
-                    if game_state.game_map.in_arena_bounds(new_loc):
-                        if not game_state.contains_stationary_unit(new_loc):
-                            new_locations.update([new_loc])
-            escapable_locations = escapable_locations.union(new_locations)
-        good_locations = []
-        for loc in locations:
-            if tuple(loc) in escapable_locations:
-                good_locations.append(loc)
-        return good_locations
+        # keep the locations that can still walk out to the middle row (y = 13)
+        reachability = gamelib.Reachability(game_state)
+        return [loc for loc in locations if reachability.can_reach_row(loc, 13)]
 
     def rank_spawns(self, available_spawns, game_state):
         if len(available_spawns) > 0:
@@ -224,4 +200,8 @@ class AlgoStrategy(gamelib.AlgoCore):
 
 if __name__ == "__main__":
     algo = AlgoStrategy()
-    algo.start()
+    if "--serve" in sys.argv:
+        # Keep playing games handed over by run.sh, see gamelib/server.py
+        gamelib.serve(algo)
+    else:
+        algo.start()
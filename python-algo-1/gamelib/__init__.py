@@ -4,10 +4,21 @@ The gamelib package contains modules that assist in algo creation
 
 from .algocore import AlgoCore
 from .util import debug_write
+from .debug_log import get_log
 from .game_state import GameState
 from .unit import GameUnit
 from .game_map import GameMap
 from .advanced_game_state import AdvancedGameState
+from .transposition import TranspositionTable
+from .spawn_ranking import SpawnRanker
+from .reachability import Reachability
+from .placement import PlacementOptimizer
+from .budget import BudgetAllocator
+from .plan import TurnPlan
+from .projection import ResourceProjector
+from .server import serve
 
-__all__ = ["advanced_game_state", "algocore", "game_state", "game_map", "navigation", "unit", "util"]
+__all__ = ["advanced_game_state", "algocore", "budget", "debug_log", "game_state", "game_map", "navigation", "placement", "plan",
+           "projection", "reachability", "server", "spawn_ranking", "speculation", "transport", "transposition", "unit", "util",
+           "watchdog"]
  
\ No newline at end of file
@@ -1,10 +1,35 @@
 from .game_state import GameState, GameUnit
+import copy
+import math
 import sys
 
+"""
+Offsets (dx, dy, distance) of every tile within a given range, ordered the same way
+GameMap.get_locations_in_range orders the tiles it returns. Shared by all game states.
+"""
+_range_stencils = {}
+
+def _range_stencil(radius):
+    stencil = _range_stencils.get(radius)
+    if stencil is None:
+        reach = int(math.ceil(radius)) + 1
+        stencil = []
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                distance = math.sqrt(dx ** 2 + dy ** 2)
+                if distance < radius + 0.51:
+                    stencil.append((dx, dy, distance))
+        _range_stencils[radius] = stencil
+    return stencil
+
 class AdvancedGameState(GameState):
     """A version of gamestate with access to a few more advanced functions
 
     """
+    def __init__(self, config, serialized_string):
+        super().__init__(config, serialized_string)
+        self._attacker_coverage = {}
+
     def get_target(self, attacking_unit):
         """Returns target of given unit based on current map of the game board. 
         A Unit can often have many other units in range, and Units that attack do so once each frame.
@@ -23,7 +48,7 @@ class AdvancedGameState(GameState):
         from .game_state import SCRAMBLER, is_stationary
 
         if not isinstance(attacking_unit, GameUnit):
-            self.warn("Passed a {} to get_target as attacking_unit. Expected a GameUnit.".format(type(attacking_unit)))
+            self.warn("Passed a {} to get_target as attacking_unit. Expected a GameUnit.", type(attacking_unit))
             return
 
         attacker_location = [attacking_unit.x, attacking_unit.y]
@@ -89,6 +114,265 @@ class AdvancedGameState(GameState):
                     target_x_distance = unit_x_distance
         return target
 
+    def get_targets(self, attacking_units, target_units=None):
+        """Resolves the targets of many units at once, with the same priorities as get_target.
+
+        The possible targets are bucketed by location once, and each attacker only looks at
+        the occupied tiles within its range, so a whole frame can be resolved in one call.
+
+        Args:
+            * attacking_units: A list of GameUnits
+            * target_units: A list of GameUnits that can be targeted. Defaults to every unit on the map.
+
+        Returns:
+            A list with, for each attacking unit, the index in target_units of the unit it would attack,
+            or None if it has no target. When target_units is not given, indexes refer to all_units().
+
+        """
+        from .game_state import SCRAMBLER
+
+        if target_units is None:
+            target_units = self.all_units()
+
+        by_location = {}
+        for index, unit in enumerate(target_units):
+            by_location.setdefault((unit.x, unit.y), []).append(index)
+
+        targets = []
+        for attacking_unit in attacking_units:
+            if not isinstance(attacking_unit, GameUnit):
+                self.warn("Passed a {} to get_targets as an attacking unit. Expected a GameUnit.", type(attacking_unit))
+                targets.append(None)
+                continue
+
+            x, y = attacking_unit.x, attacking_unit.y
+            radius = attacking_unit.range
+            min_x, max_x = int(x - radius), int(x + radius + 1)
+            min_y, max_y = int(y - radius), int(y + radius + 1)
+            ignores_firewalls = attacking_unit.unit_type == SCRAMBLER
+            y_sign = 1 if attacking_unit.player_index == 0 else -1
+
+            best_index = None
+            best_priority = None
+            for dx, dy, distance in _range_stencil(radius):
+                if not (min_x <= x + dx < max_x and min_y <= y + dy < max_y):
+                    continue
+                indexes = by_location.get((x + dx, y + dy))
+                if indexes is None:
+                    continue
+                for index in indexes:
+                    unit = target_units[index]
+                    if unit.player_index == attacking_unit.player_index or (ignores_firewalls and unit.stationary):
+                        continue
+                    # Lower is better: information before firewalls, then nearest, then lowest stability,
+                    # then lowest y for player 0 (highest for player 1), then furthest from the center
+                    priority = (unit.stationary, distance, unit.stability, y_sign * unit.y, -abs(self.HALF_ARENA - 0.5 - unit.x))
+                    if best_priority is None or priority < best_priority:
+                        best_index = index
+                        best_priority = priority
+            targets.append(best_index)
+        return targets
+
+    def all_units(self):
+        """Gets every unit on the map
+
+        Returns:
+            A list of GameUnits, ordered by x, then y, then position in the stack at that location
+
+        """
+        units = []
+        for x in range(self.ARENA_SIZE):
+            for y in range(self.ARENA_SIZE):
+                if self.game_map.in_arena_bounds([x, y]):
+                    units.extend(self.game_map[x, y])
+        return units
+
+    def get_attacker_coverage(self, player_index):
+        """Gets the destructors threatening every location on the map
+
+        The index is built by stamping the range of each destructor onto the map once, and is
+        cached until the firewall layout changes.
+
+        Args:
+            * player_index: The index corresponding to the defending player, 0 for you 1 for the enemy
+
+        Returns:
+            A dict from (x, y) to the list of destructors that would attack a unit controlled by the given
+            player at that location, in the same order as get_attackers. Locations nobody threatens are missing.
+
+        """
+        from .game_state import DESTRUCTOR, UNIT_TYPE_TO_INDEX
+
+        if not player_index == 0 and not player_index == 1:
+            self._invalid_player_index(player_index)
+
+        layout_hash = self.game_map.layout_hash()
+        cached = self._attacker_coverage.get(player_index)
+        if cached is not None and cached[0] == layout_hash:
+            return cached[1]
+
+        radius = self.config["unitInformation"][UNIT_TYPE_TO_INDEX[DESTRUCTOR]]["range"]
+        stencil = _range_stencil(radius)
+        coverage = {}
+        for unit in self.all_units():
+            if unit.unit_type != DESTRUCTOR or unit.player_index == player_index:
+                continue
+            for dx, dy, _ in stencil:
+                location = (unit.x + dx, unit.y + dy)
+                if self.game_map.in_arena_bounds(location):
+                    coverage.setdefault(location, []).append(unit)
+        self._attacker_coverage[player_index] = (layout_hash, coverage)
+        return coverage
+
+    def get_attackers_batch(self, locations, player_index):
+        """Gets the destructors threatening each of many locations
+
+        Args:
+            * locations: A list of locations, for example a path
+            * player_index: The index corresponding to the defending player, 0 for you 1 for the enemy
+
+        Returns:
+            A list with, for each location, the list of destructors get_attackers would return for it
+
+        """
+        coverage = self.get_attacker_coverage(player_index)
+        return [list(coverage.get((location[0], location[1]), [])) for location in locations]
+
+    def get_path_attackers(self, path, player_index, unit_type=None):
+        """Gets every destructor that threatens a path, and how long it does so
+
+        Args:
+            * path: A list of locations, usually from find_path_to_edge
+            * player_index: The index corresponding to the player whose unit follows the path
+            * unit_type: If given, counts are converted from tiles to frames using this unit's speed
+
+        Returns:
+            A dict from each destructor threatening the path to the number of path tiles in its range,
+            or the number of frames spent in its range if unit_type is given
+
+        """
+        from .game_state import ALL_UNITS, UNIT_TYPE_TO_INDEX
+
+        frames_per_tile = 1
+        if unit_type is not None:
+            if unit_type not in ALL_UNITS:
+                self._invalid_unit(unit_type)
+                return
+            frames_per_tile = 1 / self.config["unitInformation"][UNIT_TYPE_TO_INDEX[unit_type]]["speed"]
+
+        coverage = self.get_attacker_coverage(player_index)
+        exposure = {}
+        for location in path:
+            for attacker in coverage.get((location[0], location[1]), []):
+                exposure[attacker] = exposure.get(attacker, 0) + frames_per_tile
+        return exposure
+
+    def edge_exposure(self, player_index, unit_type=None):
+        """Gets how exposed a unit spawned on each of a player's edge locations would be
+
+        Paths from every spawn location are found together with ShortestPathFinder.navigate_multiple_starts,
+        and threats come from get_attacker_coverage, so the whole report costs about as much as a couple of
+        single pathfinding calls.
+
+        Args:
+            * player_index: The index corresponding to the player spawning the units, 0 for you 1 for the enemy
+            * unit_type: If given, damage and attacker counts are per frame using this unit's speed instead of per tile
+
+        Returns:
+            A dict from each unblocked (x, y) spawn location on the player's edges to a dict with:
+                * path: The path a unit spawned there would take, from find_path_to_edge
+                * path_length: The number of moves along that path
+                * reaches_edge: True if the path ends on the opposite edge, False if the unit would self destruct
+                * damage: The total damage the destructors in range of the path deal while the unit follows it
+                * attackers: A dict from each destructor threatening the path to the tiles (or frames) spent in its range
+
+        """
+        from .game_state import ALL_UNITS, UNIT_TYPE_TO_INDEX
+
+        if not player_index == 0 and not player_index == 1:
+            self._invalid_player_index(player_index)
+            return
+        frames_per_tile = 1
+        if unit_type is not None:
+            if unit_type not in ALL_UNITS:
+                self._invalid_unit(unit_type)
+                return
+            frames_per_tile = 1 / self.config["unitInformation"][UNIT_TYPE_TO_INDEX[unit_type]]["speed"]
+
+        game_map = self.game_map
+        if player_index == 0:
+            spawn_edges = [(game_map.BOTTOM_LEFT, game_map.TOP_RIGHT), (game_map.BOTTOM_RIGHT, game_map.TOP_LEFT)]
+        else:
+            spawn_edges = [(game_map.TOP_RIGHT, game_map.BOTTOM_LEFT), (game_map.TOP_LEFT, game_map.BOTTOM_RIGHT)]
+
+        coverage = self.get_attacker_coverage(player_index)
+        exposure = {}
+        for spawn_edge, target_edge in spawn_edges:
+            end_points = game_map.get_edge_locations(target_edge)
+            start_points = [location for location in game_map.get_edge_locations(spawn_edge) if not self.contains_stationary_unit(location)]
+            paths = self._shortest_path_finder.navigate_multiple_starts(start_points, end_points, self)
+            for start_point, path in zip(start_points, paths):
+                attackers = {}
+                damage = 0
+                for location in path:
+                    for attacker in coverage.get((location[0], location[1]), []):
+                        attackers[attacker] = attackers.get(attacker, 0) + frames_per_tile
+                        damage += attacker.damage * frames_per_tile
+                exposure[(start_point[0], start_point[1])] = {
+                    "path": path,
+                    "path_length": len(path) - 1,
+                    "reaches_edge": path[-1] in end_points,
+                    "damage": damage,
+                    "attackers": attackers
+                }
+        return exposure
+
+    def evaluate_defense(self, game_map=None):
+        """Evaluates how well your firewalls hold against information units spawned on every enemy edge location
+
+        Enemy paths and the damage dealt on each tile are computed once for the board, then scaled by the
+        speed of each information unit type, so evaluating a layout costs about as much as one edge_exposure call.
+
+        Args:
+            * game_map: A hypothetical GameMap to evaluate, for example a copy of game_map with extra firewalls.
+              Defaults to the current map.
+
+        Returns:
+            A dict from each unblocked (x, y) enemy spawn location to a dict with:
+                * path: The path a unit spawned there would take
+                * path_length: The number of moves along that path
+                * reaches_edge: True if the path ends on your edge, False if the unit would self destruct
+                * tiles_under_fire: The number of path tiles in range of at least one of your destructors
+                * frames_under_fire: A dict from each information unit type to the frames it spends in range of your destructors
+                * damage: A dict from each information unit type to the damage your destructors deal to it along the path
+
+        """
+        from .game_state import PING, EMP, SCRAMBLER, UNIT_TYPE_TO_INDEX
+
+        state = self
+        if game_map is not None and game_map is not self.game_map:
+            state = copy.copy(self)
+            state.game_map = game_map
+            state._attacker_coverage = {}
+
+        frames_per_tile = {}
+        for unit_type in [PING, EMP, SCRAMBLER]:
+            frames_per_tile[unit_type] = 1 / self.config["unitInformation"][UNIT_TYPE_TO_INDEX[unit_type]]["speed"]
+
+        coverage = state.get_attacker_coverage(1)
+        evaluation = {}
+        for location, report in state.edge_exposure(1).items():
+            tiles_under_fire = sum(1 for x, y in report["path"] if (x, y) in coverage)
+            evaluation[location] = {
+                "path": report["path"],
+                "path_length": report["path_length"],
+                "reaches_edge": report["reaches_edge"],
+                "tiles_under_fire": tiles_under_fire,
+                "frames_under_fire": {unit_type: tiles_under_fire * frames for unit_type, frames in frames_per_tile.items()},
+                "damage": {unit_type: report["damage"] * frames for unit_type, frames in frames_per_tile.items()}
+            }
+        return evaluation
+
     def get_attackers(self, location, player_index):
         """Gets the destructors threatening a given location
 
@@ -106,7 +390,7 @@ class AdvancedGameState(GameState):
         if not player_index == 0 and not player_index == 1:
             self._invalid_player_index(player_index)
         if not self.game_map.in_arena_bounds(location):
-            self.warn("Location {} is not in the arena bounds.".format(location))
+            self.warn("Location {} is not in the arena bounds.", location)
 
         attackers = []
         """
@@ -1,17 +1,38 @@
 import json
+import os
+import random
+import time
 
 from .game_state import GameState
+from .speculation import SpeculativePlanner, layout_hash_from_state
+from .watchdog import TurnWatchdog, set_active_watchdog
 from .util import get_command, debug_write, BANNER_TEXT, send_command
+from .transport import TransportClosed
+from .debug_log import get_log
 
 class AlgoCore(object):
     """This class handles communication with the game itself. Your strategy should subclass it.
 
     Attributes:
         * config (JSON): json object containing information about the game
+        * speculative_planning (bool): If True, on_speculate is run on a background thread while the
+          engine plays out the action phase. Set this in your strategy's __init__.
+        * speculative_results (dict): The results of on_speculate that are still valid for the current turn
+        * turn_watchdog (bool): If True, each turn is timed from the moment its message is received, and
+          the best turn so far is submitted once watchdog_margin of the soft time limit has passed.
+          Set this in your strategy's __init__.
+        * watchdog_margin (float): The fraction of the config's waitTimeBotSoft a turn may use
 
     """
     def __init__(self):
         self.config = None
+        self.speculative_planning = False
+        self.speculative_results = {}
+        self.turn_watchdog = False
+        self.watchdog_margin = 0.8
+        self._planner = None
+        self._watchdog = None
+        self._warm_config = None
 
     def on_game_start(self, config):
         """
@@ -20,6 +41,20 @@ class AlgoCore(object):
         """
         self.config = config
 
+    def warm_up(self, config_string):
+        """Runs on_game_start before the game has started, so tables built from the config are ready in advance.
+        If the next game's config is the same string, start() does not run on_game_start again.
+        Used by gamelib/server.py.
+
+        Args:
+            * config_string: The config message, as sent by the game
+
+        """
+        if config_string == self._warm_config:
+            return
+        self.on_game_start(json.loads(config_string))
+        self._warm_config = config_string
+
     def on_turn(self, game_state):
         """
         This step function is called every turn and is passed a string containing
@@ -27,7 +62,34 @@ class AlgoCore(object):
         """
         self.submit_default_turn()
 
+    def on_speculate(self, game_state_string):
+        """
+        Override this to precompute work for the next turn (threat maps, paths, likely enemy builds...)
+        while we would otherwise be waiting for the engine. It is called on a background thread with
+        the latest known game state string, and only when speculative_planning is True.
+
+        Return a dict of results. At the start of the next turn, the results computed from a board with
+        the same firewall layout are made available in self.speculative_results before on_turn is called.
+        Long running work should return early when self.speculation_interrupted() is True.
+        """
+        return {}
+
+    def speculation_interrupted(self):
+        """True once the turn the speculative work was for has arrived
+        """
+        return self._planner is not None and self._planner.interrupted()
+
+    def turn_time_remaining(self):
+        """Seconds left before the watchdog submits the turn, or None if the watchdog is disabled
+        """
+        if self._watchdog is None:
+            return None
+        return self._watchdog.time_remaining()
+
     def submit_default_turn(self):
+        if self._watchdog is not None:
+            self._watchdog.submit("", "")
+            return
         send_command("")
         send_command("")
 
@@ -36,19 +98,37 @@ class AlgoCore(object):
         Start the parsing loop.
         Python will hang on the readline() statement so actually this program will run forever unless manually stopped or
         it receives the "End" turn message from the game.
+
+        If the ARENA_SEED environment variable is set (run_arena.py sets it to the number of the
+        game between the two algos), python's random is seeded with it so the game can be replayed.
         """
         debug_write(BANNER_TEXT)
+        seed = os.environ.get("ARENA_SEED")
+        if seed is not None:
+            random.seed(int(seed))
 
         while True:
             # Note: Python blocks and hangs on stdin. Can cause issues if connections aren't setup properly and may need to
             # manually kill this Python program.
-            game_state_string = get_command()
+            try:
+                game_state_string = get_command()
+            except TransportClosed:
+                debug_write("The game closed the connection, stopping.")
+                if self._watchdog is not None:
+                    self._watchdog.stop()
+                get_log().flush()
+                break
+            received_at = time.time()
             if "replaySave" in game_state_string:
                 """
                 This means this must be the config file. So, load in the config file as a json and add it to your AlgoStrategy class.
                 """
-                parsed_config = json.loads(game_state_string)
-                self.on_game_start(parsed_config)
+                if game_state_string == self._warm_config:
+                    # on_game_start already ran with this config in warm_up
+                    self._warm_config = None
+                else:
+                    parsed_config = json.loads(game_state_string)
+                    self.on_game_start(parsed_config)
             elif "turnInfo" in game_state_string:
                 state = json.loads(game_state_string)
                 stateType = int(state.get("turnInfo")[0])
@@ -57,17 +137,29 @@ class AlgoCore(object):
                     This is the game turn game state message. Algo must now print to stdout 2 lines, one for build phase one for
                     deploy phase. Printing is handled by the provided functions.
                     """
+                    if self.turn_watchdog:
+                        self.__turn_watchdog().start(received_at)
+                    if self.speculative_planning:
+                        board_hash = layout_hash_from_state(state)
+                        self.speculative_results = self.__speculative_planner().reconcile(board_hash)
                     self.on_turn(game_state_string)
+                    if self.speculative_planning:
+                        self.__speculative_planner().schedule(board_hash, game_state_string)
                 elif stateType == 1:
                     """
                     If stateType == 1, this game_state_string string represents the results of an action phase
                     """
+                    if self.speculative_planning:
+                        self.__speculative_planner().schedule(layout_hash_from_state(state), game_state_string)
                     continue
                 elif stateType == 2:
                     """
                     This is the end game message. This means the game is over so break and finish the program.
                     """
                     debug_write("Got end state quitting bot.")
+                    if self._watchdog is not None:
+                        self._watchdog.stop()
+                    get_log().flush()
                     break
                 else:
                     """
@@ -79,3 +171,14 @@ class AlgoCore(object):
                 Something is wrong? Received an incorrect or improperly formatted string.
                 """
                 debug_write("Got unexpected string : {}".format(game_state_string))
+
+    def __speculative_planner(self):
+        if self._planner is None:
+            self._planner = SpeculativePlanner(self.on_speculate)
+        return self._planner
+
+    def __turn_watchdog(self):
+        if self._watchdog is None:
+            self._watchdog = TurnWatchdog(self.config, self.watchdog_margin)
+            set_active_watchdog(self._watchdog)
+        return self._watchdog
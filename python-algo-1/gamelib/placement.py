@@ -0,0 +1,141 @@
+import heapq
+
+class PlacementOptimizer:
+    """Chooses firewall locations that cover as much of the enemy's paths as possible
+
+    Each tile is weighted by how many enemy paths (from AdvancedGameState.edge_exposure) cross it.
+    A firewall at a location is worth the weight of every tile in its range, but every unit of the
+    same type already covering a tile multiplies that tile's weight by decay, so stacking coverage
+    on one choke point gives diminishing returns. Locations are picked greedily, re-scoring a
+    candidate only when it reaches the top of the queue.
+
+    Coverage lists are built from the config range the first time a unit type is placed and reused
+    for the rest of the game, so keep one PlacementOptimizer on your strategy.
+
+    Attributes:
+        * decay (float): The fraction of a tile's weight left for each extra unit covering it
+
+    """
+    def __init__(self, decay=0.5):
+        self.decay = decay
+        self._coverage = {}
+
+    def coverage(self, game_state, unit_type):
+        """Gets the tiles each location would cover with a unit of the given type
+
+        Args:
+            * game_state: The current GameState
+            * unit_type: The firewall type whose range should be used
+
+        Returns:
+            A list indexed by tile id (x * ARENA_SIZE + y) of the tile ids in range of that tile
+
+        """
+        if unit_type not in self._coverage:
+            from .game_state import UNIT_TYPE_TO_INDEX
+
+            game_map = game_state.game_map
+            size = game_map.ARENA_SIZE
+            radius = game_state.config["unitInformation"][UNIT_TYPE_TO_INDEX[unit_type]]["range"]
+            coverage = [[] for _ in range(size * size)]
+            for x in range(size):
+                for y in range(size):
+                    if game_map.in_arena_bounds([x, y]):
+                        coverage[x * size + y] = [tx * size + ty for tx, ty in game_map.get_locations_in_range([x, y], radius)]
+            self._coverage[unit_type] = coverage
+        return self._coverage[unit_type]
+
+    def exposure_weights(self, game_state, player_index=1):
+        """Counts how many of a player's spawn paths cross each tile
+
+        Args:
+            * game_state: An AdvancedGameState
+            * player_index: The player whose paths should be defended against, 1 for the enemy
+
+        Returns:
+            A dict from tile id to the number of paths crossing it
+
+        """
+        size = game_state.ARENA_SIZE
+        weights = {}
+        for report in game_state.edge_exposure(player_index).values():
+            for x, y in report["path"]:
+                tile = x * size + y
+                weights[tile] = weights.get(tile, 0) + 1
+        return weights
+
+    def choose(self, game_state, unit_type, num=None, exclude=None, weights=None):
+        """Picks the best locations for up to num new firewalls
+
+        Paths are not recomputed as locations are picked, so later picks assume the enemy keeps
+        walking the paths it had before the earlier picks were built.
+
+        Args:
+            * game_state: An AdvancedGameState
+            * unit_type: The firewall type to place
+            * num: The most locations to pick. Defaults to as many as you can afford.
+            * exclude: Locations that must not be picked
+            * weights: A dict from tile id to weight. Defaults to exposure_weights(game_state).
+
+        Returns:
+            A list of [x, y] locations, best first. Locations that add no coverage are never picked.
+
+        """
+        affordable = game_state.number_affordable(unit_type)
+        num = affordable if num is None else min(num, affordable)
+        if num <= 0:
+            return []
+        if weights is None:
+            weights = self.exposure_weights(game_state)
+        coverage = self.coverage(game_state, unit_type)
+        game_map = game_state.game_map
+        size = game_map.ARENA_SIZE
+        excluded = set((location[0], location[1]) for location in exclude or [])
+
+        covered = {}
+        for x in range(size):
+            for y in range(size):
+                if game_map.in_arena_bounds([x, y]):
+                    for unit in game_map[x, y]:
+                        if unit.unit_type == unit_type and unit.player_index == 0:
+                            for tile in coverage[x * size + y]:
+                                covered[tile] = covered.get(tile, 0) + 1
+
+        def gain(tile):
+            return sum(weights[covering] * self.decay ** covered.get(covering, 0)
+                       for covering in coverage[tile] if covering in weights)
+
+        heap = []
+        for x in range(size):
+            for y in range(game_state.HALF_ARENA):
+                if (x, y) not in excluded and game_map.in_arena_bounds([x, y]) and len(game_map[x, y]) == 0:
+                    tile = x * size + y
+                    heap.append((-gain(tile), tile))
+        heapq.heapify(heap)
+
+        chosen = []
+        while heap and len(chosen) < num:
+            _, tile = heapq.heappop(heap)
+            current = gain(tile)
+            if current <= 0:
+                continue
+            if heap and current < -heap[0][0]:
+                heapq.heappush(heap, (-current, tile))
+                continue
+            chosen.append(list(divmod(tile, size)))
+            for covering in coverage[tile]:
+                covered[covering] = covered.get(covering, 0) + 1
+        return chosen
+
+    def place(self, game_state, unit_type, num=None, exclude=None, weights=None):
+        """Spawns firewalls at the locations picked by choose
+
+        Returns:
+            The list of locations a firewall was spawned at
+
+        """
+        placed = []
+        for location in self.choose(game_state, unit_type, num, exclude, weights):
+            if game_state.attempt_spawn(unit_type, location):
+                placed.append(location)
+        return placed
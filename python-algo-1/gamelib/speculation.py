@@ -0,0 +1,113 @@
+import threading
+
+from .game_map import zobrist_key
+from .util import debug_write
+
+def layout_hash_from_state(state):
+    """Hashes the firewall layout of a parsed game state message
+
+    Matches GameMap.layout_hash for a GameState built from the same message, without
+    building the map.
+
+    Args:
+        * state: A game state message that has already been parsed with json.loads
+
+    Returns:
+        A 64 bit integer identifying the firewall layout
+
+    """
+    layout_hash = 0
+    for player_index, key in enumerate(["p1Units", "p2Units"]):
+        for type_index, units in enumerate(state[key][:3]):
+            for uinfo in units:
+                x, y = map(int, uinfo[:2])
+                layout_hash ^= zobrist_key(type_index, player_index, x, y)
+    return layout_hash
+
+class SpeculativePlanner:
+    """Runs speculative work on a background thread while the engine plays out the action phase
+
+    Work is scheduled with the latest known game state string and the hash of its firewall layout.
+    Only the most recent pending state is kept, and each layout is only computed once. When the
+    next turn arrives, reconcile() keeps the results whose layout hash matches the real board
+    and discards everything else.
+
+    Attributes:
+        * results (dict): The reconciled results for the current turn. Empty if nothing matched.
+
+    """
+    def __init__(self, speculate):
+        """Creates an idle planner
+
+        Args:
+            * speculate: A function taking a game state string and returning a dict of results
+
+        """
+        self.results = {}
+        self._speculate = speculate
+        self._condition = threading.Condition()
+        self._interrupted = threading.Event()
+        self._pending = None
+        self._cache = {}
+        self._thread = None
+
+    def schedule(self, board_hash, game_state_string):
+        """Queues speculative work for a board, replacing any work that has not started yet
+
+        Args:
+            * board_hash: The layout hash of the board described by game_state_string
+            * game_state_string: The game state the speculative work should start from
+
+        """
+        with self._condition:
+            if board_hash in self._cache:
+                return
+            self._pending = (board_hash, game_state_string)
+            self._interrupted.clear()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="speculative-planner")
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+
+    def reconcile(self, board_hash):
+        """Keeps the speculative results computed for board_hash and discards the rest
+
+        Work that is still running is interrupted, and its results are dropped unless they
+        finish for a matching board before the next reconcile.
+
+        Args:
+            * board_hash: The layout hash of the board we actually have to play on
+
+        Returns:
+            The dict of results computed for this board, or an empty dict
+
+        """
+        self._interrupted.set()
+        with self._condition:
+            self._pending = None
+            self.results = self._cache.get(board_hash, {})
+            self._cache = {}
+        return self.results
+
+    def interrupted(self):
+        """Long running speculative work should poll this and return early when it is True
+        """
+        return self._interrupted.is_set()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None:
+                    self._condition.wait()
+                board_hash, game_state_string = self._pending
+                self._pending = None
+            try:
+                results = self._speculate(game_state_string)
+            except Exception as e:
+                debug_write("Speculative planning failed: {}".format(e))
+                continue
+            if self._interrupted.is_set():
+                continue
+            with self._condition:
+                self._cache[board_hash] = results or {}
@@ -0,0 +1,172 @@
+import pickle
+
+from .util import debug_write
+
+class TranspositionTable:
+    """A bounded cache of board evaluations that survives between turns
+
+    Evaluations are keyed by the firewall layout hash of the board, both players' resources rounded to
+    resource_step, and the turn number. The table has a fixed number of slots. When two keys collide in
+    a slot, the new entry replaces the old one if it was searched at least as deep or if the old one is
+    from an earlier generation. Call new_generation() once per turn so stale entries age out.
+
+    Attributes:
+        * capacity (int): The number of slots in the table
+        * resource_step (float): Resources are rounded to a multiple of this before being hashed
+        * generation (int): The age of entries stored now
+        * hits, misses, stores, replacements, rejections (int): Usage statistics
+
+    """
+    def __init__(self, capacity=65536, resource_step=1.0):
+        """Creates an empty table
+
+        Args:
+            * capacity: The maximum number of entries held at once
+            * resource_step: Resources closer than this are treated as the same
+
+        """
+        self.capacity = capacity
+        self.resource_step = resource_step
+        self.generation = 0
+        self._slots = [None] * capacity
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+        self.rejections = 0
+
+    def key(self, game_state, extra=None):
+        """Builds the key of a game state
+
+        Args:
+            * game_state: The GameState to key
+            * extra: Anything hashable that the evaluation also depends on, for example the unit type being evaluated
+
+        Returns:
+            A tuple usable with probe and store
+
+        """
+        resources = []
+        for player_index in range(2):
+            for resource_type in [game_state.BITS, game_state.CORES]:
+                resources.append(int(round(game_state.get_resource(resource_type, player_index) / self.resource_step)))
+        return (game_state.game_map.layout_hash(), tuple(resources), game_state.turn_number, extra)
+
+    def new_generation(self):
+        """Marks every entry stored so far as older than the ones stored from now on
+        """
+        self.generation += 1
+
+    def probe(self, key, min_depth=0):
+        """Looks up an evaluation
+
+        Args:
+            * key: A key built by key()
+            * min_depth: Entries searched shallower than this are treated as missing
+
+        Returns:
+            The stored value, or None if there is none
+
+        """
+        entry = self._slots[hash(key) % self.capacity]
+        if entry is not None and entry[0] == key and entry[2] >= min_depth:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def store(self, key, value, depth=0):
+        """Stores an evaluation, replacing a colliding entry by depth or age
+
+        Args:
+            * key: A key built by key()
+            * value: The evaluation
+            * depth: How deep the search behind this value was. Deeper entries are kept over shallower ones.
+
+        Returns:
+            True if the value was stored
+
+        """
+        index = hash(key) % self.capacity
+        entry = self._slots[index]
+        if entry is not None:
+            if entry[2] > depth and entry[3] >= self.generation:
+                self.rejections += 1
+                return False
+            if entry[0] != key:
+                self.replacements += 1
+        self._slots[index] = (key, value, depth, self.generation)
+        self.stores += 1
+        return True
+
+    def get_or_compute(self, key, compute, depth=0):
+        """Returns the stored value for key, computing and storing it with compute() on a miss
+        """
+        value = self.probe(key, depth)
+        if value is None:
+            value = compute()
+            self.store(key, value, depth)
+        return value
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def stats(self):
+        """Gets usage statistics
+
+        Returns:
+            A dict with the hit rate, the number of entries held and the raw counters
+
+        """
+        return {
+            "hit_rate": self.hit_rate(),
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "replacements": self.replacements,
+            "rejections": self.rejections
+        }
+
+    def __len__(self):
+        return sum(1 for entry in self._slots if entry is not None)
+
+    def save(self, path):
+        """Writes every entry to disk so the next match can start with a warm table
+
+        Values must be picklable.
+        """
+        entries = [entry for entry in self._slots if entry is not None]
+        with open(path, "wb") as f:
+            pickle.dump({"generation": self.generation, "resource_step": self.resource_step, "entries": entries}, f)
+
+    def load(self, path):
+        """Adds the entries saved by save() to this table
+
+        Loaded entries are one generation older than anything stored afterwards. A missing or unreadable
+        file leaves the table unchanged.
+
+        Returns:
+            The number of entries loaded
+
+        """
+        try:
+            with open(path, "rb") as f:
+                saved = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            debug_write("Could not load transposition table from {}: {}".format(path, e))
+            return 0
+        if saved["resource_step"] != self.resource_step:
+            debug_write("Transposition table at {} uses a different resource_step, ignoring it".format(path))
+            return 0
+        self.new_generation()
+        loaded = 0
+        for key, value, depth, _ in saved["entries"]:
+            if self.store(key, value, depth):
+                loaded += 1
+        self.new_generation()
+        return loaded
@@ -2,6 +2,7 @@ import gamelib
 import random
 import math
 import warnings
+import sys
 from sys import maxsize
 
 """
@@ -41,6 +42,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         SCRAMBLER = config["unitInformation"][5]["shorthand"]
 
         self.pathfinder = gamelib.navigation.ShortestPathFinder()
+        self.spawn_ranker = gamelib.SpawnRanker()
 
 
     def on_turn(self, turn_state):
@@ -170,65 +172,20 @@ class AlgoStrategy(gamelib.AlgoCore):
         return filtered
 
     def check_friendly_pathing(self, locations, game_state):
-        #start with a set of positions in row 13 (y = 13) that are empty. 
-        escapable_locations = set()
-        for i in range(28):
-            location = (i, 13)
-            if not game_state.contains_stationary_unit(location):
-                escapable_locations.update([location])
-        prevSize = 0
-        while len(escapable_locations) > prevSize:
-            new_locations = set()
-            prevSize = len(escapable_locations)
-            #now need to add all the new locations
-            for location in escapable_locations:
-                adjacent_locations = {
-                    (location[0]+1, location[1]),
-                    (location[0]-1, location[1]),
-                    (location[0], location[1]+1),
-                    (location[0], location[1]-1)
-                }
-                for new_loc in adjacent_locations:
-                    if game_state.game_map.in_arena_bounds(new_loc):
-                        if not game_state.contains_stationary_unit(new_loc):
-                            new_locations.update([new_loc])
-            escapable_locations = escapable_locations.union(new_locations)
-        good_locations = []
-        for loc in locations:
-            if tuple(loc) in escapable_locations:
-                good_locations.append(loc)
-        return good_locations
+        # keep the locations that can still walk out to the middle row (y = 13)
+        reachability = gamelib.Reachability(game_state)
+        return [loc for loc in locations if reachability.can_reach_row(loc, 13)]
 
     def rank_spawns(self, available_spawns, game_state):
-        current_best_spawn = None
-        current_lowest_damage = -1
-        if len(available_spawns) > 0:
-            for spawn_point in available_spawns:
-                damage = self.damage_taken(spawn_point, game_state)
-                if current_best_spawn == None or (damage != None and current_lowest_damage > damage):
-                    current_best_spawn = spawn_point
-                    current_lowest_damage = damage
-            return current_best_spawn
-        return None
-
-    def damage_taken(self, spawn_point, game_state):
-        spawn_edge = []
-        if spawn_point in game_state.game_map.get_edge_locations(game_state.game_map.BOTTOM_LEFT):
-            spawn_edge = game_state.game_map.get_edge_locations(game_state.game_map.BOTTOM_LEFT)
-        elif spawn_edge in game_state.game_map.get_edge_locations(game_state.game_map.BOTTOM_RIGHT):
-            spawn_edge = game_state.game_map.get_edge_locations(game_state.game_map.BOTTOM_RIGHT)
-        if len(spawn_edge) > 0:
-            targets = []
-            for point in spawn_edge:
-                targets.append( [27-point[0], 27-point[1]])
-            path = self.pathfinder.navigate_multiple_endpoints(spawn_point, targets, game_state)    
-            totalDamage = 0
-            for l in path:
-                for enemy_unit in game_state.get_attackers(l, 0):
-                    totalDamage += enemy_unit.damage
-            return totalDamage
+        # the ranker evaluates every spawn at once and caches by board, so this is cheap to call
+        num_pings = max(1, game_state.number_affordable(PING))
+        return self.spawn_ranker.best(game_state, PING, num_pings, available_spawns)
 
 
 if __name__ == "__main__":
     algo = AlgoStrategy()
-    algo.start()
+    if "--serve" in sys.argv:
+        # Keep playing games handed over by run.sh, see gamelib/server.py
+        gamelib.serve(algo)
+    else:
+        algo.start()
@@ -2,9 +2,12 @@ import math
 import json
 
 from .navigation import ShortestPathFinder
-from .util import send_command, debug_write
+from .util import send_command
+from .debug_log import get_log, WARNING
 from .unit import GameUnit
 from .game_map import GameMap
+from .watchdog import active_watchdog
+from .projection import bit_schedule
 
 def is_stationary(unit_type):
     return unit_type in FIREWALL_TYPES
@@ -83,6 +86,10 @@ class GameState:
                 {'cores': 0, 'bits': 0}]  # player 1, which is the opponent
         self.__parse_state(serialized_string)
 
+        self._watchdog = active_watchdog()
+        if self._watchdog is not None:
+            self._watchdog_turn = self._watchdog.track(self)
+
     def __parse_state(self, state_line):
         """
         Fills in map based on the serialized game state so that self.game_map[x,y] is a list of GameUnits at that location.
@@ -108,9 +115,20 @@ class GameState:
         p1units = state["p1Units"]
         p2units = state["p2Units"]
 
+        self._census = [self.__empty_census(), self.__empty_census()]
         self.__create_parsed_units(p1units, 0)
         self.__create_parsed_units(p2units, 1)
 
+    def __empty_census(self):
+        return {
+            "count": {unit_type: 0 for unit_type in ALL_UNITS},
+            "units": {unit_type: [] for unit_type in ALL_UNITS},
+            "locations": {unit_type: [] for unit_type in ALL_UNITS},
+            "health": {unit_type: 0.0 for unit_type in ALL_UNITS},
+            "rows": {unit_type: [0] * self.ARENA_SIZE for unit_type in ALL_UNITS},
+            "row_locations": [[] for _ in range(self.ARENA_SIZE)]
+        }
+
     def __create_parsed_units(self, units, player_number):
         """
         Helper function for __parse_state to add units to the map.
@@ -130,6 +148,38 @@ class GameState:
                 else:
                     unit = GameUnit(unit_type, self.config, player_number, hp, x, y)
                     self.game_map[x,y].append(unit)
+                    census = self._census[player_number]
+                    census["count"][unit_type] += 1
+                    census["units"][unit_type].append(unit)
+                    census["locations"][unit_type].append([x, y])
+                    census["health"][unit_type] += hp
+                    census["rows"][unit_type][y] += 1
+                    census["row_locations"][y].append([x, y])
+
+    def census(self, player_index=0):
+        """Gets a summary of one player's units, built while the game state was parsed
+
+        The census describes the board as it was received at the start of the turn. Units added
+        to the map afterwards, for example with game_map.add_unit, are not counted. The returned
+        dict is shared, so do not modify it.
+
+        Args:
+            * player_index: The index corresponding to the player whose units you want, 0 for you 1 for the enemy
+
+        Returns:
+            A dict with:
+                * count: Maps each unit type to the number of units of that type
+                * units: Maps each unit type to a list of its GameUnits
+                * locations: Maps each unit type to a list of [x, y] locations, one per unit
+                * health: Maps each unit type to the total stability of its units
+                * rows: Maps each unit type to a list holding the number of its units in each row (indexed by y)
+                * row_locations: A list holding the [x, y] location of every unit in each row (indexed by y)
+
+        """
+        if not player_index == 1 and not player_index == 0:
+            self._invalid_player_index(player_index)
+            return
+        return self._census[player_index]
 
     def __resource_required(self, unit_type):
         return self.CORES if is_stationary(unit_type) else self.BITS
@@ -147,10 +197,10 @@ class GameState:
         self._player_resources[player_index][resource_key] = held_resource + amount
 
     def _invalid_player_index(self, index):
-        self.warn("Invalid player index {} passed, player index should always be 0 (yourself) or 1 (your opponent)".format(index))
+        self.warn("Invalid player index {} passed, player index should always be 0 (yourself) or 1 (your opponent)", index)
     
     def _invalid_unit(self, unit):
-        self.warn("Invalid unit {}".format(unit))
+        self.warn("Invalid unit {}", unit)
 
     def submit_turn(self):
         """Submit and end your turn.
@@ -159,8 +209,13 @@ class GameState:
         """
         build_string = json.dumps(self._build_stack)
         deploy_string = json.dumps(self._deploy_stack)
-        send_command(build_string)
-        send_command(deploy_string)
+        if self._watchdog is not None:
+            if not self._watchdog.submit(build_string, deploy_string, self._watchdog_turn):
+                self.warn("Turn {} was already submitted by the watchdog, ignoring late submission", self.turn_number)
+        else:
+            send_command(build_string)
+            send_command(deploy_string)
+        get_log().flush()
 
     def get_resource(self, resource_type, player_index = 0):
         """Gets a players resources
@@ -177,7 +232,7 @@ class GameState:
             self._invalid_player_index(player_index)
             return
         if not resource_type == self.BITS and not resource_type == self.CORES:
-            self.warn("Invalid resource_type '{}'. Please use game_state.BITS or game_state.CORES".format(resource_type))
+            self.warn("Invalid resource_type '{}'. Please use game_state.BITS or game_state.CORES", resource_type)
             return
 
         if resource_type == self.BITS:
@@ -220,18 +275,18 @@ class GameState:
         """
 
         if turns_in_future < 1 or turns_in_future > 99:
-            self.warn("Invalid turns in future used ({}). Turns in future should be between 1 and 99".format(turns_in_future))
+            self.warn("Invalid turns in future used ({}). Turns in future should be between 1 and 99", turns_in_future)
         if not player_index == 1 and not player_index == 0:
             self._invalid_player_index(player_index)
         if type(current_bits) == int and current_bits < 0:
-            self.warn("Invalid current bits ({}). Current bits cannot be negative.".format(current_bits))
+            self.warn("Invalid current bits ({}). Current bits cannot be negative.", current_bits)
 
         bits = self.get_resource(self.BITS, player_index) if not current_bits else current_bits
         for increment in range(1, turns_in_future + 1):
             current_turn = self.turn_number + increment
             bits *= (1 - self.config["resources"]["bitDecayPerRound"])
-            bits_gained = self.config["resources"]["bitsPerRound"] + (current_turn // self.config["resources"]["turnIntervalForBitSchedule"])
-            bits += bits_gained
+            bits_gained, bit_cap = bit_schedule(self.config, current_turn)
+            bits = min(bits + bits_gained, bit_cap)
             bits = round(bits, 1)
         return bits
 
@@ -274,7 +329,7 @@ class GameState:
         
         if not self.game_map.in_arena_bounds(location):
             if self.enable_warnings:
-                self.warn("Could not spawn {} at location {}. Location invalid.".format(unit_type, location))
+                self.warn("Could not spawn {} at location {}. Location invalid.", unit_type, location)
             return False
 
         affordable = self.number_affordable(unit_type) >= num
@@ -283,7 +338,7 @@ class GameState:
         correct_territory = location[1] < self.HALF_ARENA
         on_edge = location in (self.game_map.get_edge_locations(self.game_map.BOTTOM_LEFT) + self.game_map.get_edge_locations(self.game_map.BOTTOM_RIGHT))
 
-        if self.enable_warnings:
+        if self.enable_warnings and get_log().enabled(WARNING):
             fail_reason = ""
             if not affordable:
                 fail_reason = fail_reason + " Not enough resources."
@@ -294,7 +349,7 @@ class GameState:
             if not (stationary or on_edge):
                 fail_reason = fail_reason + " Information units must be deployed on the edge."
             if len(fail_reason) > 0:
-                self.warn("Could not spawn {} at location {}.{}".format(unit_type, location, fail_reason))
+                self.warn("Could not spawn {} at location {}.{}", unit_type, location, fail_reason)
 
         return (affordable and correct_territory and not blocked and
                 (stationary or on_edge) and
@@ -316,7 +371,7 @@ class GameState:
             self._invalid_unit(unit_type)
             return
         if num < 1:
-            self.warn("Attempted to spawn fewer than one units! ({})".format(num))
+            self.warn("Attempted to spawn fewer than one units! ({})", num)
             return
       
         if type(locations[0]) == int:
@@ -325,18 +380,25 @@ class GameState:
         for location in locations:
             for i in range(num):
                 if self.can_spawn(unit_type, location, 1):
-                    x, y = map(int, location)
-                    cost = self.type_cost(unit_type)
-                    resource_type = self.__resource_required(unit_type)
-                    self.__set_resource(resource_type, 0 - cost)
-                    self.game_map.add_unit(unit_type, location, 0)
-                    if is_stationary(unit_type):
-                        self._build_stack.append((unit_type, x, y))
-                    else:
-                        self._deploy_stack.append((unit_type, x, y))
+                    self._commit_spawn(unit_type, location)
                     spawned_units += 1
         return spawned_units
 
+    def _commit_spawn(self, unit_type, location):
+        """
+        Spends the resources for a unit, adds it to the map and pushes it onto the build or deploy stack.
+        The caller must already have checked can_spawn.
+        """
+        x, y = map(int, location)
+        cost = self.type_cost(unit_type)
+        resource_type = self.__resource_required(unit_type)
+        self.__set_resource(resource_type, 0 - cost)
+        self.game_map.add_unit(unit_type, location, 0)
+        if is_stationary(unit_type):
+            self._build_stack.append((unit_type, x, y))
+        else:
+            self._deploy_stack.append((unit_type, x, y))
+
     def attempt_remove(self, locations):
         """Attempts to remove existing friendly firewalls in the given locations.
 
@@ -356,7 +418,7 @@ class GameState:
                 self._build_stack.append((REMOVE, x, y))
                 removed_units += 1
             else:
-                self.warn("Could not remove a unit from {}. Location has no firewall or is enemy territory.".format(location))
+                self.warn("Could not remove a unit from {}. Location has no firewall or is enemy territory.", location)
         return removed_units
 
     def find_path_to_edge(self, start_location, target_edge):
@@ -372,7 +434,7 @@ class GameState:
 
         """
         if self.contains_stationary_unit(start_location):
-            self.warn("Attempted to perform pathing from blocked starting location {}".format(start_location))
+            self.warn("Attempted to perform pathing from blocked starting location {}", start_location)
             return
         end_points = self.game_map.get_edge_locations(target_edge)
         return self._shortest_path_finder.navigate_multiple_endpoints(start_location, end_points, self)
@@ -393,9 +455,11 @@ class GameState:
                 return unit
         return False
 
-    def warn(self, message):
+    def warn(self, message, *args):
+        """Logs a warning, formatting message with args only if it is actually written
+        """
         if(self.enable_warnings):
-            debug_write(message)
+            get_log().warning(message, *args)
 
     def suppress_warnings(self, suppress):
         """Suppress all warnings
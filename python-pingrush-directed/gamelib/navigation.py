@@ -70,15 +70,73 @@ class ShortestPathFinder:
 
         #Initialize map 
         self.initialize_map(game_state)
-        #Fill in walls
-        for location in self.game_state.game_map:
-            if self.game_state.contains_stationary_unit(location):
-                self.game_map[location[0]][location[1]].blocked = True
+        self._fill_walls()
         #Do pathfinding
         ideal_endpoints = self._idealness_search(start_point, end_points)
         self._validate(ideal_endpoints, end_points)
         return self._get_path(start_point, end_points)
 
+    def navigate_multiple_starts(self, start_points, end_points, game_state):
+        """Finds the paths units at many starting locations would take to reach the same endpoints
+
+        Gives the same paths as calling navigate_multiple_endpoints for each start point, but the idealness
+        search is done once per pocket of pathable space, and every start that can reach the endpoints
+        shares a single distance field.
+
+        Args:
+            * start_points: The starting locations of the units
+            * end_points: The end points of the units, should be a list of edge locations
+            * game_state: The current game state
+
+        Returns:
+            A list with the path of each start point, or None for start points that are blocked
+
+        """
+        self.initialize_map(game_state)
+        self._fill_walls()
+
+        #Find the most ideal tile of each pocket the start points are in
+        pocket_ideals = {}
+        groups = {}
+        for index, start_point in enumerate(start_points):
+            if game_state.contains_stationary_unit(start_point):
+                continue
+            start = (start_point[0], start_point[1])
+            if start not in pocket_ideals:
+                ideal_tile = self._idealness_search(start_point, end_points)
+                for x in range(self.game_state.ARENA_SIZE):
+                    for y in range(self.game_state.ARENA_SIZE):
+                        if self.game_map[x][y].visited_idealness and (x, y) not in pocket_ideals:
+                            pocket_ideals[(x, y)] = ideal_tile
+                pocket_ideals[start] = ideal_tile
+            ideal_tile = pocket_ideals[start]
+            #Every start that can reach an endpoint uses the same distance field
+            group = None if ideal_tile in end_points else (ideal_tile[0], ideal_tile[1])
+            groups.setdefault(group, []).append(index)
+
+        paths = [None] * len(start_points)
+        for group, indexes in groups.items():
+            self._reset_validation()
+            self._validate(end_points[0] if group is None else list(group), end_points)
+            for index in indexes:
+                paths[index] = self._get_path(start_points[index], end_points)
+        return paths
+
+    def _fill_walls(self):
+        """Marks the nodes of every location containing a firewall as blocked
+        """
+        for location in self.game_state.game_map:
+            if self.game_state.contains_stationary_unit(location):
+                self.game_map[location[0]][location[1]].blocked = True
+
+    def _reset_validation(self):
+        """Clears the pathlengths set by a previous validation step
+        """
+        for column in self.game_map:
+            for node in column:
+                node.visited_validate = False
+                node.pathlength = -1
+
     def _idealness_search(self, start, end_points):
         """
         Finds the most ideal tile in our 'pocket' of pathable space. 
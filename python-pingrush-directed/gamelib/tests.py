@@ -1,8 +1,32 @@
 import unittest
 import json
+import time
+import io
+import os
+import contextlib
+import copy
+import random
+import tempfile
+import socket
+import subprocess
+import sys
 from .game_state import GameState
 from .unit import GameUnit
 from .advanced_game_state import AdvancedGameState
+from .speculation import SpeculativePlanner, layout_hash_from_state
+from .watchdog import TurnWatchdog
+from .debug_log import DebugLog, DEBUG, WARNING, OFF
+from .transposition import TranspositionTable
+from .spawn_ranking import SpawnRanker
+from .reachability import Reachability
+from .placement import PlacementOptimizer
+from .budget import BudgetAllocator
+from .plan import TurnPlan
+from .projection import ResourceProjector, bit_schedule
+from . import util
+from .transport import StdioTransport, StreamTransport, SocketTransport, QueueTransport, TransportClosed
+from .server import AlgoServer
+from .algocore import AlgoCore
 
 class BasicTests(unittest.TestCase):
 
@@ -243,3 +267,441 @@ class BasicTests(unittest.TestCase):
         actual = game.project_future_bits(turns)
         self.assertAlmostEqual(actual, expected, 0, "Expected {} power {} turns from now, got {}".format(expected, turns, actual))
 
+    def test_layout_hash(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        empty_hash = game.game_map.layout_hash()
+        self.assertEqual(empty_hash, layout_hash_from_state(json.loads(game.serialized_string)), "Map and state hashes disagree")
+        game.game_map.add_unit("PI", [13, 0], 0)
+        self.assertEqual(empty_hash, game.game_map.layout_hash(), "Information units should not change the layout hash")
+        game.game_map.add_unit("DF", [13, 5], 0)
+        destructor_hash = game.game_map.layout_hash()
+        self.assertNotEqual(empty_hash, destructor_hash, "Adding a firewall should change the layout hash")
+        game.game_map.remove_unit([13, 5])
+        game.game_map.add_unit("DF", [13, 5], 1)
+        self.assertNotEqual(destructor_hash, game.game_map.layout_hash(), "The owner of a firewall should change the layout hash")
+        game.game_map.remove_unit([13, 5])
+        self.assertEqual(empty_hash, game.game_map.layout_hash(), "Removing the firewall should restore the layout hash")
+
+    def test_speculative_planner(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        planner = SpeculativePlanner(lambda state_string: {"turn": json.loads(state_string)["turnInfo"][1]})
+        board_hash = game.game_map.layout_hash()
+        planner.schedule(board_hash, game.serialized_string)
+        for _ in range(200):
+            if board_hash in planner._cache:
+                break
+            time.sleep(0.01)
+        self.assertEqual({}, planner.reconcile(board_hash + 1), "Results from a different board should be discarded")
+        planner.schedule(board_hash, game.serialized_string)
+        for _ in range(200):
+            if board_hash in planner._cache:
+                break
+            time.sleep(0.01)
+        self.assertEqual({"turn": 0}, planner.reconcile(board_hash), "Results from a matching board should be kept")
+
+    def test_turn_watchdog(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        game.attempt_spawn("DF", [13, 6])
+        watchdog = TurnWatchdog({"timingAndReplay": {"waitTimeBotSoft": 50}}, 1.0)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            watchdog.start()
+            turn_id = watchdog.track(game)
+            for _ in range(200):
+                if watchdog.expired():
+                    break
+                time.sleep(0.01)
+            self.assertFalse(watchdog.submit("[]", "[]", turn_id), "A late submission should be ignored")
+            watchdog.start()
+            self.assertFalse(watchdog.submit("[]", "[]", turn_id), "A submission for an old turn should be ignored")
+            self.assertTrue(watchdog.submit("[]", "[]"), "The first submission of a turn should be sent")
+        self.assertEqual('[["DF", 13, 6]]\n[]\n[]\n[]\n', output.getvalue(), "The watchdog should submit exactly once per turn")
+
+    def test_debug_log(self, adv=False):
+        class Exploding:
+            def __format__(self, spec):
+                raise AssertionError("Disabled messages should never be formatted")
+
+        output = io.StringIO()
+        log = DebugLog(level=WARNING, capacity=2, stream=output)
+        log.log(DEBUG, "{}", Exploding())
+        log.warning("first {}", 1)
+        self.assertEqual("", output.getvalue(), "Messages should wait for a flush")
+        log.warning("second {} {}", 2, [3, 4])
+        log.error("third")
+        log.flush()
+        self.assertEqual("1 earlier debug messages were dropped\nsecond 2 [3, 4]\nthird\n", output.getvalue())
+        log.flush()
+        self.assertEqual(3, len(output.getvalue().splitlines()), "Flushing an empty log should write nothing")
+
+        log.warning("fourth {} {}", 4)
+        log.warning("fifth")
+        log.flush()
+        self.assertTrue(output.getvalue().endswith("fourth {} {} (4,)\nfifth\n"),
+                        "A message that does not match its args should be written as is, along with the rest")
+
+        log.level = OFF
+        log.error("{}", Exploding())
+        log.flush()
+        log.level = WARNING
+        log.buffered = False
+        log.warning("now")
+        self.assertTrue(output.getvalue().endswith("now\n"), "An unbuffered log should write immediately")
+
+    def test_transport(self, adv=False):
+        transport = QueueTransport()
+        util.set_transport(transport)
+        try:
+            transport.put("first")
+            self.assertEqual("first\n", util.get_command())
+            util.send_command("  [] ")
+            self.assertEqual("[]\n", transport.get(timeout=1), "Commands should be stripped and written to the transport")
+            transport.close()
+            with self.assertRaises(TransportClosed, msg="A closed queue transport should not exit the process"):
+                util.get_command()
+        finally:
+            util.set_transport(None)
+        self.assertTrue(isinstance(util.get_transport(), StdioTransport), "Unsetting the transport should go back to stdio")
+
+        read_fd, write_fd = os.pipe()
+        with os.fdopen(read_fd, "rb") as reader, os.fdopen(write_fd, "wb") as writer:
+            pipe = StreamTransport(reader, writer)
+            pipe.write("[[\"FF\", 13, 0]]\n")
+            self.assertEqual("[[\"FF\", 13, 0]]\n", pipe.readline())
+
+        left, right = socket.socketpair()
+        server, client = SocketTransport(left), SocketTransport(right)
+        client.write("hello\n")
+        self.assertEqual("hello\n", server.readline())
+        client.close()
+        self.assertEqual("", server.readline(), "A closed socket should read as the end of the stream")
+        server.close()
+
+    def test_arena_seed(self, adv=False):
+        class RandomAlgo(AlgoCore):
+            def on_game_start(self, config):
+                self.choice = random.random()
+
+        previous = os.environ.get("ARENA_SEED")
+        os.environ["ARENA_SEED"] = "3"
+        choices = []
+        try:
+            for _ in range(2):
+                algo = RandomAlgo()
+                transport = QueueTransport()
+                transport.put(json.dumps({"replaySave": 0}))
+                transport.close()
+                util.set_transport(transport)
+                with contextlib.redirect_stderr(io.StringIO()):
+                    algo.start()
+                choices.append(algo.choice)
+                random.seed()
+        finally:
+            util.set_transport(None)
+            if previous is None:
+                del os.environ["ARENA_SEED"]
+            else:
+                os.environ["ARENA_SEED"] = previous
+        self.assertEqual(choices[0], choices[1], "Games with the same ARENA_SEED should make the same random choices")
+
+    def test_server(self, adv=False):
+        class CountingAlgo(AlgoCore):
+            game_starts = 0
+
+            def on_game_start(self, config):
+                CountingAlgo.game_starts += 1
+
+        config = json.dumps({"replaySave": 0, "resources": {}})
+        game = "\n".join([config, json.dumps({"turnInfo": [0, 0, 0]}), json.dumps({"turnInfo": [2, 0, 0]})]) + "\n"
+        path = os.path.join(tempfile.mkdtemp(), "algo_server.sock")
+        relay = os.path.join(os.path.dirname(os.path.abspath(__file__)), "relay.py")
+        server = AlgoServer(CountingAlgo(), path)
+        server.listen()
+        try:
+            for _ in range(2):
+                p = subprocess.Popen([sys.executable, "-S", relay, path], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+                p.stdin.write(game.encode())
+                p.stdin.close()
+                conn, _ = server.sock.accept()
+                with contextlib.redirect_stderr(io.StringIO()):
+                    server.handle(conn)
+                conn.close()
+                self.assertEqual(b"\n\n", p.stdout.read(), "The game should be played by the server and its turn relayed back")
+                p.stdout.close()
+                self.assertEqual(0, p.wait())
+        finally:
+            server.close()
+        self.assertEqual(2, server.games)
+        self.assertEqual(1, CountingAlgo.game_starts, "A second game with the same config should not rerun on_game_start")
+        self.assertFalse(os.path.exists(path), "Closing the server should remove its socket")
+        self.assertEqual(3, subprocess.call([sys.executable, "-S", relay, path], stdin=subprocess.DEVNULL, stderr=subprocess.DEVNULL),
+                         "The relay should tell run.sh when there is no server")
+
+    def test_transposition_table(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        table = TranspositionTable(capacity=1)
+        key = table.key(game)
+        self.assertEqual(None, table.probe(key), "An empty table should miss")
+        self.assertTrue(table.store(key, 10, depth=2))
+        self.assertEqual(10, table.probe(key), "A stored value should hit")
+        self.assertEqual(None, table.probe(key, min_depth=3), "A shallower entry should not satisfy a deeper probe")
+
+        game.attempt_spawn("DF", [13, 6])
+        other_key = table.key(game)
+        self.assertNotEqual(key, other_key, "Building a firewall and spending cores should change the key")
+        self.assertFalse(table.store(other_key, 20, depth=1), "A shallower entry should not replace a deeper one")
+        table.new_generation()
+        self.assertTrue(table.store(other_key, 20, depth=1), "An entry from an older generation should be replaced")
+        self.assertEqual(20, table.probe(other_key))
+        self.assertEqual(None, table.probe(key), "The replaced entry should be gone")
+        self.assertAlmostEqual(0.4, table.stats()["hit_rate"], 7, "2 of the 5 probes should have hit")
+
+        path = os.path.join(tempfile.mkdtemp(), "table.pickle")
+        table.save(path)
+        loaded = TranspositionTable(capacity=1)
+        self.assertEqual(1, loaded.load(path), "The saved entry should be loaded")
+        self.assertEqual(20, loaded.probe(other_key), "Entries should survive a save and load")
+
+    def test_get_targets(self, adv=False):
+        game = self.make_turn_0_map(True)
+        rng = random.Random(4)
+        for _ in range(120):
+            x, y = rng.randint(0, 27), rng.randint(0, 27)
+            if game.game_map.in_arena_bounds([x, y]) and not game.contains_stationary_unit([x, y]):
+                game.game_map.add_unit(rng.choice(["FF", "EF", "DF", "PI", "EI", "SI"]), [x, y], rng.randint(0, 1))
+        units = game.all_units()
+        for unit in units:
+            unit.stability = rng.choice([5.0, 15.0, 40.0])
+        targets = game.get_targets(units)
+        self.assertEqual(len(units), len(targets))
+        for unit, target_index in zip(units, targets):
+            expected = game.get_target(unit)
+            got = units[target_index] if target_index is not None else None
+            self.assertIs(expected, got, "Batch targeting disagrees with get_target for {}".format(unit))
+
+    def test_get_attackers_batch(self, adv=False):
+        game = self.make_turn_0_map(True)
+        rng = random.Random(7)
+        for _ in range(40):
+            x, y = rng.randint(0, 27), rng.randint(0, 27)
+            if game.game_map.in_arena_bounds([x, y]):
+                game.game_map.add_unit(rng.choice(["DF", "DF", "FF"]), [x, y], rng.randint(0, 1))
+        locations = [[x, y] for x in range(28) for y in range(28) if game.game_map.in_arena_bounds([x, y])]
+        for player_index in [0, 1]:
+            batch = game.get_attackers_batch(locations, player_index)
+            for location, attackers in zip(locations, batch):
+                self.assertEqual(game.get_attackers(location, player_index), attackers, "Batch attackers disagree at {}".format(location))
+
+        path = [[13, 13], [13, 14], [14, 14]]
+        exposure = game.get_path_attackers(path, 0)
+        for attacker, tiles in exposure.items():
+            self.assertEqual(tiles, sum(1 for location in path if attacker in game.get_attackers(location, 0)))
+        self.assertEqual(set(exposure), set(a for location in path for a in game.get_attackers(location, 0)))
+        frames = game.get_path_attackers(path, 0, "PI")
+        for attacker in exposure:
+            self.assertEqual(exposure[attacker] * 2, frames[attacker], "A ping spends 2 frames on each tile")
+
+    def test_edge_exposure(self, adv=False):
+        game = self.make_turn_0_map(True)
+        rng = random.Random(11)
+        for x in range(2, 26):
+            if x != 9:
+                game.game_map.add_unit("FF", [x, 12], 0)
+        for x in range(0, 27):
+            if x not in [4, 20]:
+                game.game_map.add_unit("FF", [x, 16], 1)
+        # Seal the bottom corner so two spawn locations cannot reach the edge
+        game.game_map.add_unit("FF", [13, 1], 0)
+        game.game_map.add_unit("FF", [14, 1], 0)
+        for _ in range(10):
+            x, y = rng.randint(0, 27), rng.randint(14, 27)
+            if game.game_map.in_arena_bounds([x, y]) and not game.contains_stationary_unit([x, y]):
+                game.game_map.add_unit("DF", [x, y], 1)
+        for player_index, edges in [(0, [(2, 0), (3, 1)]), (1, [(0, 2), (1, 3)])]:
+            exposure = game.edge_exposure(player_index)
+            for spawn_edge, target_edge in edges:
+                for location in game.game_map.get_edge_locations(spawn_edge):
+                    if game.contains_stationary_unit(location):
+                        self.assertNotIn(tuple(location), exposure)
+                        continue
+                    path = game.find_path_to_edge(location, target_edge)
+                    report = exposure[tuple(location)]
+                    self.assertEqual(path, report["path"], "Shared pathfinding disagrees with find_path_to_edge from {}".format(location))
+                    self.assertEqual(len(path) - 1, report["path_length"])
+                    self.assertEqual(location not in [[13, 0], [14, 0]], report["reaches_edge"])
+                    damage = sum(attacker.damage for tile in path for attacker in game.get_attackers(tile, player_index))
+                    self.assertEqual(damage, report["damage"], "Wrong damage from {}".format(location))
+
+    def test_spawn_ranking(self, adv=False):
+        game = self.make_turn_0_map(True)
+        game.game_map.add_unit("DF", [5, 10], 1)
+        ranker = SpawnRanker()
+        ranking = ranker.rank(game, "PI", 3)
+        self.assertEqual(28, len(ranking), "Every spawn location should be ranked")
+        exposure = game.edge_exposure(0, "PI")
+        for entry in ranking:
+            self.assertAlmostEqual(min(45, exposure[tuple(entry["location"])]["damage"]), entry["damage"])
+        for better, worse in zip(ranking, ranking[1:]):
+            self.assertGreaterEqual(better["breach_probability"], worse["breach_probability"], "Ranking is out of order")
+        self.assertIs(ranking, ranker.rank(game, "PI", 3), "Rankings should be cached for the same board")
+        self.assertEqual(0, ranking[0]["damage"], "Some spawn should avoid the destructor entirely")
+        self.assertEqual([13, 0], ranker.best(game, "PI", 3, available=[[13, 0]]))
+        game.game_map.add_unit("DF", [14, 4], 1)
+        self.assertIsNot(ranking, ranker.rank(game, "PI", 3), "Changing the board should invalidate the cache")
+
+    def test_census(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        state = json.loads(game.serialized_string)
+        state["p1Units"][0] = [[3, 12, 60.0, "1"], [4, 12, 30.0, "2"]]
+        state["p1Units"][2] = [[13, 13, 75.0, "3"]]
+        state["p2Units"][2] = [[20, 15, 75.0, "4"]]
+        state["p2Units"][6] = [[20, 15, 0.0, "5"]]
+        game = type(game)(game.config, json.dumps(state))
+        game.suppress_warnings(True)
+
+        mine = game.census()
+        self.assertEqual(2, mine["count"]["FF"])
+        self.assertEqual(1, mine["count"]["DF"])
+        self.assertEqual(0, mine["count"]["PI"])
+        self.assertEqual([[3, 12], [4, 12]], mine["locations"]["FF"])
+        self.assertEqual(90.0, mine["health"]["FF"])
+        self.assertEqual(2, mine["rows"]["FF"][12])
+        self.assertEqual([[13, 13]], mine["row_locations"][13])
+        self.assertIs(game.game_map[13, 13][0], mine["units"]["DF"][0])
+
+        theirs = game.census(1)
+        self.assertEqual(1, theirs["count"]["DF"], "Removals should not be counted as units")
+        self.assertEqual([[20, 15]], theirs["row_locations"][15])
+        self.assertIsNone(game.census(2))
+
+    def test_budget_allocator(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        game._GameState__set_resource(game.CORES, 6 - game.get_resource(game.CORES))
+        allocator = BudgetAllocator(game)
+        allocator.add("EF", [13, 5], 5)
+        allocator.add("DF", [13, 5], 4)
+        allocator.add("DF", [14, 5], 4)
+        allocator.add("FF", [3, 10], 1)
+        allocator.add("FF", [13, 20], 100)
+        allocator.add("PI", [13, 0], 100)
+
+        chosen = allocator.allocate()
+        self.assertEqual([("DF", [13, 5]), ("DF", [14, 5])], [(c["unit_type"], c["location"]) for c in chosen],
+                         "Two destructors are worth more than an encryptor and a filter")
+        self.assertEqual([("FF", [3, 10])], [(c["unit_type"], c["location"]) for c in allocator.deferred])
+
+        self.assertEqual(2, allocator.commit())
+        self.assertEqual(0, game.get_resource(game.CORES))
+        self.assertEqual([("DF", 13, 5), ("DF", 14, 5)], game._build_stack)
+        self.assertEqual(0, allocator.commit(), "Committing should consume the candidates")
+
+    def test_turn_plan(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        game.game_map.add_unit("FF", [5, 10], 0)
+        game._GameState__set_resource(game.CORES, 5 - game.get_resource(game.CORES))
+        plan = TurnPlan(game)
+        plan.spawn("FF", [[3, 10], [4, 10]])
+        plan.spawn("EF", [4, 10], priority=1)
+        plan.spawn("DF", [13, 20])
+        plan.spawn("PI", [13, 5])
+        plan.spawn("PI", [13, 0], num=2)
+        plan.remove([[5, 10], [5, 10], [6, 10]])
+
+        self.assertEqual(5, plan.commit())
+        self.assertEqual([("EF", 4, 10), ("FF", 3, 10), ("RM", 5, 10)], game._build_stack,
+                         "The higher priority encryptor should win [4, 10]")
+        self.assertEqual([("PI", 13, 0), ("PI", 13, 0)], game._deploy_stack)
+        reasons = sorted((tuple(drop["location"]), drop["reason"]) for drop in plan.dropped)
+        self.assertEqual([((4, 10), "occupied"), ((5, 10), "already removed"), ((6, 10), "no firewall"),
+                          ((13, 5), "not on an edge"), ((13, 20), "enemy territory")], reasons)
+
+        plan.spawn("FF", [[7, 10]])
+        self.assertEqual(0, plan.commit())
+        self.assertEqual("unaffordable", plan.dropped[0]["reason"])
+
+    def test_resource_projector(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        projector = ResourceProjector(game.config)
+        table = projector.table(game)
+        self.assertEqual(101, len(table["bits"][0]))
+        for turns in [1, 5, 10, 11, 20, 99]:
+            self.assertEqual(game.project_future_bits(turns), projector.bits(game, turns), "Projection disagrees at {} turns".format(turns))
+            self.assertEqual(game.project_future_bits(turns, 1), projector.bits(game, turns, 1))
+        self.assertIs(table, projector.table(game), "The table should be cached for the turn")
+        self.assertEqual(25 + 3 * 5, projector.cores(game, 3))
+        self.assertEqual(25 + 3 * (5 + 2), projector.cores(game, 3, 1, expected_damage=(0, 2)))
+
+        self.assertEqual((5.0, 999999.0), bit_schedule(game.config, 9))
+        self.assertEqual((6.0, 1000004.0), bit_schedule(game.config, 10))
+        self.assertEqual((7.0, 1000009.0), bit_schedule(game.config, 20))
+        game.config["resources"]["maxBits"] = 8.0
+        capped = ResourceProjector(game.config)
+        self.assertEqual(8.0, capped.bits(game, 5), "Bits should not grow past the cap")
+
+    def test_evaluate_defense(self, adv=False):
+        game = self.make_turn_0_map(True)
+        hypothetical = copy.deepcopy(game.game_map)
+        hypothetical.add_unit("DF", [13, 11], 0)
+        evaluation = game.evaluate_defense(hypothetical)
+        self.assertEqual(28, len(evaluation), "Every enemy spawn location should be evaluated")
+        self.assertEqual({}, game.get_attacker_coverage(1), "Evaluating a hypothetical map should not touch the real one")
+        self.assertTrue(all(report["damage"]["PI"] == 0 for report in game.evaluate_defense().values()))
+
+        game.game_map.add_unit("DF", [13, 11], 0)
+        exposure = game.edge_exposure(1, "PI")
+        for location, report in evaluation.items():
+            self.assertEqual(exposure[location]["path"], report["path"])
+            self.assertAlmostEqual(exposure[location]["damage"], report["damage"]["PI"])
+            self.assertAlmostEqual(report["damage"]["PI"] * 2, report["damage"]["EI"], msg="EMPs are half as fast as pings")
+        self.assertTrue(any(report["tiles_under_fire"] > 0 for report in evaluation.values()))
+
+    def test_placement_optimizer(self, adv=False):
+        game = self.make_turn_0_map(True)
+        optimizer = PlacementOptimizer()
+        coverage = optimizer.coverage(game, "DF")
+        self.assertEqual(sorted(x * 28 + y for x, y in game.game_map.get_locations_in_range([13, 5], 3)), sorted(coverage[13 * 28 + 5]))
+
+        weights = {13 * 28 + 5: 10, 3 * 28 + 10: 6}
+        chosen = optimizer.choose(game, "DF", 2, weights=weights)
+        self.assertEqual(2, len(chosen))
+        self.assertIn(13 * 28 + 5, coverage[chosen[0][0] * 28 + chosen[0][1]])
+        self.assertIn(3 * 28 + 10, coverage[chosen[1][0] * 28 + chosen[1][1]],
+                      "The second pick should cover the other tile, since covering [13, 5] twice is worth 5")
+        self.assertEqual([], optimizer.choose(game, "DF", 5, weights={13 * 28 + 27: 1}), "Locations adding nothing should not be picked")
+        self.assertNotIn([13, 5], optimizer.choose(game, "DF", 1, exclude=[[13, 5]], weights={13 * 28 + 5: 1}))
+
+        cores = game.get_resource(game.CORES)
+        placed = optimizer.place(game, "DF")
+        self.assertEqual(int(cores // game.type_cost("DF")), len(placed), "Should spend the whole budget")
+        self.assertEqual(len(placed), len(set(map(tuple, placed))))
+        for location in placed:
+            self.assertTrue(game.contains_stationary_unit(location))
+
+    def test_reachability(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        reachability = Reachability(game)
+        self.assertTrue(reachability.can_reach_row([13, 0], 13))
+        self.assertTrue(reachability.can_reach_edge([13, 0], game.game_map.TOP_RIGHT))
+        self.assertFalse(reachability.can_reach_row([0, 0], 13), "Out of bounds locations reach nothing")
+
+        self.assertTrue(reachability.add_firewall([13, 1]))
+        self.assertTrue(reachability.can_reach_row([13, 0], 13))
+        self.assertTrue(reachability.add_firewall([14, 1]))
+        self.assertFalse(reachability.add_firewall([14, 1]), "Blocking a blocked location should do nothing")
+        self.assertFalse(reachability.can_reach_row([13, 0], 13), "[13, 0] should be sealed in")
+        self.assertFalse(reachability.can_reach_edge([14, 0], game.game_map.TOP_LEFT))
+        self.assertFalse(reachability.can_reach_row([14, 1], 1), "Firewall locations reach nothing")
+        self.assertEqual(reachability.component([13, 0]), reachability.component([14, 0]))
+        self.assertEqual(2, len(reachability.reachable_locations([13, 0])))
+
+        game.game_map.add_unit("FF", [13, 1], 0)
+        game.game_map.add_unit("FF", [14, 1], 0)
+        fresh = Reachability(game)
+        for x in range(game.ARENA_SIZE):
+            for y in range(game.ARENA_SIZE):
+                self.assertEqual(fresh.can_reach_row([x, y], 13), reachability.can_reach_row([x, y], 13),
+                                 "Incremental update disagrees with a full relabel at {}".format([x, y]))
+
+        self.assertTrue(reachability.remove_firewall([14, 1]))
+        self.assertTrue(reachability.can_reach_row([13, 0], 13))
+        self.assertTrue(reachability.can_reach_row([14, 1], 13))
@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+
+from .util import send_command
+from .debug_log import get_log
+
+_active_watchdog = None
+
+def active_watchdog():
+    """Gets the watchdog guarding the current turn, or None if the watchdog is disabled
+    """
+    return _active_watchdog
+
+def set_active_watchdog(watchdog):
+    global _active_watchdog
+    _active_watchdog = watchdog
+
+class TurnWatchdog:
+    """Guarantees that exactly one turn is submitted before the engine's soft time limit
+
+    The watchdog is started when a turn message is received. If the turn has not been submitted
+    when the deadline passes, it submits the build and deploy stacks of the GameState being worked
+    on (or an empty turn if there is none) from a timer thread. Any submission after that, including
+    the strategy's own late call to submit_turn, is ignored.
+
+    Attributes:
+        * deadline (float): Seconds after the turn message was received at which the fallback is submitted
+        * turn_id (int): Increases by one every time a turn is started
+
+    """
+    def __init__(self, config, margin=0.8):
+        """Reads the soft time limit from the config
+
+        Args:
+            * config (JSON): A json object containing information about the game
+            * margin: The fraction of the soft time limit the strategy is allowed to use
+
+        """
+        soft_limit_ms = config["timingAndReplay"]["waitTimeBotSoft"]
+        self.deadline = margin * soft_limit_ms / 1000.0
+        self.turn_id = 0
+        self._lock = threading.Lock()
+        self._timer = None
+        self._started_at = None
+        self._submitted = True
+        self._game_state = None
+
+    def start(self, received_at=None):
+        """Starts timing a new turn
+
+        Args:
+            * received_at: The time.time() at which the turn message was received. Defaults to now.
+
+        """
+        self.stop()
+        with self._lock:
+            self.turn_id += 1
+            self._started_at = time.time() if received_at is None else received_at
+            self._submitted = False
+            self._game_state = None
+            remaining = max(0.0, self.deadline - (time.time() - self._started_at))
+            self._timer = threading.Timer(remaining, self._expire, args=(self.turn_id,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def stop(self):
+        """Stops the timer for the current turn without submitting anything
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def track(self, game_state):
+        """Remembers the first GameState created during the current turn as the source of the fallback
+
+        Returns:
+            The id of the current turn, which must be passed back to submit
+
+        """
+        with self._lock:
+            if self._game_state is None and not self._submitted:
+                self._game_state = game_state
+            return self.turn_id
+
+    def time_remaining(self):
+        """Seconds left before the fallback turn is submitted, 0 if it already was
+        """
+        if self._submitted or self._started_at is None:
+            return 0
+        return max(0.0, self.deadline - (time.time() - self._started_at))
+
+    def expired(self):
+        """True once the current turn has been submitted, by the strategy or by the watchdog
+        """
+        return self._submitted
+
+    def submit(self, build_string, deploy_string, turn_id=None):
+        """Submits a turn unless one has already been submitted for the current turn
+
+        Args:
+            * build_string: The serialized build stack
+            * deploy_string: The serialized deploy stack
+            * turn_id: The turn these stacks were made for. Defaults to the current turn.
+
+        Returns:
+            True if the turn was sent, False if it was late and ignored
+
+        """
+        with self._lock:
+            if self._submitted or (turn_id is not None and turn_id != self.turn_id):
+                return False
+            self._submitted = True
+            if self._timer is not None:
+                self._timer.cancel()
+            send_command(build_string)
+            send_command(deploy_string)
+            return True
+
+    def _expire(self, turn_id):
+        game_state = self._game_state
+        if game_state is not None:
+            build_string = json.dumps(list(game_state._build_stack))
+            deploy_string = json.dumps(list(game_state._deploy_stack))
+        else:
+            build_string = "[]"
+            deploy_string = "[]"
+        if self.submit(build_string, deploy_string, turn_id):
+            get_log().warning("Turn ran past {:.2f}s, submitted the best turn so far", self.deadline)
+            get_log().flush()
@@ -0,0 +1,114 @@
+import atexit
+import collections
+import sys
+import threading
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+class DebugLog:
+    """Collects debug messages in memory and writes them to stderr in one go
+
+    Messages below the log level are dropped before they are formatted, so a disabled message
+    costs one comparison. Messages are formatted lazily with str.format, only when the buffer is
+    flushed, so pass values that will not change before the end of the turn. The buffer is a
+    ring: once it holds capacity messages, the oldest are dropped and the flush says how many
+    were lost. A message that cannot be formatted with its args is written as the message
+    followed by the args, so a bad message never stops the rest of the log from being written.
+
+    gamelib flushes the log after every submitted turn and at the end of the game.
+
+    Attributes:
+        * level (int): Messages below this level are ignored. One of DEBUG, INFO, WARNING, ERROR or OFF.
+        * buffered (bool): If False, every message is written immediately, which is handy when debugging a crash
+        * capacity (int): The most messages held between flushes
+
+    """
+    def __init__(self, level=INFO, capacity=1000, buffered=True, stream=None):
+        """Creates an empty log
+
+        Args:
+            * level: The lowest level that is logged
+            * capacity: The most messages held between flushes
+            * buffered: If False, write every message immediately
+            * stream: Where to write. Defaults to sys.stderr at the time of the flush.
+
+        """
+        self.level = level
+        self.buffered = buffered
+        self.capacity = capacity
+        self.dropped = 0
+        self._stream = stream
+        self._buffer = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def enabled(self, level):
+        """True if messages of the given level would be logged
+        """
+        return level >= self.level
+
+    def log(self, level, message, *args):
+        """Logs a message
+
+        Args:
+            * level: The level of the message
+            * message: The message, formatted with message.format(*args) when written if args are given
+            * args: Values to format into the message
+
+        """
+        if level < self.level:
+            return
+        if len(self._buffer) == self.capacity:
+            self.dropped += 1
+        self._buffer.append((message, args))
+        if not self.buffered:
+            self.flush()
+
+    def debug(self, message, *args):
+        self.log(DEBUG, message, *args)
+
+    def info(self, message, *args):
+        self.log(INFO, message, *args)
+
+    def warning(self, message, *args):
+        self.log(WARNING, message, *args)
+
+    def error(self, message, *args):
+        self.log(ERROR, message, *args)
+
+    def flush(self):
+        """Writes every buffered message with a single write and empties the buffer
+        """
+        with self._lock:
+            if not self._buffer and not self.dropped:
+                return
+            lines = []
+            if self.dropped:
+                lines.append("{} earlier debug messages were dropped".format(self.dropped))
+                self.dropped = 0
+            while self._buffer:
+                message, args = self._buffer.popleft()
+                lines.append(_format(message, args))
+            stream = self._stream if self._stream is not None else sys.stderr
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
+
+def _format(message, args):
+    if not args:
+        return str(message)
+    try:
+        return message.format(*args)
+    except Exception:
+        # flushes happen after the turn was sent, or on the watchdog thread, so never raise here
+        return "{} {!r}".format(message, args)
+
+_log = DebugLog()
+atexit.register(lambda: _log.flush())
+
+def get_log():
+    """Gets the log shared by all of gamelib
+    """
+    return _log
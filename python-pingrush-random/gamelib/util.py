@@ -1,41 +1,70 @@
-import sys
+from .debug_log import get_log, INFO
+from .transport import StdioTransport, TransportClosed
 
 
 BANNER_TEXT = "---------------- Starting Your Algo --------------------"
 
+_transport = None
+
+def set_transport(transport):
+    """Sets how this copy of gamelib talks to the game
+
+    Args:
+        * transport: A transport from gamelib/transport.py, or any object with readline() and write(line).
+          None goes back to the default StdioTransport.
+
+    """
+    global _transport
+    _transport = transport
+
+def get_transport():
+    """Gets the transport commands are sent and received through, StdioTransport unless set_transport was called
+    """
+    global _transport
+    if _transport is None:
+        _transport = StdioTransport()
+    return _transport
+
 
 def get_command():
-    """Gets input from stdin
+    """Gets the next line from the game through the current transport, stdin by default
+
+    When the game has closed, StdioTransport exits the process. Other transports raise TransportClosed
+    so that the process can go on to play another game.
 
     """
+    transport = get_transport()
     try:
-        ret = sys.stdin.readline()
+        ret = transport.readline()
     except EOFError:
-        # Game parent process terminated so exit
-        debug_write("Got EOF, parent game process must have died, exiting for cleanup")
-        exit()
+        ret = ""
     if ret == "":
-        # Happens if parent game process dies, so exit for cleanup, 
-        # Don't change or starter-algo process won't exit even though the game has closed
-        debug_write("Got EOF, parent game process must have died, exiting for cleanup")
-        exit()
+        if getattr(transport, "exit_on_eof", True):
+            # Happens if parent game process dies, so exit for cleanup, 
+            # Don't change or starter-algo process won't exit even though the game has closed
+            debug_write("Got EOF, parent game process must have died, exiting for cleanup")
+            exit()
+        raise TransportClosed("The game closed the connection")
     return ret
 
 def send_command(cmd):
-    """Sends your turn to standard output.
+    """Sends your turn to the game through the current transport, stdout by default.
     Should usually only be called by 'GameState.submit_turn()'
 
     """
-    sys.stdout.write(cmd.strip() + "\n")
-    sys.stdout.flush()
+    get_transport().write(cmd.strip() + "\n")
 
 def debug_write(*msg):
     """Prints a message to the games debug output
 
+    Messages go through the buffered log in gamelib/debug_log.py, which writes them
+    to STDERR once per turn.
+
     Args:
         * msg: The message to output
 
     """
     #Printing to STDERR is okay and printed out by the game but doesn't effect turns.
-    sys.stderr.write(", ".join(map(str, msg)).strip() + "\n")
-    sys.stderr.flush()
+    log = get_log()
+    if log.enabled(INFO):
+        log.info(", ".join(map(str, msg)).strip())